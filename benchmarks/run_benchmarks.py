@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import logging
+import platform
+import resource
+import itertools
+import subprocess
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "src"))
+
+from src.fake_backend import FakeFleet, FakeClientPool, repository_arns
+from src.findings_extractor import iter_extract_findings
+from src.field_spec import FIELD_NAMES
+from src.collector import FindingsCollector
+from src.pipeline import Pipeline
+from src.snapshot_io import (SnapshotWriter, NDJSON, JSON, NORMALIZED, GZIP, FORMAT_EXTENSIONS, compressed_path,
+                             iter_snapshot)
+from src import json_codec
+from src import risk_scoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# resources/findings size the fleet; sample is the number of distinct raw findings cycled through
+# the extraction and serialization cases; collection caps the cases that buffer every finding
+PROFILES: Dict[str, Dict[str, int]] = {
+    "small": {"resources": 1000, "findings": 20_000, "sample": 2000, "collection": 20_000},
+    "default": {"resources": 10_000, "findings": 1_000_000, "sample": 10_000, "collection": 100_000},
+}
+
+
+def _sample(fleet: FakeFleet, size: int) -> List[Dict[str, Any]]:
+    return list(itertools.islice(fleet.iter_findings("Ec2Instance"), size))
+
+
+def _cycle(sample: List[Dict[str, Any]], count: int) -> Iterator[Dict[str, Any]]:
+    return itertools.islice(itertools.cycle(sample), count)
+
+
+def _extracted_sample(fleet: FakeFleet, size: int) -> List[Dict[str, Any]]:
+    return list(iter_extract_findings(_sample(fleet, size), "EC2"))
+
+
+def _count(items) -> int:
+    return sum(1 for _ in items)
+
+
+def case_extraction_full(fleet: FakeFleet, profile: Dict[str, int]) -> Dict[str, Any]:
+    sample = _sample(fleet, profile["sample"])
+    return {"items": _count(iter_extract_findings(_cycle(sample, fleet.total_findings), "EC2"))}
+
+
+def case_extraction_projected(fleet: FakeFleet, profile: Dict[str, int]) -> Dict[str, Any]:
+    sample = _sample(fleet, profile["sample"])
+    projection = FIELD_NAMES[:8]
+    return {"items": _count(iter_extract_findings(_cycle(sample, fleet.total_findings), "EC2", projection))}
+
+
+def _collection_case(**collector_options) -> Callable[[FakeFleet, Dict[str, int]], Dict[str, Any]]:
+    def run(fleet: FakeFleet, profile: Dict[str, int]) -> Dict[str, Any]:
+        sample = _extracted_sample(fleet, profile["sample"])
+        collector = FindingsCollector(**collector_options)
+        started = time.perf_counter()
+        collector.add_findings(_cycle(sample, profile["collection"]))
+        collected = time.perf_counter()
+        collector.save_findings()
+        saved = time.perf_counter()
+        return {"items": profile["collection"],
+                "stages": {"collect": collected - started, "save": saved - collected}}
+    return run
+
+
+def case_pipeline_streaming(fleet: FakeFleet, profile: Dict[str, int]) -> Dict[str, Any]:
+    # Every finding of the fleet, generated lazily, extracted and streamed to a snapshot:
+    # peak RSS must not grow with the fleet
+    path = os.path.join("output", "snapshot.ndjson")
+    findings = iter_extract_findings(fleet.iter_findings(), "EC2")
+    with SnapshotWriter(path) as writer:
+        written = Pipeline(findings).run(writer.write_many)
+    return {"items": written, "bytes": os.path.getsize(path)}
+
+
+def _serialization_case(output_format: str, compression: Optional[str] = None,
+                        json_backend: Optional[str] = None) -> Callable[[FakeFleet, Dict[str, int]], Dict[str, Any]]:
+    def run(fleet: FakeFleet, profile: Dict[str, int]) -> Dict[str, Any]:
+        if json_backend is not None:
+            json_codec.set_json_backend(json_backend)
+        sample = _extracted_sample(fleet, profile["sample"])
+        path = compressed_path(os.path.join("output", f"snapshot.{FORMAT_EXTENSIONS[output_format]}"), compression)
+        started = time.perf_counter()
+        with SnapshotWriter(path, output_format) as writer:
+            written = writer.write_many(_cycle(sample, fleet.total_findings))
+        wrote = time.perf_counter()
+        read = _count(iter_snapshot(path))
+        return {"items": written, "bytes": os.path.getsize(path), "jsonBackend": json_codec.get_json_backend(),
+                "stages": {"write": wrote - started, "read": time.perf_counter() - wrote}}
+    return run
+
+
+def case_scoring(fleet: FakeFleet, profile: Dict[str, int]) -> Dict[str, Any]:
+    findings = list(_cycle(_extracted_sample(fleet, profile["sample"]), fleet.total_findings))
+    started = time.perf_counter()
+    columns = risk_scoring.RiskColumns.from_findings(findings)
+    packed = time.perf_counter()
+    scores = risk_scoring.RiskModel().score(columns)
+    scored = time.perf_counter()
+    risk_scoring.rank(scores, 100)
+    ranked_top = time.perf_counter()
+    risk_scoring.rank(scores)
+    ranked_full = time.perf_counter()
+    for _ in risk_scoring.rank_findings(findings, 100):
+        pass
+    return {"items": len(findings),
+            "stages": {"pack": packed - started, "score": scored - packed, "rankTop100": ranked_top - scored,
+                       "rankFull": ranked_full - ranked_top,
+                       "rankFindingsTop100": time.perf_counter() - ranked_full}}
+
+
+def case_end_to_end(fleet: FakeFleet, profile: Dict[str, int]) -> Dict[str, Any]:
+    from inspector import Inspector
+
+    pool = FakeClientPool(fleet)
+    inspector = Inspector(client_pool=pool, enable_ecr_repos=True, repositories_to_scan=repository_arns(fleet),
+                          streaming=True, requests_per_second=1e6, inventory_cache_path=None,
+                          ecr_cache_root=None)
+    inspector.run()
+    with open(inspector.collector.output_paths["inspector"]) as f:
+        items = _count(f)
+    calls = pool.call_counts()
+    return {"items": items, "apiCalls": calls,
+            "stages": {f"api.{name}": seconds for name, seconds in pool.api_seconds_by_operation().items()}}
+
+
+CASES: Dict[str, Callable[[FakeFleet, Dict[str, int]], Dict[str, Any]]] = {
+    "extraction.full": case_extraction_full,
+    "extraction.projected": case_extraction_projected,
+    "collection.buffered": _collection_case(),
+    "collection.compact": _collection_case(compact=True),
+    "collection.streaming": _collection_case(streaming=True),
+    "pipeline.streaming": case_pipeline_streaming,
+    "serialization.ndjson": _serialization_case(NDJSON),
+    "serialization.ndjson_stdlib": _serialization_case(NDJSON, json_backend="json"),
+    "serialization.ndjson_gzip": _serialization_case(NDJSON, GZIP),
+    "serialization.json": _serialization_case(JSON),
+    "serialization.normalized": _serialization_case(NORMALIZED),
+    "serialization.normalized_gzip": _serialization_case(NORMALIZED, GZIP),
+    "end_to_end.streaming": case_end_to_end,
+}
+if risk_scoring.np is not None:
+    CASES["scoring.rank"] = case_scoring
+
+
+def run_case(name: str, profile_name: str) -> Dict[str, Any]:
+    """
+    Runs one benchmark case in the current process, inside a scratch working directory.
+
+    Args:
+        name (str): A key of CASES.
+        profile_name (str): A key of PROFILES.
+
+    Returns:
+        Dict[str, Any]: The case result: items, seconds, itemsPerSecond and peakRssBytes, plus
+            stages, apiCalls or bytes where the case reports them.
+    """
+    profile = PROFILES[profile_name]
+    fleet = FakeFleet(resources=profile["resources"], findings=profile["findings"])
+    with tempfile.TemporaryDirectory() as scratch:
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            started = time.perf_counter()
+            result = CASES[name](fleet, profile)
+            seconds = time.perf_counter() - started
+        finally:
+            os.chdir(cwd)
+    result["seconds"] = seconds
+    result["itemsPerSecond"] = result["items"] / seconds if seconds else 0.0
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    result["peakRssBytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return result
+
+
+def run_isolated(name: str, profile_name: str) -> Dict[str, Any]:
+    """Runs a case in a fresh interpreter, so its peak RSS is not inflated by earlier cases."""
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-case", name,
+                                "--profile", profile_name], capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark case {name} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> Dict[str, Any]:
+    """Returns the current commit and whether the working tree has uncommitted changes."""
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=False).stdout.strip()
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--", "src", "services", "utils"))}
+
+
+def run_suite(profile_name: str, cases: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Runs the selected benchmark cases, each in its own process.
+
+    Args:
+        profile_name (str): A key of PROFILES.
+        cases (Optional[List[str]]): Case names or prefixes (e.g. "collection"). Default is every case.
+
+    Returns:
+        Dict[str, Any]: The run metadata and a result per case.
+    """
+    selected = [name for name in CASES
+                if not cases or any(name == c or name.startswith(f"{c}.") for c in cases)]
+    report = {**git_commit(), "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "profile": profile_name, "sizes": PROFILES[profile_name], "cases": {}}
+    for name in selected:
+        logger.info(f"Running {name} ({profile_name})")
+        report["cases"][name] = result = run_isolated(name, profile_name)
+        logger.info(f"{name}: {result['items']} items in {result['seconds']:.2f}s "
+                    f"({result['itemsPerSecond']:.0f}/s), peak RSS {result['peakRssBytes'] / 2**20:.1f} MiB")
+    return report
+
+
+def save_report(report: Dict[str, Any], results_dir: str = DEFAULT_RESULTS_DIR) -> str:
+    """Writes a report to <results_dir>/<commit>[-dirty]-<profile>.json and returns the path."""
+    os.makedirs(results_dir, exist_ok=True)
+    name = f"{report['commit']}{'-dirty' if report['dirty'] else ''}-{report['profile']}.json"
+    path = os.path.join(results_dir, name)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[str]:
+    """
+    Compares two reports case by case.
+
+    A case regresses when its throughput drops, or its peak RSS grows, by more than threshold.
+
+    Args:
+        baseline (Dict[str, Any]): The earlier report.
+        current (Dict[str, Any]): The report to check.
+        threshold (float): Tolerated relative change. Default is 0.1 (10%).
+
+    Returns:
+        List[str]: A description of every regression; empty if there are none.
+    """
+    regressions = []
+    print(f"{'case':<24} {'items/s':>12} {'change':>8} {'peak MiB':>10} {'change':>8}")
+    for name, result in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            print(f"{name:<24} {result['itemsPerSecond']:>12.0f} {'new':>8} {result['peakRssBytes'] / 2**20:>10.1f}")
+            continue
+        speed = result["itemsPerSecond"] / before["itemsPerSecond"] - 1 if before["itemsPerSecond"] else 0.0
+        memory = result["peakRssBytes"] / before["peakRssBytes"] - 1 if before["peakRssBytes"] else 0.0
+        print(f"{name:<24} {result['itemsPerSecond']:>12.0f} {speed:>+8.1%} "
+              f"{result['peakRssBytes'] / 2**20:>10.1f} {memory:>+8.1%}")
+        if speed < -threshold:
+            regressions.append(f"{name}: throughput {speed:+.1%}")
+        if memory > threshold:
+            regressions.append(f"{name}: peak RSS {memory:+.1%}")
+        for call, count in result.get("apiCalls", {}).items():
+            if count > before.get("apiCalls", {}).get(call, count):
+                regressions.append(f"{name}: {call} calls {before['apiCalls'][call]} -> {count}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark extraction, collection and serialization "
+                                                 "against a synthetic Inspector2 backend.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="default",
+                        help="Fleet size: small (20k findings) or default (10k resources, 1M findings)")
+    parser.add_argument("--cases", nargs="+", help=f"Cases or case groups to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="Where reports are stored")
+    parser.add_argument("--compare", metavar="REPORT", help="Compare against an earlier report")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Tolerated relative regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if a case regresses against --compare")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.profile)))
+        return 0
+    report = run_suite(args.profile, args.cases)
+    logger.info(f"Results written to {save_report(report, args.results_dir)}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for regression in regressions:
+            logger.warning(f"Regression: {regression}")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
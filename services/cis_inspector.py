@@ -1,12 +1,15 @@
 import os
 import datetime
+import logging
 import boto3
 import sys
-from typing import List
+from typing import List, Iterator
 from botocore.exceptions import ClientError
 from src.base_inspector import BaseInspector
-from src.findings_extractor import extract_findings
-from utils.aws_cli import run_aws_cli
+from src.findings_extractor import iter_extract_findings
+from src.service_finder import build_filter_criteria
+
+logger = logging.getLogger(__name__)
 
 class CisInspector(BaseInspector):
     """
@@ -17,18 +20,20 @@ class CisInspector(BaseInspector):
             Retrieves findings from AWS Inspector2 service filtered by CIS benchmark resource type.
             Returns a list of findings if the inspector is enabled, otherwise returns an empty list.
 
+        iter_cis_findings():
+            Lazily yields the same findings page by page.
+
         Returns:
             List[dict]: A list of findings if the inspector is enabled, otherwise an empty list.
-
-        Raises:
-            RuntimeError: If there is an error executing the AWS CLI command.
     """
     def get_findings(self) -> List[dict]:
+        return list(self.iter_cis_findings())
+
+    def iter_cis_findings(self) -> Iterator[dict]:
         if not self.enabled:
-            return []
-        command = (
-            "aws inspector2 list-findings "
-            "--filter-criteria '{\"resourceType\":[{\"comparison\":\"EQUALS\",\"value\":\"CisBenchmark\"}]}'"
-        )
-        result = run_aws_cli(command)
-        return extract_findings(result.get("findings", []), "CIS") if result else []
+            return
+        filter_criteria = build_filter_criteria("CisBenchmark")
+        try:
+            yield from iter_extract_findings(self.iter_findings(filter_criteria), "CIS")
+        except ClientError as e:
+            logger.error(f"Error getting CIS findings: {e}")
@@ -1,25 +1,89 @@
 import os
+import logging
 import datetime
+import threading
 import boto3
-from typing import List, Dict, Any, Optional
-from botocore.exceptions import ClientError
+from typing import List, Dict, Any, Optional, Iterator, Sequence, Callable
+from botocore.exceptions import BotoCoreError, ClientError
 from src.base_inspector import BaseInspector
-from src.findings_extractor import extract_findings
+from src.findings_extractor import OPEN_STATUS, iter_extract_findings
+from src.service_finder import build_filter_criteria
+from src.query_planner import QueryPlanner, QueryPlan, RESOURCE_TYPE_SCAN
+from src.fanout import FanOutExecutor
+from src.inventory_cache import InventoryCache
+from src.finding_aggregator import FindingAggregator
+from src.ecr_digest_cache import EcrDigestCache
+from src.repository_manager import get_latest_digests
+from src.run_journal import RunJournal
+from src.checkpoint import merge_findings
+from utils.rate_limiter import AdaptiveRateLimiter
 from utils.aws_cli import run_aws_cli
+from utils.client_pool import ClientPool
+from utils.metrics import get_run_metrics
+
+logger = logging.getLogger(__name__)
 
 class ServiceInspector(BaseInspector):
     """
     ServiceInspector is a class that inspects various AWS resources (EKS, Lambda, EC2, ECR, RDS) for findings using AWS CLI and boto3.
 
+    Resource inventories are enumerated with the AWS CLI commands; findings are then
+    retrieved page by page from Inspector2 and extracted lazily.
+
+    Parameters:
+        client (boto3.client): The Inspector2 client.
+        repositories (Optional[List[str]]): ECR repositories to scan. Default is None.
+        enabled (bool): Flag to enable the inspector. Default is True.
+        planner (Optional[QueryPlanner]): Chooses each resource type's query strategy; the
+            plans are recorded in ``query_plans``. Default is QueryPlanner().
+        executor (Optional[FanOutExecutor]): Runs services and query batches concurrently.
+            Default is None, which runs everything sequentially.
+        rate_limiter (Optional[AdaptiveRateLimiter]): Limiter shared by every Inspector2 call.
+        updated_since (Optional[Dict[str, str]]): ISO 8601 timestamps per resource type; only
+            findings updated since then are queried (incremental collection), type-wide
+            rather than per inventory except for the configured ECR repositories.
+        projection (Optional[Sequence[str]]): Only extract these output fields.
+        inventory_cache (Optional[InventoryCache]): Reuses inventories and the caller identity
+            across runs.
+        prefilter (bool): Collect only active findings, skipping resources without any
+            (counted in ``skipped_resources``). Default is False.
+        client_pool (Optional[ClientPool]): Pool for additional clients. Default is the
+            process-wide pool.
+        digest_cache (Optional[EcrDigestCache]): Reuses the findings of ECR repositories whose
+            image digest is unchanged.
+        journal (Optional[RunJournal]): Journals completed query batches so an interrupted run
+            can be resumed.
+
     Methods
     -------
     get_findings():
         Retrieves findings for all enabled AWS resources.
+    iter_service_findings():
+        Lazily yields findings for all enabled AWS resources.
     """
 
-    def __init__(self, client: boto3.client, repositories: Optional[List[str]] = None, enabled: bool = True):
-        super().__init__(client, enabled)
+    def __init__(self, client: boto3.client, repositories: Optional[List[str]] = None, enabled: bool = True,
+                 planner: Optional[QueryPlanner] = None, executor: Optional[FanOutExecutor] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 updated_since: Optional[Dict[str, str]] = None, projection: Optional[Sequence[str]] = None,
+                 inventory_cache: Optional[InventoryCache] = None, prefilter: bool = False,
+                 client_pool: Optional[ClientPool] = None, digest_cache: Optional[EcrDigestCache] = None,
+                 journal: Optional[RunJournal] = None):
+        super().__init__(client, enabled, rate_limiter, client_pool)
         self.repositories = repositories
+        self.executor = executor
+        self.updated_since: Dict[str, str] = dict(updated_since or {})
+        self.projection = projection
+        self.planner = planner or QueryPlanner()
+        self.query_plans: List[QueryPlan] = []
+        self.inventory_cache = inventory_cache
+        self.aggregator = FindingAggregator(client, rate_limiter=rate_limiter,
+                                            client_pool=self.client_pool) if prefilter else None
+        self.skipped_resources: Dict[str, int] = {}
+        self.digest_cache = digest_cache
+        self.journal = journal
+        self._account_id: Optional[str] = None
+        self._account_lock = threading.Lock()
 
     def get_findings(self) -> List[Dict[str, Any]]:
         """
@@ -30,114 +94,358 @@ class ServiceInspector(BaseInspector):
         List[Dict[str, Any]]
             A list of findings for all enabled AWS resources.
         """
-        findings = []
-        findings.extend(self.get_lambda_findings())
-        findings.extend(self.get_eks_findings())
-        findings.extend(self.get_ec2_findings())
-        findings.extend(self.get_rds_findings())
-        findings.extend(self.get_ecr_findings())
-        return findings
+        return list(self.iter_service_findings())
+
+    def iter_service_findings(self) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yields findings for all enabled AWS resources, one page at a time.
+
+        With an executor, services run concurrently and their findings are merged in the fixed
+        service order, so output is identical to a sequential run. Services stream through
+        bounded buffers, so concurrency does not hold a whole service's findings in memory.
+        Each service's finding production time and count are recorded in the run's metrics.
+
+        Yields
+        ------
+        Dict[str, Any]
+            An extracted finding.
+        """
+        services = [
+            ("Lambda", self._iter_lambda_findings),
+            ("EKS", self._iter_eks_findings),
+            ("EC2", self._iter_ec2_findings),
+            ("RDS", self._iter_rds_findings),
+            ("ECR", self._iter_ecr_findings),
+        ]
+        sources = [self._timed_source(name, source) for name, source in services]
+        if self.executor is None:
+            for source in sources:
+                yield from source()
+            return
+        yield from self.executor.iter_services(sources)
+
+    @staticmethod
+    def _timed_source(service: str, source: Callable[[], Iterator[Dict[str, Any]]]) -> Callable[[], Iterator[Dict[str, Any]]]:
+        # Charges the service only for producing its findings, not for downstream stages
+        return lambda: get_run_metrics().timed_iter(service, "findings", source(), count_findings=True)
 
     def get_lambda_findings(self) -> List[Dict[str, Any]]:
-        command = "aws lambda list-functions"
-        result = run_aws_cli(command, "Lambda")
-        functions = [func["FunctionArn"] for func in result.get("Functions", [])] if result else []
-        findings = []
-        for function_arn in functions:
-            findings.extend(self.get_findings_for_function(function_arn))
-        return findings
+        return list(self._iter_lambda_findings())
+
+    def _iter_lambda_findings(self) -> Iterator[Dict[str, Any]]:
+        if "LambdaFunction" in self.updated_since:
+            yield from self._iter_delta_findings("Lambda", "LambdaFunction")
+            return
+        functions = self._inventory("Lambda", self._list_functions)
+        yield from self._iter_planned_findings("Lambda", "LambdaFunction", functions)
 
     def get_findings_for_function(self, function_arn: str) -> List[Dict[str, Any]]:
-        command = (
-            f"aws inspector2 list-findings "
-            f"--filter-criteria '{{\"resourceType\":[{{\"comparison\":\"EQUALS\",\"value\":\"LambdaFunction\"}}], "
-            f"\"resourceArn\":[{{\"comparison\":\"EQUALS\",\"value\":\"{function_arn}\"}}]}}'"
-        )
-        out = run_aws_cli(command, "Lambda")
-        return extract_findings(out.get("findings", []), "Lambda") if out else []
+        return list(self._iter_resource_findings("LambdaFunction", function_arn, "Lambda"))
 
     def get_eks_findings(self) -> List[Dict[str, Any]]:
-        command = "aws eks list-clusters"
-        result = run_aws_cli(command, "EKS")
-        clusters = result.get("clusters", []) if result else []
-        findings = []
-        sts_client = boto3.client('sts')
-        account_id = sts_client.get_caller_identity().get('Account')
-        for cluster_name in clusters:
-            findings.extend(self.get_cluster_findings(cluster_name, account_id))
-        return findings
+        return list(self._iter_eks_findings())
+
+    def _iter_eks_findings(self) -> Iterator[Dict[str, Any]]:
+        if "EksCluster" in self.updated_since:
+            yield from self._iter_delta_findings("EKS", "EksCluster")
+            return
+        clusters = self._inventory("EKS", self._list_clusters)
+        if not clusters:
+            return
+        account_id = self.get_account_id()
+        region = os.environ.get('AWS_REGION', 'us-east-1')
+        cluster_arns = [f"arn:aws:eks:{region}:{account_id}:cluster/{cluster_name}" for cluster_name in clusters]
+        yield from self._iter_planned_findings("EKS", "EksCluster", cluster_arns)
 
     def get_cluster_findings(self, cluster_name: str, account_id: str) -> List[Dict[str, Any]]:
-        command = (
-            "aws inspector2 list-findings "
-            f"--filter-criteria '{{\"resourceType\":[{{\"comparison\":\"EQUALS\",\"value\":\"EksCluster\"}}], "
-            f"\"resourceArn\":[{{\"comparison\":\"EQUALS\",\"value\":\"arn:aws:eks:{os.environ.get('AWS_REGION', 'us-east-1')}:{account_id}:cluster/{cluster_name}\"}}]}}'"
-        )
-        out = run_aws_cli(command, "EKS")
-        return extract_findings(out.get("findings", []), "EKS") if out else []
+        return list(self._iter_cluster_findings(cluster_name, account_id))
+
+    def _iter_cluster_findings(self, cluster_name: str, account_id: str) -> Iterator[Dict[str, Any]]:
+        region = os.environ.get('AWS_REGION', 'us-east-1')
+        cluster_arn = f"arn:aws:eks:{region}:{account_id}:cluster/{cluster_name}"
+        return self._iter_resource_findings("EksCluster", cluster_arn, "EKS")
 
     def get_ec2_findings(self) -> List[Dict[str, Any]]:
-        command = "aws ec2 describe-instances"
-        result = run_aws_cli(command, "EC2")
-        instances = self._extract_instance_ids(result)
-        return self._get_instances_findings(instances)
+        return list(self._iter_ec2_findings())
+
+    def _iter_ec2_findings(self) -> Iterator[Dict[str, Any]]:
+        if "Ec2Instance" in self.updated_since:
+            yield from self._iter_delta_findings("EC2", "Ec2Instance")
+            return
+        instances = self._inventory("EC2", self._list_instances)
+        if instances:
+            yield from self._iter_instances_findings(instances)
 
     def _extract_instance_ids(self, result: Dict[str, Any]) -> List[str]:
         instances = []
-        for reservation in result.get("Reservations", []) if result else []:
+        for reservation in result.get("Reservations", []):
             if "Instances" in reservation:
                 instances.extend([instance["InstanceId"] for instance in reservation["Instances"]])
         return instances
 
     def _get_instances_findings(self, instances: List[str]) -> List[Dict[str, Any]]:
-        findings = []
-        sts_client = boto3.client('sts')
-        account_id = sts_client.get_caller_identity().get('Account')
+        return list(self._iter_instances_findings(instances))
+
+    def _iter_instances_findings(self, instances: List[str]) -> Iterator[Dict[str, Any]]:
+        account_id = self.get_account_id()
         region = os.environ.get('AWS_REGION', 'us-east-1')
-        for instance_id in instances:
-            findings.extend(self._get_instance_findings(instance_id, account_id, region))
-        return findings
+        instance_arns = [f"arn:aws:ec2:{region}:{account_id}:instance/{instance_id}" for instance_id in instances]
+        yield from self._iter_planned_findings("EC2", "Ec2Instance", instance_arns)
 
     def _get_instance_findings(self, instance_id: str, account_id: str, region: str) -> List[Dict[str, Any]]:
-        command = (
-            "aws inspector2 list-findings "
-            f"--filter-criteria '{{\"resourceType\":[{{\"comparison\":\"EQUALS\",\"value\":\"Ec2Instance\"}}], "
-            f"\"resourceArn\":[{{\"comparison\":\"EQUALS\",\"value\":\"arn:aws:ec2:{region}:{account_id}:instance/{instance_id}\"}}]}}'"
-        )
-        out = run_aws_cli(command, "EC2")
-        return extract_findings(out.get("findings", []), "EC2") if out else []
+        return list(self._iter_instance_findings(instance_id, account_id, region))
+
+    def _iter_instance_findings(self, instance_id: str, account_id: str, region: str) -> Iterator[Dict[str, Any]]:
+        instance_arn = f"arn:aws:ec2:{region}:{account_id}:instance/{instance_id}"
+        return self._iter_resource_findings("Ec2Instance", instance_arn, "EC2")
 
     def get_rds_findings(self) -> List[Dict[str, Any]]:
-        command = "aws rds describe-db-instances"
-        result = run_aws_cli(command, "RDS")
-        instances = [db["DBInstanceIdentifier"] for db in result.get("DBInstances", [])] if result else []
-        findings = []
-        for db_instance_id in instances:
-            findings.extend(self._get_db_findings(db_instance_id))
-        return findings
+        return list(self._iter_rds_findings())
+
+    def _iter_rds_findings(self) -> Iterator[Dict[str, Any]]:
+        if "RdsInstance" in self.updated_since:
+            yield from self._iter_delta_findings("RDS", "RdsInstance")
+            return
+        instances = self._inventory("RDS", self._list_db_instances)
+        yield from self._iter_planned_findings("RDS", "RdsInstance", instances)
 
     def _get_db_findings(self, db_instance_id: str) -> List[Dict[str, Any]]:
-        command = (
-            "aws inspector2 list-findings "
-            f"--filter-criteria '{{\"resourceType\":[{{\"comparison\":\"EQUALS\",\"value\":\"RdsInstance\"}}], "
-            f"\"resourceArn\":[{{\"comparison\":\"EQUALS\",\"value\":\"{db_instance_id}\"}}]}}'"
-        )
-        out = run_aws_cli(command, "RDS")
-        return extract_findings(out.get("findings", []), "RDS") if out else []
+        return list(self._iter_resource_findings("RdsInstance", db_instance_id, "RDS"))
 
     def get_ecr_findings(self) -> List[Dict[str, Any]]:
+        return list(self._iter_ecr_findings())
+
+    def _iter_ecr_findings(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the findings of the ECR repositories to scan.
+
+        With an EcrDigestCache, the latest image digest of every repository is looked up in
+        bulk and only repositories whose digest changed are queried in full. Inspector keeps
+        rescanning unchanged images, so for the others only the findings updated since they
+        were cached are queried and merged into the cached findings by findingArn. Since each
+        repository is cached as soon as its findings are retrieved, the cache also resumes
+        interrupted runs.
+        """
         if not self.repositories:
-            return []
-        findings = []
-        for repository_name in self.repositories:
-            findings.extend(self._get_repo_findings(repository_name))
-        return findings
+            return
+        if self.digest_cache is None:
+            yield from self._iter_planned_findings("ECR", "EcrRepository", self.repositories)
+            return
+        digests = get_latest_digests(self.repositories, self.client_pool)
+        status = self._finding_status("EcrRepository")
+        # Taken before any query, so updates made while querying are picked up next time
+        queried_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        updated_since = {repo: self.digest_cache.cached_at(repo) for repo in self.repositories
+                         if self.digest_cache.is_current(repo, digests.get(repo), self.projection, status)}
+        logger.info(f"ECR: {len(self.repositories) - len(updated_since)} of {len(self.repositories)} "
+                    f"repositories changed since the last run")
+        fetch = lambda repo: self._fetch_repo_findings(repo, updated_since.get(repo))
+        if self.executor is None:
+            refreshed = map(fetch, self.repositories)
+        else:
+            refreshed = self.executor.map_ordered(fetch, self.repositories)
+        for repo, findings in zip(self.repositories, refreshed):
+            if findings is None:
+                if repo in updated_since:
+                    logger.warning(f"Serving the cached ECR findings of {repo} without their latest updates")
+                    yield from self.digest_cache.iter_findings(repo)
+                continue
+            if repo in updated_since:
+                merged = merge_findings(self.digest_cache.iter_findings(repo), findings)
+                findings = [f for f in merged if status is None or f.get("status") == status]
+            self.digest_cache.put(repo, digests.get(repo), findings, self.projection, status, queried_at)
+            yield from findings
+
+    def _fetch_repo_findings(self, repository_name: str,
+                             updated_since: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns every finding for a repository, or only those updated since ``updated_since``,
+        or None if the query failed, so that a partial result is never cached as the
+        repository's findings.
+
+        An update query is not status-filtered, so that it also returns the findings closed
+        since the repository was cached.
+        """
+        status = None if updated_since else self._finding_status("EcrRepository")
+        filter_criteria = build_filter_criteria("EcrRepository", [repository_name], updated_since, status)
+        try:
+            return list(iter_extract_findings(self.iter_findings(filter_criteria), "ECR", self.projection))
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error getting ECR findings for {repository_name}: {e}")
+            return None
 
     def _get_repo_findings(self, repository_name: str) -> List[Dict[str, Any]]:
-        command = (
-            f"aws inspector2 list-findings "
-            f"--filter-criteria '{{\"resourceType\":[{{\"comparison\":\"EQUALS\",\"value\":\"EcrRepository\"}}], "
-            f"\"resourceArn\":[{{\"comparison\":\"EQUALS\",\"value\":\"{repository_name}\"}}]}}'"
-        )
-        out = run_aws_cli(command, "ECR")
-        return extract_findings(out.get("findings", []), "ECR") if out else []
\ No newline at end of file
+        return list(self._iter_resource_findings("EcrRepository", repository_name, "ECR"))
+
+    def _iter_resource_findings(self, resource_type: str, resource_arn: str, service: str) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yields extracted findings for a single resource, following every nextToken.
+
+        Errors are logged and end the resource's findings early rather than failing the run.
+        """
+        filter_criteria = build_filter_criteria(resource_type, [resource_arn],
+                                                finding_status=self._finding_status(resource_type))
+        try:
+            yield from iter_extract_findings(self.iter_findings(filter_criteria), service, self.projection)
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error getting {service} findings for {resource_arn}: {e}")
+
+    def _finding_status(self, resource_type: str) -> Optional[str]:
+        """
+        Returns the finding status a resource type's queries are restricted to: ACTIVE with the
+        pre-filter, so the snapshot matches the aggregation's active counts, else None (every
+        status). Resource types with an ``updated_since`` checkpoint are never restricted, since
+        their delta must carry the findings suppressed or closed since the checkpoint.
+        """
+        if self.aggregator is None or resource_type in self.updated_since:
+            return None
+        return OPEN_STATUS
+
+    def _iter_delta_findings(self, service: str, resource_type: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the findings of a resource type updated since its ``updated_since`` checkpoint.
+
+        The delta is queried type-wide, without an ARN filter or inventory match, so it also
+        carries the findings Inspector closed for resources deleted since the checkpoint;
+        merge_findings then replaces their previous, active versions. The inventory is not
+        enumerated. When resuming, a delta the journal completed is replayed instead.
+        """
+        if self.journal is not None and resource_type in self.journal.completed(resource_type):
+            logger.info(f"{service}: resuming, delta already journaled")
+            yield from self.journal.replay(resource_type)
+            return
+        plan = self.planner.plan_delta(service, resource_type)
+        self.query_plans.append(plan)
+        yield from self._iter_batch_findings(plan, [])
+
+    def _iter_planned_findings(self, service: str, resource_type: str, resource_arns: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Plans and executes the list_findings queries for an inventory of one resource type.
+
+        The planner picks per-resource, multi-ARN batch or resourceType-wide scan queries;
+        scans are split on the client side so that only findings for resources in the
+        inventory are yielded. With an executor, batches run on the worker pool and are
+        merged in batch order.
+
+        With the pre-filter, an aggregation pre-pass limits the queries to resources with
+        active findings, unless the type has an ``updated_since`` checkpoint. When resuming,
+        resources the journal completed are replayed instead of queried.
+        """
+        type_finding_count = None
+        if self.aggregator is not None and resource_type not in self.updated_since:
+            with get_run_metrics().timer(service, "prefilter"):
+                counts = self.aggregator.resource_counts(resource_type)
+            if counts is not None:
+                with_findings = [arn for arn in resource_arns if counts.has_findings(arn)]
+                self.skipped_resources[resource_type] = len(resource_arns) - len(with_findings)
+                logger.info(f"{service}: {len(with_findings)} of {len(resource_arns)} resources have active findings")
+                resource_arns, type_finding_count = with_findings, counts.total
+        if self.journal is not None and self.journal.completed(resource_type):
+            completed = self.journal.completed(resource_type)
+            yield from self.journal.replay(resource_type)
+            remaining = [arn for arn in resource_arns if arn not in completed]
+            logger.info(f"{service}: resuming, {len(resource_arns) - len(remaining)} resources already journaled")
+            if not remaining:
+                return
+            # The type-wide finding count no longer describes what is left to query
+            resource_arns, type_finding_count = remaining, None
+        plan = self.planner.plan(service, resource_type, resource_arns, type_finding_count)
+        self.query_plans.append(plan)
+        if self.executor is None or len(plan.batches) == 1:
+            for batch in plan.batches:
+                yield from self._iter_batch_findings(plan, batch)
+            return
+        fetch = lambda batch: list(self._iter_batch_findings(plan, batch))
+        for findings in self.executor.map_ordered(fetch, plan.batches):
+            yield from findings
+
+    def _iter_batch_findings(self, plan: QueryPlan, batch: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields extracted findings for one batch of a query plan.
+
+        The query is restricted by the type's ``updated_since`` timestamp and _finding_status.
+        With a journal, the findings are journaled as they are yielded and the batch is
+        committed once all of them were; a failed or interrupted batch is not committed.
+        """
+        filter_criteria = build_filter_criteria(plan.resource_type, batch or None,
+                                                self.updated_since.get(plan.resource_type),
+                                                self._finding_status(plan.resource_type))
+        unit = self.journal.begin(plan.resource_type) if self.journal is not None else None
+        try:
+            findings = self.iter_findings(filter_criteria)
+            if plan.strategy == RESOURCE_TYPE_SCAN:
+                findings = (f for f in findings if plan.match_resource(f) is not None)
+            for finding in iter_extract_findings(findings, plan.service, self.projection):
+                if unit is not None:
+                    unit.write(finding)
+                yield finding
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error getting {plan.service} findings ({plan.strategy}): {e}")
+            return
+        if unit is not None:
+            # A resource type scan covers every resource of the plan, a delta scan the whole type
+            unit.commit(batch or plan.resource_arns or [plan.resource_type])
+
+    def _inventory(self, kind: str, fetch: Callable[[], Optional[List[str]]]) -> List[str]:
+        """
+        Returns an inventory, from the InventoryCache when one is configured and fresh.
+
+        A failed enumeration (fetch returning None) is not cached and yields an empty inventory.
+        """
+        with get_run_metrics().timer(kind, "inventory"):
+            if self.inventory_cache is not None:
+                return self.inventory_cache.get_or_fetch(kind, fetch) or []
+            return fetch() or []
+
+    def _list_functions(self) -> Optional[List[str]]:
+        result = self._command_output(run_aws_cli("aws lambda list-functions", "Lambda"), "Lambda")
+        if not result:
+            return None
+        return [func["FunctionArn"] for func in result.get("Functions", [])]
+
+    def _list_clusters(self) -> Optional[List[str]]:
+        result = self._command_output(run_aws_cli("aws eks list-clusters", "EKS"), "EKS")
+        if not result:
+            return None
+        return result.get("clusters", [])
+
+    def _list_instances(self) -> Optional[List[str]]:
+        result = self._command_output(run_aws_cli("aws ec2 describe-instances", "EC2"), "EC2")
+        if not result:
+            return None
+        return self._extract_instance_ids(result)
+
+    def _list_db_instances(self) -> Optional[List[str]]:
+        result = self._command_output(run_aws_cli("aws rds describe-db-instances", "RDS"), "RDS")
+        if not result:
+            return None
+        return [db["DBInstanceIdentifier"] for db in result.get("DBInstances", [])]
+
+    def get_account_id(self) -> Optional[str]:
+        """
+        Returns the AWS account ID of the current credentials.
+
+        STS is called at most once per ServiceInspector, and not at all while the
+        InventoryCache holds a fresh caller identity.
+        """
+        with self._account_lock:
+            if self._account_id is None:
+                if self.inventory_cache is not None:
+                    self._account_id = self.inventory_cache.get_or_fetch("CallerIdentity", self._get_caller_account)
+                else:
+                    self._account_id = self._get_caller_account()
+            return self._account_id
+
+    def _get_caller_account(self) -> Optional[str]:
+        sts_client = self.client_pool.client('sts')
+        return sts_client.get_caller_identity().get('Account')
+
+    @staticmethod
+    def _command_output(result: Optional[Dict[str, Any]], service: str) -> Dict[str, Any]:
+        """
+        Unwraps the {service: output} mapping returned by run_aws_cli.
+
+        Returns an empty dict when the command failed or returned no data.
+        """
+        output = result.get(service) if result else None
+        return output if isinstance(output, dict) else {}
@@ -4,7 +4,10 @@ import sys
 import logging
 import boto3
 from botocore.exceptions import ClientError
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+from utils.rate_limiter import AdaptiveRateLimiter, is_throttling_error
+from utils.aws_transport import to_json_compatible
+from utils.client_pool import ClientPool, get_default_pool
 
 logger = logging.getLogger(__name__)
 
@@ -15,22 +18,120 @@ class BaseInspector:
     Attributes:
         client: The client used to interact with the findings service.
         enabled: A flag indicating whether the inspector is enabled.
+        rate_limiter: An optional AdaptiveRateLimiter shared by every list_findings call.
+        client_pool: The ClientPool used for any additional AWS clients (e.g. STS).
     """
+
+    # Attempts per list_findings page before a throttling error is raised to the caller
+    max_throttle_attempts = 8
     
-    def __init__(self, client, enabled: bool = True):
+    def __init__(self, client, enabled: bool = True, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 client_pool: Optional[ClientPool] = None):
         """
         Initializes the BaseInspector with a client and enabled flag.
         
         Args:
             client: The client used to interact with the findings service.
             enabled (bool): A flag indicating whether the inspector is enabled.
+            rate_limiter (Optional[AdaptiveRateLimiter]): Limiter shared across threads and inspectors.
+                When set, every list_findings call takes a token first and throttling
+                responses slow the shared rate down and are retried.
+            client_pool (Optional[ClientPool]): Pool for additional clients. Default is the
+                process-wide pool.
         """
         self.client = client
         self.enabled = enabled
+        self.rate_limiter = rate_limiter
+        self.client_pool = client_pool or get_default_pool()
+
+    @classmethod
+    def from_pool(cls, client_pool: ClientPool, region: Optional[str] = None, role_arn: Optional[str] = None,
+                  **kwargs):
+        """
+        Creates an inspector whose Inspector2 client is taken from a ClientPool.
+
+        Args:
+            client_pool (ClientPool): The shared pool.
+            region (Optional[str]): The region to inspect. Default is AWS_REGION or us-east-1.
+            role_arn (Optional[str]): The role to assume, for inspecting another account.
+            **kwargs: Further constructor arguments.
+        """
+        client = client_pool.client('inspector2', region, role_arn)
+        return cls(client, client_pool=client_pool, **kwargs)
+
+    def iter_finding_pages(self, filter_criteria: Dict[str, Any], page_size: int = 100) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields pages of findings matching the filter criteria, following nextToken until exhausted.
+
+        Only one page is held in memory at a time, so callers that consume the pages
+        lazily keep their peak memory near a single page regardless of result size.
+
+        Args:
+            filter_criteria (Dict[str, Any]): The Inspector2 filterCriteria for list_findings.
+            page_size (int): The maxResults requested per page.
+
+        Yields:
+            List[Dict[str, Any]]: One page of raw findings, with timestamps rendered as ISO 8601
+                strings as the AWS CLI would print them.
+
+        Raises:
+            botocore.exceptions.ClientError: If a list_findings call fails.
+        """
+        next_token: Optional[str] = None
+        while True:
+            kwargs: Dict[str, Any] = {'filterCriteria': filter_criteria, 'maxResults': page_size}
+            if next_token:
+                kwargs['nextToken'] = next_token
+            response = self._list_findings(**kwargs)
+            page = to_json_compatible(response.get('findings', []))
+            if page:
+                yield page
+            next_token = response.get('nextToken')
+            if not next_token:
+                return
+
+    def _list_findings(self, **kwargs) -> Dict[str, Any]:
+        """
+        Calls list_findings through the rate limiter, retrying throttled calls.
+        """
+        return self._call("list_findings", **kwargs)
+
+    def _call(self, operation: str, **kwargs) -> Dict[str, Any]:
+        """
+        Calls an Inspector2 client operation through the rate limiter, retrying throttled calls.
+        """
+        method = getattr(self.client, operation)
+        if self.rate_limiter is None:
+            return method(**kwargs)
+        for attempt in range(1, self.max_throttle_attempts + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = method(**kwargs)
+            except ClientError as e:
+                if not is_throttling_error(e) or attempt == self.max_throttle_attempts:
+                    raise
+                self.rate_limiter.on_throttle()
+                continue
+            self.rate_limiter.on_success()
+            return response
+
+    def iter_findings(self, filter_criteria: Dict[str, Any], page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Yields individual findings matching the filter criteria across all pages.
+
+        Args:
+            filter_criteria (Dict[str, Any]): The Inspector2 filterCriteria for list_findings.
+            page_size (int): The maxResults requested per page.
+
+        Yields:
+            Dict[str, Any]: A raw finding.
+        """
+        for page in self.iter_finding_pages(filter_criteria, page_size):
+            yield from page
 
     def get_findings_for_resource(self, resource_id: str, resource_type: str) -> List[Dict[str, Any]]:
         """
-        Retrieves findings for a specified resource.
+        Retrieves all findings for a specified resource.
         
         Args:
             resource_id (str): The ID of the resource to retrieve findings for.
@@ -47,12 +148,7 @@ class BaseInspector:
                 'resourceId': [{'comparison': 'EQUALS', 'value': resource_id}],
                 'resourceType': [{'comparison': 'EQUALS', 'value': resource_type}]
             }
-            
-            response = self.client.list_findings(
-                filterCriteria=filter_criteria,
-                maxResults=100
-            )
-            return response.get('findings', [])
+            return list(self.iter_findings(filter_criteria))
         except Exception as e:
             logger.error(f"Error getting findings for resource {resource_id}: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,178 @@
+import os
+import json
+import logging
+import datetime
+import tempfile
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from src.snapshot_io import SnapshotWriter, iter_snapshot
+from src.snapshot_diff import DEFAULT_RUN_SIZE, iter_sorted_findings, join_sorted
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = "output/checkpoints/inspector.json"
+
+# AWS Service label on extracted findings -> Inspector2 resourceType filter value
+SERVICE_RESOURCE_TYPES = {
+    "Lambda": "LambdaFunction",
+    "EKS": "EksCluster",
+    "EC2": "Ec2Instance",
+    "RDS": "RdsInstance",
+    "ECR": "EcrRepository",
+}
+
+
+def parse_timestamp(value: Any) -> Optional[datetime.datetime]:
+    """
+    Parses an ISO 8601 timestamp (as rendered by the AWS CLI) into an aware datetime.
+
+    Returns None for missing or unparseable values.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=datetime.timezone.utc)
+
+
+class CollectionCheckpoint:
+    """
+    Records how far previous runs have collected, so the next run can ask only for changes.
+
+    The checkpoint stores the highest ``updatedAt`` seen per resource type and the path of
+    the snapshot those findings were written to. An incremental run filters Inspector2 on
+    ``updatedAt >= checkpoint`` and merges the delta into that snapshot by findingArn
+    (merge_findings).
+
+    Attributes:
+        path (str): Where the checkpoint is persisted.
+        updated_at (Dict[str, str]): Highest updatedAt per Inspector2 resource type.
+        snapshot (Optional[str]): The snapshot holding the complete set as of the checkpoint.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH, updated_at: Optional[Dict[str, str]] = None,
+                 snapshot: Optional[str] = None):
+        self.path = path
+        self.updated_at: Dict[str, str] = dict(updated_at or {})
+        self.snapshot = snapshot
+        self._latest: Dict[str, datetime.datetime] = {
+            resource_type: parsed for resource_type, parsed in
+            ((k, parse_timestamp(v)) for k, v in self.updated_at.items()) if parsed is not None
+        }
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CHECKPOINT_PATH) -> "CollectionCheckpoint":
+        """
+        Loads a checkpoint, returning an empty one if none has been saved yet.
+        """
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Ignoring unreadable checkpoint {path}: {e}")
+            return cls(path)
+        return cls(path, data.get("updatedAt"), data.get("snapshot"))
+
+    def is_usable(self) -> bool:
+        """Returns True if the checkpoint points at a snapshot that still exists."""
+        return bool(self.updated_at) and bool(self.snapshot) and os.path.exists(self.snapshot)
+
+    def observe(self, finding: Dict[str, Any]) -> None:
+        """
+        Advances the checkpoint with an extracted finding's updatedAt.
+        """
+        resource_type = SERVICE_RESOURCE_TYPES.get(finding.get("AWS Service"))
+        updated_at = parse_timestamp(finding.get("updatedAt"))
+        if resource_type is None or updated_at is None:
+            return
+        latest = self._latest.get(resource_type)
+        if latest is None or updated_at > latest:
+            self._latest[resource_type] = updated_at
+            self.updated_at[resource_type] = finding["updatedAt"]
+
+    def track(self, findings: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Passes findings through unchanged while observing their updatedAt values.
+        """
+        for finding in findings:
+            self.observe(finding)
+            yield finding
+
+    def save(self, snapshot: str) -> None:
+        """
+        Persists the checkpoint, pointing it at the snapshot that was just written.
+        """
+        self.snapshot = snapshot
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({
+                "updatedAt": self.updated_at,
+                "snapshot": snapshot,
+                "savedAt": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }, f, indent=2)
+        os.replace(temp_path, self.path)
+        logger.info(f"Saved collection checkpoint to {self.path}")
+
+
+def merge_findings(previous: Iterable[Dict[str, Any]], delta: Iterable[Dict[str, Any]],
+                   run_size: int = DEFAULT_RUN_SIZE, temp_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Merges a delta pull into a previous snapshot by findingArn.
+
+    Both sides are externally sorted by findingArn (snapshot_diff.iter_sorted_findings) and
+    merge-joined, so memory is bounded by ``run_size`` rather than by the snapshot. Findings
+    in the delta replace their previous versions (including status changes such as
+    ACTIVE -> CLOSED) and findings new in the delta are added; the merged set is yielded in
+    findingArn order. Findings without a findingArn cannot be matched: they are spilled
+    aside and passed through unchanged after the merged set.
+
+    Args:
+        previous (Iterable[Dict[str, Any]]): The findings of the previous snapshot.
+        delta (Iterable[Dict[str, Any]]): Findings updated since the checkpoint.
+        run_size (int): Findings sorted in memory at once. Default is 20,000.
+        temp_dir (Optional[str]): Where sorted runs are spilled. Default is the system temp directory.
+
+    Yields:
+        Dict[str, Any]: The complete, current set of findings.
+    """
+    kept = updated = added = 0
+    with tempfile.TemporaryDirectory(prefix="incremental-merge-", dir=temp_dir) as scratch:
+        unkeyed = SnapshotWriter(os.path.join(scratch, "unkeyed.ndjson"))
+
+        def keyed(findings: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            for finding in findings:
+                if finding.get("findingArn"):
+                    yield finding
+                else:
+                    unkeyed.write(finding)
+
+        try:
+            for before, after in join_sorted(iter_sorted_findings(keyed(previous), run_size, temp_dir),
+                                             iter_sorted_findings(keyed(delta), run_size, temp_dir)):
+                if after is None:
+                    kept += 1
+                    yield before
+                else:
+                    if before is None:
+                        added += 1
+                    else:
+                        updated += 1
+                    yield after
+        finally:
+            # Scratch output: closing also on failure only publishes it inside the temp directory
+            unkeyed.close()
+        if unkeyed.count:
+            logger.info(f"Passing through {unkeyed.count} findings without a findingArn")
+            yield from iter_snapshot(unkeyed.output_path)
+    logger.info(f"Incremental merge: {updated} updated, {added} new, "
+                f"{kept + updated + added + unkeyed.count} total findings")
+
+
+def merge_into_snapshot(snapshot: str, delta: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Merges a delta pull into the findings stored in a snapshot file."""
+    return merge_findings(iter_snapshot(snapshot), delta)
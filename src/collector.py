@@ -1,19 +1,42 @@
-import os
-import json
 import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Sequence
+
+from src.snapshot_io import (SnapshotWriter, NDJSON, JSON, OUTPUT_FORMATS, FORMAT_EXTENSIONS, COMPRESSIONS,
+                             compressed_path, write_document)
+from src.finding_record import StringTable, to_records
 
 
 class FindingsCollector:
     """
     A class to collect and save general findings and CIS findings.
 
+    By default findings are buffered in memory and written as indented JSON by
+    save_findings(). In streaming mode each finding is instead appended to its
+    snapshot file as soon as it is added, through a temp file that save_findings()
+    atomically renames into place.
+
     Attributes:
     -----------
     findings : List[Dict[str, Any]]
-        A list to store general findings.
+        A list to store general findings (unused in streaming mode).
     cis_findings : List[Dict[str, Any]]
-        A list to store CIS findings.
+        A list to store CIS findings (unused in streaming mode).
+    streaming : bool
+        Whether findings are written as they are added.
+    output_format : str
+        The streaming format: "ndjson" (one finding per line), "json" (one compact array) or
+        "normalized" (NDJSON storing each vulnerability's metadata once, .normalized.ndjson).
+    output_paths : Dict[str, str]
+        The snapshot path written for each findings type by save_findings().
+    compact : bool
+        Whether buffered findings are held as FindingRecords sharing one StringTable
+        instead of dicts. The saved output is identical either way.
+    partition : Sequence[str]
+        Extra path components below the findings type directory, e.g. (account, region)
+        for multi-account runs: output/YYYY/MM/<type>/<account>/<region>/.
+    compression : Optional[str]
+        "gzip" or "zstd" to compress snapshots as they are written (.gz/.zst suffix), or
+        None for plain files.
 
     Methods:
     --------
@@ -26,6 +49,9 @@ class FindingsCollector:
     save_findings() -> None:
         Saves both general findings and CIS findings to their respective files.
     
+    abort() -> None:
+        Stops a streaming run without publishing its snapshots.
+    
     _save_general_findings(current_date: datetime.datetime) -> None:
         Saves general findings to a file with a timestamped filename.
     
@@ -39,31 +65,55 @@ class FindingsCollector:
         Saves the given data to a file at the specified path.
     """
 
-    def __init__(self):
+    def __init__(self, streaming: bool = False, output_format: str = NDJSON, compact: bool = False,
+                 partition: Sequence[str] = (), compression: Optional[str] = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}")
         self.findings: List[Dict[str, Any]] = []
         self.cis_findings: List[Dict[str, Any]] = []
-
-    def add_findings(self, findings: List[Dict[str, Any]]) -> None:
+        self.streaming = streaming
+        self.output_format = output_format
+        self.run_date = datetime.datetime.now()
+        self._writers: Dict[str, SnapshotWriter] = {}
+        self.output_paths: Dict[str, str] = {}
+        self.compact = compact
+        self._table = StringTable() if compact else None
+        self.partition = tuple(partition)
+        self.compression = compression
+
+    def add_findings(self, findings: Iterable[Dict[str, Any]]) -> None:
         """
-        Adds a list of general findings to the findings attribute.
+        Adds general findings to the findings attribute.
 
         Parameters:
         -----------
-        findings : List[Dict[str, Any]]
-            A list of dictionaries containing general findings.
+        findings : Iterable[Dict[str, Any]]
+            A list or lazy iterator (e.g. ServiceInspector.iter_service_findings) of general findings.
         """
-        self.findings.extend(findings)
-
-    def add_cis_findings(self, findings: List[Dict[str, Any]]) -> None:
+        if self.streaming:
+            self._get_writer("inspector").write_many(findings)
+        elif self.compact:
+            self.findings.extend(to_records(findings, self._table))
+        else:
+            self.findings.extend(findings)
+
+    def add_cis_findings(self, findings: Iterable[Dict[str, Any]]) -> None:
         """
-        Adds a list of CIS findings to the cis_findings attribute.
+        Adds CIS findings to the cis_findings attribute.
 
         Parameters:
         -----------
-        findings : List[Dict[str, Any]]
-            A list of dictionaries containing CIS findings.
+        findings : Iterable[Dict[str, Any]]
+            A list or lazy iterator of CIS findings.
         """
-        self.cis_findings.extend(findings)
+        if self.streaming:
+            self._get_writer("cis").write_many(findings)
+        elif self.compact:
+            self.cis_findings.extend(to_records(findings, self._table))
+        else:
+            self.cis_findings.extend(findings)
 
     def save_findings(self) -> None:
         """
@@ -74,10 +124,39 @@ class FindingsCollector:
         OSError:
             If there is an issue creating directories or writing to files.
         """
+        if self.streaming:
+            for type_suffix in ("inspector", "cis"):
+                self.output_paths[type_suffix] = self._get_writer(type_suffix).close()
+            return
         current_date = datetime.datetime.now()
         self._save_general_findings(current_date)
         self._save_cis_findings(current_date)
 
+    def abort(self) -> None:
+        """
+        Stops streaming without publishing the snapshots.
+
+        The partial output stays in the ``.tmp`` files next to the snapshot paths.
+        """
+        for writer in self._writers.values():
+            writer.abort()
+
+    def _get_writer(self, type_suffix: str) -> SnapshotWriter:
+        """
+        Returns the streaming writer for a findings type, opening it on first use.
+
+        Parameters:
+        -----------
+        type_suffix : str
+            The suffix indicating the type of findings (e.g. "inspector" or "cis").
+        """
+        writer = self._writers.get(type_suffix)
+        if writer is None:
+            output_path = self._get_output_path(self.run_date, type_suffix, FORMAT_EXTENSIONS[self.output_format])
+            writer = SnapshotWriter(output_path, self.output_format)
+            self._writers[type_suffix] = writer
+        return writer
+
     def _save_general_findings(self, current_date: datetime.datetime) -> None:
         """
         Saves general findings to a file with a timestamped filename.
@@ -89,6 +168,7 @@ class FindingsCollector:
         """
         output_path = self._get_output_path(current_date, "inspector")
         self._save_to_file(output_path, self.findings)
+        self.output_paths["inspector"] = output_path
 
     def _save_cis_findings(self, current_date: datetime.datetime) -> None:
         """
@@ -101,8 +181,9 @@ class FindingsCollector:
         """
         output_path = self._get_output_path(current_date, "cis")
         self._save_to_file(output_path, self.cis_findings)
+        self.output_paths["cis"] = output_path
 
-    def _get_output_path(self, date: datetime.datetime, type_suffix: str) -> str:
+    def _get_output_path(self, date: datetime.datetime, type_suffix: str, extension: str = "json") -> str:
         """
         Generates the output file path based on the current date and type suffix.
 
@@ -112,16 +193,20 @@ class FindingsCollector:
             The current date and time used for generating the path.
         type_suffix : str
             The suffix indicating the type of findings (e.g., "inspector" or "cis").
+        extension : str
+            The file extension, e.g. "json" or "ndjson".
 
         Returns:
         --------
         str
-            The generated output file path.
+            The generated output file path, with a .gz or .zst suffix when compressing.
         """
-        return (
-            f"output/{date.year}/{date.month:02}/{type_suffix}/"
+        partition = "".join(f"{component}/" for component in self.partition)
+        return compressed_path(
+            f"output/{date.year}/{date.month:02}/{type_suffix}/{partition}"
             f"{date.year}-{date.month:02}-{date.day:02}_"
-            f"{date.hour:02}{date.minute:02}{date.second:02}.json"
+            f"{date.hour:02}{date.minute:02}{date.second:02}.{extension}",
+            self.compression
         )
 
     def _save_to_file(self, output_path: str, data: List[Dict[str, Any]]) -> None:
@@ -140,6 +225,4 @@ class FindingsCollector:
         OSError:
             If there is an issue creating directories or writing to the file.
         """
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(data, f, indent=2)
\ No newline at end of file
+        write_document(output_path, data)
\ No newline at end of file
@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+import logging
+import datetime
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence
+
+from src.snapshot_io import SnapshotWriter, iter_snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ECR_CACHE_ROOT = "output/cache/ecr"
+
+
+class EcrDigestCache:
+    """
+    Remembers the findings collected for each ECR repository at its latest image digest.
+
+    A repository whose latest digest (and extraction projection and status filter) is
+    unchanged since the previous run has the same image, so its cached findings are reused
+    instead of being queried in full. Inspector keeps rescanning unchanged images, though,
+    so callers must bring a current entry up to date with the findings updated since its
+    ``cached_at`` time (see ServiceInspector._iter_ecr_findings). Findings are stored as one
+    NDJSON file per repository next to an ``index.json`` mapping repositories to their
+    digest, file and cache time.
+
+    Parameters:
+        root (str): The cache directory. Default is "output/cache/ecr".
+    """
+
+    def __init__(self, root: str = DEFAULT_ECR_CACHE_ROOT):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Ignoring unreadable ECR digest cache {self.index_path}: {e}")
+
+    @staticmethod
+    def _projection_key(projection: Optional[Sequence[str]]) -> Optional[List[str]]:
+        return list(projection) if projection is not None else None
+
+    def is_current(self, repository: str, digest: Optional[str], projection: Optional[Sequence[str]] = None,
+                   finding_status: Optional[str] = None) -> bool:
+        """
+        Returns True if findings for this repository were cached at the given digest.
+
+        A None digest (unknown or unreadable repository) is never current.
+        """
+        entry = self._index.get(repository)
+        return (digest is not None and entry is not None and entry.get("digest") == digest
+                and entry.get("projection") == self._projection_key(projection)
+                and entry.get("findingStatus") == finding_status
+                and os.path.exists(os.path.join(self.root, entry["findings"])))
+
+    def cached_at(self, repository: str) -> Optional[str]:
+        """Returns when a repository's findings were queried (ISO 8601), or None if it is not cached."""
+        entry = self._index.get(repository)
+        return entry.get("cachedAt") if entry is not None else None
+
+    def iter_findings(self, repository: str) -> Iterator[Dict[str, Any]]:
+        """Yields the cached findings for a repository."""
+        entry = self._index[repository]
+        yield from iter_snapshot(os.path.join(self.root, entry["findings"]))
+
+    def put(self, repository: str, digest: Optional[str], findings: Iterable[Dict[str, Any]],
+            projection: Optional[Sequence[str]] = None, finding_status: Optional[str] = None,
+            cached_at: Optional[str] = None) -> None:
+        """
+        Stores a repository's findings at a digest and persists the index.
+
+        ``cached_at`` should be when the findings were queried, so that no update made while
+        they were retrieved is missed; it defaults to now. Nothing is stored when the digest
+        is unknown.
+        """
+        if digest is None:
+            return
+        filename = hashlib.sha256(repository.encode("utf-8")).hexdigest()[:32] + ".ndjson"
+        with SnapshotWriter(os.path.join(self.root, filename)) as writer:
+            writer.write_many(findings)
+        with self._lock:
+            self._index[repository] = {
+                "digest": digest,
+                "findings": filename,
+                "projection": self._projection_key(projection),
+                "findingStatus": finding_status,
+                "cachedAt": cached_at or datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self._index, f, indent=2)
+            os.replace(temp_path, self.index_path)
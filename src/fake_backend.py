@@ -0,0 +1,453 @@
+import bisect
+import json
+import random
+import threading
+import time
+import datetime
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import boto3
+
+ACCOUNT_ID = "123456789012"
+REGION = "us-east-1"
+
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "INFORMATIONAL")
+_SEVERITY_WEIGHTS = (2, 15, 45, 30, 8)
+_PACKAGES = ("openssl", "glibc", "curl", "zlib", "libxml2", "python3", "nodejs", "openjdk", "sudo", "bash")
+_EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Inspector2 resource type -> (inventory service, resources[].type)
+RESOURCE_TYPES = {
+    "Ec2Instance": ("ec2", "AWS_EC2_INSTANCE"),
+    "LambdaFunction": ("lambda", "AWS_LAMBDA_FUNCTION"),
+    "EksCluster": ("eks", "AWS_EKS_CLUSTER"),
+    "RdsInstance": ("rds", "AWS_RDS_INSTANCE"),
+    "EcrRepository": ("ecr", "AWS_ECR_CONTAINER_IMAGE"),
+}
+
+
+class FakeResource:
+    """One synthetic resource, how many findings it has and how many of those are closed."""
+
+    __slots__ = ("resource_type", "name", "arn", "finding_id", "finding_count", "closed_count", "index")
+
+    def __init__(self, resource_type: str, name: str, arn: str, finding_id: str, finding_count: int, index: int):
+        self.resource_type = resource_type
+        self.name = name
+        self.arn = arn
+        self.finding_id = finding_id
+        self.finding_count = finding_count
+        # The first closed_count findings are CLOSED, the rest ACTIVE
+        self.closed_count = 0
+        self.index = index
+
+    @property
+    def active_count(self) -> int:
+        return self.finding_count - self.closed_count
+
+
+class FakeFleet:
+    """
+    A deterministic synthetic AWS estate: resources per type and the findings on them.
+
+    Findings are not stored; each one is generated on demand from its (resource, index)
+    position, so a fleet of 1M findings costs a few MB. Most resources are clean
+    (``clean_fraction``) and the findings are spread over the rest, as in real fleets. With
+    ``closed_fraction``, that share of the affected resources has all its findings CLOSED
+    and the same share has half of them CLOSED.
+
+    Parameters:
+        resources (int): Total resources, split over EC2 (50%), Lambda (30%), ECR (10%),
+            RDS (8%) and EKS (2%).
+        findings (int): Total findings.
+        clean_fraction (float): Share of resources without findings. Default is 0.7.
+        vulnerabilities (int): Distinct CVEs findings are drawn from. Default is 2000.
+        closed_fraction (float): Share of affected resources whose findings are all closed.
+            Default is 0, every finding ACTIVE.
+        seed (int): Random seed. Default is 0.
+    """
+
+    SHARES = (("Ec2Instance", 0.5), ("LambdaFunction", 0.3), ("EcrRepository", 0.1),
+              ("RdsInstance", 0.08), ("EksCluster", 0.02))
+
+    def __init__(self, resources: int = 10_000, findings: int = 1_000_000, clean_fraction: float = 0.7,
+                 vulnerabilities: int = 2000, closed_fraction: float = 0.0, seed: int = 0):
+        self.total_findings = findings
+        self.vulnerabilities = vulnerabilities
+        self.seed = seed
+        rng = random.Random(seed)
+        self.resources: Dict[str, List[FakeResource]] = {}
+        self.by_arn: Dict[str, FakeResource] = {}
+        all_resources: List[FakeResource] = []
+        for resource_type, share in self.SHARES:
+            count = max(1, int(resources * share))
+            created = [self._make_resource(resource_type, n) for n in range(count)]
+            self.resources[resource_type] = created
+            all_resources.extend(created)
+            for resource in created:
+                self.by_arn[resource.arn] = resource
+
+        affected = [r for r in all_resources if rng.random() >= clean_fraction] or all_resources[:1]
+        weights = [rng.paretovariate(1.5) for _ in affected]
+        scale = findings / sum(weights)
+        assigned = 0
+        for resource, weight in zip(affected, weights):
+            resource.finding_count = int(weight * scale)
+            assigned += resource.finding_count
+        for n in range(findings - assigned):
+            affected[n % len(affected)].finding_count += 1
+        if closed_fraction:
+            for resource in affected:
+                draw = rng.random()
+                if draw < closed_fraction:
+                    resource.closed_count = resource.finding_count
+                elif draw < 2 * closed_fraction:
+                    resource.closed_count = resource.finding_count // 2
+
+        # Global finding offsets per resource type, for resourceType-wide pagination
+        self._offsets: Dict[str, List[int]] = {}
+        for resource_type, created in self.resources.items():
+            offsets, total = [], 0
+            for resource in created:
+                offsets.append(total)
+                total += resource.finding_count
+            offsets.append(total)
+            self._offsets[resource_type] = offsets
+
+    @staticmethod
+    def _make_resource(resource_type: str, n: int) -> FakeResource:
+        if resource_type == "Ec2Instance":
+            name = f"i-{n:017x}"
+            return FakeResource(resource_type, name, f"arn:aws:ec2:{REGION}:{ACCOUNT_ID}:instance/{name}", name, 0, n)
+        if resource_type == "LambdaFunction":
+            name = f"function-{n:05d}"
+            arn = f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:{name}"
+            return FakeResource(resource_type, name, arn, f"{arn}:$LATEST", 0, n)
+        if resource_type == "EcrRepository":
+            name = f"repository-{n:05d}"
+            arn = f"arn:aws:ecr:{REGION}:{ACCOUNT_ID}:repository/{name}"
+            return FakeResource(resource_type, name, arn, f"{arn}/sha256:{n:064x}", 0, n)
+        if resource_type == "RdsInstance":
+            name = f"database-{n:05d}"
+            return FakeResource(resource_type, name, name, f"arn:aws:rds:{REGION}:{ACCOUNT_ID}:db:{name}", 0, n)
+        name = f"cluster-{n:04d}"
+        arn = f"arn:aws:eks:{REGION}:{ACCOUNT_ID}:cluster/{name}"
+        return FakeResource(resource_type, name, arn, arn, 0, n)
+
+    def finding_count(self, resource_type: Optional[str] = None) -> int:
+        """Returns the number of findings, optionally for one resource type."""
+        if resource_type is None:
+            return self.total_findings
+        return self._offsets[resource_type][-1]
+
+    def finding(self, resource: FakeResource, index: int) -> Dict[str, Any]:
+        """Generates the index-th finding of a resource, with the shape Inspector2 returns."""
+        rng = random.Random((self.seed, resource.resource_type, resource.index, index).__hash__())
+        vulnerability = rng.randrange(self.vulnerabilities)
+        cve = f"CVE-{2015 + vulnerability % 10}-{10000 + vulnerability}"
+        package = _PACKAGES[vulnerability % len(_PACKAGES)]
+        severity = rng.choices(SEVERITIES, _SEVERITY_WEIGHTS)[0]
+        score = round(rng.uniform(1.0, 10.0), 1)
+        first_observed = _EPOCH + datetime.timedelta(hours=rng.randrange(24 * 365))
+        updated = first_observed + datetime.timedelta(hours=rng.randrange(24 * 30))
+        _, resource_kind = RESOURCE_TYPES[resource.resource_type]
+        finding_type = "CODE_VULNERABILITY" if resource.resource_type == "LambdaFunction" and index % 7 == 0 \
+            else "PACKAGE_VULNERABILITY"
+        details: Dict[str, Any] = {}
+        if resource.resource_type == "Ec2Instance":
+            details = {"awsEc2Instance": {"type": "m5.large", "platform": "AMAZON_LINUX_2",
+                                          "imageId": "ami-0abcdef1234567890", "launchedAt": _EPOCH.isoformat(),
+                                          "ipV4Addresses": ["10.0.0.1"], "subnetId": "subnet-0123456789"}}
+        elif resource.resource_type == "LambdaFunction":
+            details = {"awsLambdaFunction": {"functionName": resource.name, "runtime": "python3.11",
+                                             "version": "$LATEST", "codeSha256": f"{resource.index:064x}",
+                                             "executionRoleArn": f"arn:aws:iam::{ACCOUNT_ID}:role/lambda"}}
+        elif resource.resource_type == "EcrRepository":
+            details = {"awsEcrContainerImage": {"repositoryName": resource.name, "imageHash": f"sha256:{resource.index:064x}",
+                                                "imageTags": ["latest"], "registry": ACCOUNT_ID,
+                                                "platform": "LINUX", "pushedAt": _EPOCH.isoformat()}}
+        return {
+            "awsAccountId": ACCOUNT_ID,
+            "findingArn": f"arn:aws:inspector2:{REGION}:{ACCOUNT_ID}:finding/"
+                          f"{resource.resource_type[:3].lower()}{resource.index:08x}{index:08x}",
+            "type": finding_type,
+            "title": f"{cve} - {package}",
+            "description": f"A flaw was found in {package}. " * 8,
+            "severity": severity,
+            "status": "CLOSED" if index < resource.closed_count else "ACTIVE",
+            "firstObservedAt": first_observed.isoformat(),
+            "lastObservedAt": updated.isoformat(),
+            "updatedAt": updated.isoformat(),
+            "createdAt": first_observed.isoformat(),
+            "fixAvailable": "YES" if vulnerability % 4 else "NO",
+            "exploitAvailable": "NO",
+            "inspectorScore": score,
+            "inspectorScoreDetails": {"adjustedCvss": {"score": score, "scoreSource": "NVD", "version": "3.1",
+                                                       "scoringVector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H"}},
+            "epss": {"score": round(rng.random() / 10, 5)},
+            "packageVulnerabilityDetails": {
+                "vulnerabilityId": cve,
+                "source": "NVD",
+                "sourceUrl": f"https://nvd.nist.gov/vuln/detail/{cve}",
+                "vendorSeverity": severity.title(),
+                "vendorCreatedAt": _EPOCH.isoformat(),
+                "cvss": [{"baseScore": score, "scoringVector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H",
+                          "source": "NVD", "version": "3.1"}],
+                "referenceUrls": [f"https://nvd.nist.gov/vuln/detail/{cve}", f"https://security.example/{cve}"],
+                "relatedVulnerabilities": [],
+                "vulnerablePackages": [{"name": package, "version": f"1.{vulnerability % 9}.{index % 5}",
+                                        "fixedInVersion": f"1.{vulnerability % 9 + 1}.0", "packageManager": "OS",
+                                        "epoch": 0, "release": "1.amzn2"}],
+            },
+            "remediation": {"recommendation": {"text": f"Upgrade {package} to the fixed version."}},
+            "resources": [{"id": resource.finding_id, "type": resource_kind, "partition": "aws",
+                           "region": REGION, "details": details}],
+        }
+
+    def iter_findings(self, resource_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yields every finding, optionally of one resource type, in a stable order."""
+        types = [resource_type] if resource_type else list(self.resources)
+        for current in types:
+            for resource in self.resources[current]:
+                for index in range(resource.finding_count):
+                    yield self.finding(resource, index)
+
+    def locate(self, resource_type: str, offset: int) -> Tuple[FakeResource, int]:
+        """Maps a resourceType-wide finding offset to (resource, index within the resource)."""
+        offsets = self._offsets[resource_type]
+        position = bisect.bisect_right(offsets, offset) - 1
+        return self.resources[resource_type][position], offset - offsets[position]
+
+
+class _Meta:
+    def __init__(self, service_model):
+        self.service_model = service_model
+
+
+class FakePaginator:
+    """A paginator over a fake operation that pages with ``nextToken``."""
+
+    def __init__(self, client: "FakeAwsClient", operation: str):
+        self.client = client
+        self.operation = operation
+
+    def paginate(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        token = None
+        while True:
+            response = getattr(self.client, self.operation)(**kwargs, **({"nextToken": token} if token else {}))
+            yield response
+            token = response.get("nextToken")
+            if not token:
+                return
+
+
+class FakeAwsClient:
+    """
+    A fake boto3 client backed by a FakeFleet.
+
+    It carries the real botocore service model, so the in-process CLI transport can parse
+    commands against it, and counts every call it serves.
+
+    Parameters:
+        fleet (FakeFleet): The synthetic estate.
+        service (str): The boto3 service name.
+        latency (float): Seconds each call sleeps, to simulate the network. Default is 0.
+    """
+
+    _models: Dict[str, Any] = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, fleet: FakeFleet, service: str, latency: float = 0.0):
+        self.fleet = fleet
+        self.service = service
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self._lock = threading.Lock()
+        with self._models_lock:
+            if service not in self._models:
+                self._models[service] = boto3.session.Session().client(
+                    service, region_name=REGION, aws_access_key_id="fake", aws_secret_access_key="fake"
+                ).meta.service_model
+        self.meta = _Meta(self._models[service])
+
+    def _record(self, operation: str, started: float) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[operation] += 1
+            self.seconds[operation] += time.perf_counter() - started
+
+    def can_paginate(self, operation: str) -> bool:
+        return False
+
+    def get_paginator(self, operation: str) -> FakePaginator:
+        return FakePaginator(self, operation)
+
+    # Inventory ---------------------------------------------------------------------------
+
+    def describe_instances(self, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        instances = [{"InstanceId": r.name, "InstanceType": "m5.large", "State": {"Name": "running"}}
+                     for r in self.fleet.resources["Ec2Instance"]]
+        self._record("describe_instances", started)
+        return {"Reservations": [{"Instances": instances[n:n + 50]} for n in range(0, len(instances), 50)]}
+
+    def list_functions(self, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        functions = [{"FunctionName": r.name, "FunctionArn": r.arn, "Runtime": "python3.11"}
+                     for r in self.fleet.resources["LambdaFunction"]]
+        self._record("list_functions", started)
+        return {"Functions": functions}
+
+    def list_clusters(self, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        clusters = [r.name for r in self.fleet.resources["EksCluster"]]
+        self._record("list_clusters", started)
+        return {"clusters": clusters}
+
+    def describe_db_instances(self, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        databases = [{"DBInstanceIdentifier": r.name, "Engine": "postgres"} for r in self.fleet.resources["RdsInstance"]]
+        self._record("describe_db_instances", started)
+        return {"DBInstances": databases}
+
+    def describe_repositories(self, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        repositories = [{"repositoryName": r.name, "repositoryArn": r.arn} for r in self.fleet.resources["EcrRepository"]]
+        self._record("describe_repositories", started)
+        return {"repositories": repositories}
+
+    def describe_images(self, repositoryName: str, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        index = int(repositoryName.rsplit("-", 1)[-1])
+        self._record("describe_images", started)
+        return {"imageDetails": [{"imageDigest": f"sha256:{index:064x}", "imageTags": ["latest"],
+                                  "imagePushedAt": _EPOCH}]}
+
+    def get_caller_identity(self, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self._record("get_caller_identity", started)
+        return {"Account": ACCOUNT_ID, "Arn": f"arn:aws:iam::{ACCOUNT_ID}:user/benchmark", "UserId": "AIDAFAKE"}
+
+    # Inspector2 --------------------------------------------------------------------------
+
+    def list_findings(self, filterCriteria: Dict[str, Any], maxResults: int = 100,
+                      nextToken: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        resource_type = next((f["value"] for f in filterCriteria.get("resourceType", [])), None)
+        arns = [f["value"] for f in filterCriteria.get("resourceArn", [])]
+        offset = int(nextToken or 0)
+        page: List[Dict[str, Any]] = []
+        if arns:
+            # Findings of the listed resources, concatenated in filter order
+            position = 0
+            for arn in arns:
+                resource = self.fleet.by_arn.get(arn)
+                if resource is None:
+                    continue
+                for index in range(max(0, offset - position), resource.finding_count):
+                    if len(page) >= maxResults:
+                        break
+                    page.append(self.fleet.finding(resource, index))
+                position += resource.finding_count
+            total = position
+        elif resource_type in self.fleet.resources:
+            total = self.fleet.finding_count(resource_type)
+            for global_offset in range(offset, min(offset + maxResults, total)):
+                page.append(self.fleet.finding(*self.fleet.locate(resource_type, global_offset)))
+        else:
+            total = 0
+        since = next((f.get("startInclusive") for f in filterCriteria.get("updatedAt", [])), None)
+        if since is not None:
+            page = [f for f in page if f["updatedAt"] >= since]
+        status = next((f["value"] for f in filterCriteria.get("findingStatus", [])), None)
+        if status is not None:
+            page = [f for f in page if f["status"] == status]
+        self._record("list_findings", started)
+        response: Dict[str, Any] = {"findings": page}
+        if offset + maxResults < total:
+            response["nextToken"] = str(offset + maxResults)
+        return response
+
+    _AGGREGATIONS = {
+        "AWS_EC2_INSTANCE": ("Ec2Instance", "ec2InstanceAggregation", "instanceId"),
+        "AWS_LAMBDA_FUNCTION": ("LambdaFunction", "lambdaFunctionAggregation", "functionName"),
+        "REPOSITORY": ("EcrRepository", "repositoryAggregation", "repository"),
+    }
+
+    def list_finding_aggregations(self, aggregationType: str, maxResults: int = 100,
+                                  nextToken: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        resource_type, key, id_field = self._AGGREGATIONS[aggregationType]
+        # Like Inspector2, the aggregation counts active findings only
+        affected = [r for r in self.fleet.resources[resource_type] if r.active_count]
+        offset = int(nextToken or 0)
+        responses = [{key: {id_field: r.name, "severityCounts": {"all": r.active_count}}}
+                     for r in affected[offset:offset + maxResults]]
+        self._record("list_finding_aggregations", started)
+        response: Dict[str, Any] = {"responses": responses}
+        if offset + maxResults < len(affected):
+            response["nextToken"] = str(offset + maxResults)
+        return response
+
+
+class FakeClientPool:
+    """
+    A ClientPool stand-in serving FakeAwsClients, one per service.
+
+    Parameters:
+        fleet (FakeFleet): The synthetic estate every client serves.
+        latency (float): Seconds each API call sleeps. Default is 0.
+    """
+
+    def __init__(self, fleet: FakeFleet, latency: float = 0.0):
+        self.fleet = fleet
+        self.latency = latency
+        self.clients: Dict[str, FakeAwsClient] = {}
+        self._lock = threading.Lock()
+
+    def client(self, service: str, region: Optional[str] = None, role_arn: Optional[str] = None,
+               profile: Optional[str] = None) -> FakeAwsClient:
+        with self._lock:
+            if service not in self.clients:
+                self.clients[service] = FakeAwsClient(self.fleet, service, self.latency)
+            return self.clients[service]
+
+    def call_counts(self) -> Dict[str, int]:
+        """Returns the number of calls served, keyed by "service.operation"."""
+        return {f"{service}.{operation}": count
+                for service, client in sorted(self.clients.items())
+                for operation, count in sorted(client.calls.items())}
+
+    def api_seconds_by_operation(self) -> Dict[str, float]:
+        """Returns the time spent serving calls, summed over threads, keyed by "service.operation"."""
+        return {f"{service}.{operation}": seconds
+                for service, client in sorted(self.clients.items())
+                for operation, seconds in sorted(client.seconds.items())}
+
+
+def repository_arns(fleet: FakeFleet, limit: Optional[int] = None) -> List[str]:
+    """Returns the ECR repository ARNs of a fleet, e.g. for Inspector(repositories_to_scan=...)."""
+    return [r.arn for r in fleet.resources["EcrRepository"][:limit]]
+
+
+def raw_page(start: int, count: int) -> str:
+    """Returns a JSON page of raw findings spread over 50 CVEs and 300 instances."""
+    findings = []
+    for n in range(start, start + count):
+        cve = f"CVE-2024-{n % 50:04d}"
+        findings.append({
+            "findingArn": f"arn:aws:inspector2:us-east-1:123456789012:finding/{n:032x}",
+            "status": "ACTIVE", "type": "PACKAGE_VULNERABILITY", "severity": "HIGH",
+            "title": f"{cve} - openssl", "description": f"Description of {cve}. " * 20,
+            "packageVulnerabilityDetails": {
+                "vulnerabilityId": cve, "source": "NVD", "referenceUrls": [f"https://nvd/{cve}"],
+                "vulnerablePackages": [{"name": "openssl", "version": "1.0.2", "packageManager": "OS"}],
+                "cvss": [{"baseScore": 7.5, "scoringVector": "CVSS:3.1/AV:N"}],
+            },
+            "resources": [{"id": f"i-{n % 300:08x}", "type": "AWS_EC2_INSTANCE", "region": "us-east-1",
+                           "details": {"awsEc2Instance": {"type": "t3.micro", "platform": "AMAZON_LINUX_2"}}}],
+        })
+    return json.dumps(findings)
@@ -0,0 +1,120 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Iterable, Iterator, List, Sequence, TypeVar
+
+from src.pipeline import BoundedStream, DEFAULT_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class FanOutExecutor:
+    """
+    Bounded worker pools for running services and per-resource queries concurrently.
+
+    Services and resource queries use separate pools so that a service task waiting on
+    its resource queries can never starve the pool those queries need. Results are always
+    returned in submission order, so merged output is deterministic regardless of which
+    call finishes first.
+
+    Parameters:
+        max_workers (int): Concurrent resource-level queries. Default is 8.
+        max_service_workers (int): Concurrent service-level tasks. Default is 5.
+    """
+
+    def __init__(self, max_workers: int = 8, max_service_workers: int = 5):
+        if max_workers < 1 or max_service_workers < 1:
+            raise ValueError("worker counts must be at least 1")
+        self.max_workers = max_workers
+        self._service_pool = ThreadPoolExecutor(max_service_workers, thread_name_prefix="inspector-service")
+        self._resource_pool = ThreadPoolExecutor(max_workers, thread_name_prefix="inspector-resource")
+
+    def run_services(self, tasks: Sequence[Callable[[], T]]) -> Iterator[T]:
+        """
+        Runs service-level tasks concurrently and yields their results in task order.
+
+        Args:
+            tasks (Sequence[Callable[[], T]]): Zero-argument callables, one per service.
+
+        Yields:
+            T: Each task's result, in the order the tasks were given.
+        """
+        futures: List[Future] = [self._service_pool.submit(task) for task in tasks]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def iter_services(self, sources: Sequence[Callable[[], Iterable[T]]],
+                      queue_size: int = DEFAULT_QUEUE_SIZE) -> Iterator[T]:
+        """
+        Runs service-level generators concurrently and yields their items in service order.
+
+        Unlike run_services, no service's output is collected into a list: each service
+        streams into a bounded buffer and blocks once it is full, so memory stays bounded
+        while the consumer drains the services one after another.
+
+        Args:
+            sources (Sequence[Callable[[], Iterable[T]]]): Zero-argument callables returning
+                each service's items.
+            queue_size (int): Chunks buffered per service. Default is 8.
+
+        Yields:
+            T: Every item of the first service, then the second, and so on.
+        """
+        streams = [BoundedStream(_deferred(source), queue_size, executor=self._service_pool)
+                   for source in sources]
+        try:
+            for stream in streams:
+                yield from stream
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def map_ordered(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """
+        Applies fn to items on the resource pool and yields results in input order.
+
+        At most twice ``max_workers`` calls are in flight at once, which bounds the
+        number of buffered results when the consumer is slower than the workers.
+
+        Args:
+            fn (Callable[[T], R]): The function to apply.
+            items (Iterable[T]): The inputs.
+
+        Yields:
+            R: fn(item) for each item, in input order.
+        """
+        window = self.max_workers * 2
+        pending: deque = deque()
+        try:
+            for item in items:
+                pending.append(self._resource_pool.submit(fn, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        """Shuts down both pools, waiting for running tasks to finish."""
+        self._service_pool.shutdown(wait=True)
+        self._resource_pool.shutdown(wait=True)
+
+    def __enter__(self) -> "FanOutExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+
+def _deferred(source: Callable[[], Iterable[T]]) -> Iterator[T]:
+    # Calls the source in the worker thread rather than the submitting one
+    yield from source()
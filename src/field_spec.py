@@ -0,0 +1,167 @@
+import logging
+import functools
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+PathElement = Union[str, int]
+
+
+class FieldSpec:
+    """
+    Declares where one output field of an extracted finding comes from.
+
+    Attributes:
+        key (str): The output key.
+        path (Tuple[PathElement, ...]): Keys (str) and list indexes (int) walked from the raw
+            finding. An empty path means the field is the AWS service label itself.
+        services (Optional[Tuple[str, ...]]): Services the field applies to; for other
+            services the field is always None. None means every service.
+        default (Any): Returned when the final key is absent (mirrors dict.get defaults).
+    """
+
+    __slots__ = ("key", "path", "services", "default")
+
+    def __init__(self, key: str, path: Sequence[PathElement], services: Optional[Sequence[str]] = None,
+                 default: Any = None):
+        self.key = key
+        self.path = tuple(path)
+        self.services = tuple(services) if services is not None else None
+        self.default = default
+
+
+_RESOURCE_DETAILS = ("resources", 0, "details")
+_PACKAGE_DETAILS = ("packageVulnerabilityDetails",)
+_REMEDIATION = ("remediation", "recommendation")
+
+# The extracted finding layout, in output order
+FIELD_SPEC: Tuple[FieldSpec, ...] = (
+    FieldSpec("AWS Service", ()),
+    FieldSpec("findingArn", ("findingArn",)),
+    FieldSpec("firstObservedAt", ("firstObservedAt",)),
+    FieldSpec("lastObservedAt", ("lastObservedAt",)),
+    FieldSpec("status", ("status",)),
+    FieldSpec("type", ("type",)),
+    FieldSpec("severity", ("severity",)),
+    FieldSpec("title", ("title",)),
+    FieldSpec("description", ("description",)),
+    FieldSpec("codeVulnerabilityDetails", ("codeVulnerabilityDetails",), services=("Lambda",)),
+    FieldSpec("awsLambdaFunction", _RESOURCE_DETAILS + ("awsLambdaFunction",), services=("Lambda",)),
+    FieldSpec("awsEc2Instance", _RESOURCE_DETAILS + ("awsEc2Instance",), services=("EC2",)),
+    FieldSpec("awsEcrContainerImage", _RESOURCE_DETAILS + ("awsEcrContainerImage",), services=("EKS", "ECR")),
+    FieldSpec("epss", ("epss", "score")),
+    FieldSpec("fixAvailable", ("fixAvailable",)),
+    FieldSpec("inspectorScoreDetails", ("inspectorScoreDetails",)),
+    FieldSpec("cvss2", _PACKAGE_DETAILS + ("cvss", 0, "cvss2")),
+    FieldSpec("cvss3", _PACKAGE_DETAILS + ("cvss", 0, "cvss3")),
+    FieldSpec("atigData", ("atigData",)),
+    FieldSpec("referenceUrls", _PACKAGE_DETAILS + ("referenceUrls",)),
+    FieldSpec("source", _PACKAGE_DETAILS + ("source",)),
+    FieldSpec("sourceUrl", _PACKAGE_DETAILS + ("sourceUrl",)),
+    FieldSpec("vendorSeverity", _PACKAGE_DETAILS + ("vendorSeverity",)),
+    FieldSpec("vendorCreatedAt", _PACKAGE_DETAILS + ("vendorCreatedAt",)),
+    FieldSpec("vendorUpdatedAt", _PACKAGE_DETAILS + ("vendorUpdatedAt",)),
+    FieldSpec("relatedVulnerabilities", _PACKAGE_DETAILS + ("relatedVulnerabilities",)),
+    FieldSpec("vulnerablePackages", _PACKAGE_DETAILS + ("vulnerablePackages",)),
+    FieldSpec("networkReachabilityDetails", ("networkReachabilityDetails",)),
+    FieldSpec("remediation", _REMEDIATION + ("text",)),
+    FieldSpec("remediationUrl", _REMEDIATION + ("Url",)),
+    FieldSpec("resources", ("resources",), default=[]),
+    FieldSpec("createdAt", ("createdAt",)),
+    FieldSpec("updatedAt", ("updatedAt",)),
+)
+
+FIELD_NAMES: Tuple[str, ...] = tuple(spec.key for spec in FIELD_SPEC)
+_SPEC_BY_KEY: Dict[str, FieldSpec] = {spec.key: spec for spec in FIELD_SPEC}
+
+
+def _step(parent: str, element: PathElement) -> str:
+    """Returns the expression for one path step, yielding None if the parent has the wrong shape."""
+    if isinstance(element, int):
+        return f"({parent}[{element}] if {parent}.__class__ is list and len({parent}) > {element} else None)"
+    return f"({parent}.get({element!r}) if {parent}.__class__ is dict else None)"
+
+
+def _generate_source(aws_service: str, specs: Sequence[FieldSpec]) -> str:
+    """
+    Generates the source of an extractor function for one service and projection.
+
+    Every shared path prefix is evaluated once into a local variable, so e.g.
+    resources[0].details is walked a single time per finding however many fields use it.
+    """
+    lines: List[str] = ["def extract(f):"]
+    prefixes: Dict[Tuple[PathElement, ...], str] = {(): "f"}
+
+    def variable(prefix: Tuple[PathElement, ...]) -> str:
+        if prefix not in prefixes:
+            parent = variable(prefix[:-1])
+            name = f"v{len(prefixes)}"
+            lines.append(f"    {name} = {_step(parent, prefix[-1])}")
+            prefixes[prefix] = name
+        return prefixes[prefix]
+
+    values: List[Tuple[str, str]] = []
+    for spec in specs:
+        if not spec.path:
+            values.append((spec.key, repr(aws_service)))
+        elif spec.services is not None and aws_service not in spec.services:
+            values.append((spec.key, "None"))
+        else:
+            parent = variable(spec.path[:-1])
+            leaf = spec.path[-1]
+            if parent == "f" and not isinstance(leaf, int):
+                expression = f"f.get({leaf!r}, {spec.default!r})" if spec.default is not None else f"f.get({leaf!r})"
+            elif spec.default is None:
+                expression = _step(parent, leaf)
+            else:
+                expression = f"({parent}.get({leaf!r}, {spec.default!r}) if {parent}.__class__ is dict else None)"
+            values.append((spec.key, expression))
+
+    lines.append("    return {")
+    lines.extend(f"        {key!r}: {expression}," for key, expression in values)
+    lines.append("    }")
+    return "\n".join(lines)
+
+
+def validate_projection(projection: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Validates a projection against the field spec.
+
+    Raises:
+        ValueError: If the projection names a field that is not in FIELD_SPEC.
+    """
+    if projection is None:
+        return None
+    unknown = [key for key in projection if key not in _SPEC_BY_KEY]
+    if unknown:
+        raise ValueError(f"Unknown fields in projection: {unknown}")
+    return tuple(dict.fromkeys(projection))
+
+
+@functools.lru_cache(maxsize=None)
+def _compile(aws_service: str, projection: Optional[Tuple[str, ...]]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    specs = FIELD_SPEC if projection is None else tuple(_SPEC_BY_KEY[key] for key in projection)
+    source = _generate_source(aws_service, specs)
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f"<field_spec:{aws_service}>", "exec"), namespace)
+    logger.debug(f"Compiled extractor for {aws_service}:\n{source}")
+    return namespace["extract"]
+
+
+def compile_extractor(aws_service: str, projection: Optional[Sequence[str]] = None) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Returns a fast extractor function for one service, compiled once and cached.
+
+    Args:
+        aws_service (str): The AWS service label (e.g. "EC2").
+        projection (Optional[Sequence[str]]): The output keys to extract, in output order.
+            None extracts every field in FIELD_SPEC.
+
+    Returns:
+        Callable[[Dict[str, Any]], Dict[str, Any]]: Maps a raw finding to an extracted finding.
+            Missing or wrongly shaped intermediate values produce None rather than an error.
+
+    Raises:
+        ValueError: If the projection names an unknown field.
+    """
+    return _compile(aws_service, validate_projection(projection))
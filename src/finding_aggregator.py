@@ -0,0 +1,104 @@
+import logging
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+from src.base_inspector import BaseInspector
+
+logger = logging.getLogger(__name__)
+
+# Inspector2 resource type -> (aggregationType, request/response key, field naming the resource)
+AGGREGATIONS: Dict[str, Tuple[str, str, str]] = {
+    "Ec2Instance": ("AWS_EC2_INSTANCE", "ec2InstanceAggregation", "instanceId"),
+    "LambdaFunction": ("AWS_LAMBDA_FUNCTION", "lambdaFunctionAggregation", "functionName"),
+    "EcrRepository": ("REPOSITORY", "repositoryAggregation", "repository"),
+}
+
+
+def resource_key(resource_type: str, resource: str) -> str:
+    """
+    Reduces an inventory entry (ARN or name) to the identifier used by the aggregation.
+
+    EC2 instance ARNs become instance IDs, Lambda function ARNs become function names
+    (without qualifier) and ECR repository ARNs become repository names.
+    """
+    if resource_type == "LambdaFunction" and resource.startswith("arn:"):
+        parts = resource.split(":")
+        return parts[6] if len(parts) > 6 else resource
+    if resource_type == "EcrRepository":
+        return resource.split(":repository/", 1)[-1]
+    return resource.rsplit("/", 1)[-1]
+
+
+class ResourceFindingCounts:
+    """
+    Active finding counts per resource of one resource type, from a finding aggregation.
+
+    Attributes:
+        resource_type (str): The Inspector2 resource type (e.g. "Ec2Instance").
+        counts (Dict[str, int]): Active findings per resource key (see resource_key).
+        total (int): Active findings across the resource type.
+    """
+
+    def __init__(self, resource_type: str, counts: Dict[str, int]):
+        self.resource_type = resource_type
+        self.counts = counts
+        self.total = sum(counts.values())
+
+    def has_findings(self, resource: str) -> bool:
+        """Returns True if the inventory entry has at least one active finding."""
+        return self.counts.get(resource_key(self.resource_type, resource), 0) > 0
+
+
+class FindingAggregator(BaseInspector):
+    """
+    Runs the Inspector2 finding aggregation pre-pass.
+
+    A handful of list_finding_aggregations pages tell which resources of a type have
+    active findings at all, so detailed list_findings queries can be limited to those.
+    Resource types without a per-resource aggregation (EKS clusters, RDS instances) are
+    not pre-filtered.
+    """
+
+    def iter_aggregation_responses(self, resource_type: str, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the per-resource aggregation responses for a resource type across all pages.
+        """
+        aggregation_type, request_key, _ = AGGREGATIONS[resource_type]
+        next_token: Optional[str] = None
+        while True:
+            kwargs: Dict[str, Any] = {
+                'aggregationType': aggregation_type,
+                'aggregationRequest': {request_key: {}},
+                'maxResults': page_size,
+            }
+            if next_token:
+                kwargs['nextToken'] = next_token
+            response = self._call("list_finding_aggregations", **kwargs)
+            for item in response.get('responses', []):
+                aggregation = item.get(request_key)
+                if aggregation:
+                    yield aggregation
+            next_token = response.get('nextToken')
+            if not next_token:
+                return
+
+    def resource_counts(self, resource_type: str) -> Optional[ResourceFindingCounts]:
+        """
+        Returns active finding counts per resource, or None if the resource type has no
+        per-resource aggregation or the aggregation failed (callers then query everything).
+        """
+        if resource_type not in AGGREGATIONS:
+            return None
+        _, _, id_field = AGGREGATIONS[resource_type]
+        counts: Dict[str, int] = {}
+        try:
+            for aggregation in self.iter_aggregation_responses(resource_type):
+                resource = aggregation.get(id_field)
+                if resource:
+                    key = resource_key(resource_type, resource)
+                    counts[key] = counts.get(key, 0) + (aggregation.get('severityCounts') or {}).get('all', 0)
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Finding aggregation for {resource_type} failed, querying every resource: {e}")
+            return None
+        return ResourceFindingCounts(resource_type, counts)
+
@@ -0,0 +1,172 @@
+import logging
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from src.field_spec import FIELD_NAMES
+
+logger = logging.getLogger(__name__)
+
+# Output keys in the order extract_findings produces them
+FIELDS: Tuple[str, ...] = FIELD_NAMES
+
+# Slot names: output keys that are not identifiers are renamed
+_SLOTS: Tuple[str, ...] = tuple("aws_service" if key == "AWS Service" else key for key in FIELDS)
+_FIELD_SLOTS: Tuple[Tuple[str, str], ...] = tuple(zip(FIELDS, _SLOTS))
+_KEY_TO_SLOT: Dict[str, str] = dict(_FIELD_SLOTS)
+
+# Top-level string fields that repeat across many findings (per service, per CVE, per status)
+_SHARED_STRINGS = (
+    "aws_service", "status", "type", "severity", "title", "description", "fixAvailable", "source",
+    "sourceUrl", "vendorSeverity", "vendorCreatedAt", "vendorUpdatedAt", "remediation", "remediationUrl",
+)
+# Nested fields that are identical for every finding of the same vulnerability or resource
+_SHARED_VALUES = (
+    "referenceUrls", "relatedVulnerabilities", "cvss2", "cvss3", "atigData", "inspectorScoreDetails",
+    "vulnerablePackages", "networkReachabilityDetails", "resources",
+    "awsLambdaFunction", "awsEc2Instance", "awsEcrContainerImage",
+)
+
+
+def _identity(value: Any) -> Any:
+    # Canonical containers and strings are unique per value, so their id identifies the value
+    if isinstance(value, (dict, list, str)):
+        return id(value)
+    return (type(value), value)
+
+
+class StringTable:
+    """
+    Dictionary-encodes repeated values so equal values share a single object.
+
+    Strings are canonicalized through a dict rather than sys.intern so the table, and
+    everything only it keeps alive, is released together with the records that use it.
+    Nested JSON values (lists and dicts) are hash-consed bottom-up: once their children
+    are canonical, a container is identified by its keys and the ids of its children,
+    so equal CVSS blocks, package lists or resource descriptions share one object.
+
+    Records built from a table share these objects and must be treated as read-only.
+    """
+
+    __slots__ = ("_strings", "_values")
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+        self._values: Dict[Tuple[Any, ...], Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings) + len(self._values)
+
+    def string(self, value: Any) -> Any:
+        """Returns the canonical instance of a string; other values are returned unchanged."""
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        return value
+
+    def value(self, value: Any) -> Any:
+        """Returns the canonical instance of a JSON value (string, list or dict)."""
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        if isinstance(value, dict):
+            items = [(self.string(k), self.value(v)) for k, v in value.items()]
+            key: Tuple[Any, ...] = ("d",) + tuple((k, _identity(v)) for k, v in items)
+            shared = self._values.get(key)
+            if shared is None:
+                shared = self._values[key] = dict(items)
+            return shared
+        if isinstance(value, list):
+            items = [self.value(v) for v in value]
+            key = ("l",) + tuple(_identity(v) for v in items)
+            shared = self._values.get(key)
+            if shared is None:
+                shared = self._values[key] = items
+            return shared
+        return value
+
+
+class FindingRecord:
+    """
+    A compact representation of an extracted finding.
+
+    Stores the ~30 fields of an extracted finding in ``__slots__`` instead of a per-record
+    dict, and shares low-cardinality strings (severity, status, service, package names...),
+    per-vulnerability metadata and per-resource details through a StringTable. ``to_dict()`` returns exactly the
+    dict extract_findings would have produced, so serialized output is unchanged.
+
+    Because values are shared between records, records should be treated as read-only.
+    """
+
+    __slots__ = _SLOTS
+
+    @classmethod
+    def from_dict(cls, finding: Dict[str, Any], table: Optional[StringTable] = None) -> "FindingRecord":
+        """
+        Builds a record from an extracted finding.
+
+        Args:
+            finding (Dict[str, Any]): A finding as produced by extract_findings.
+            table (Optional[StringTable]): The table used to share repeated values. Records of
+                one run should share a table; without one, values are stored as-is.
+
+        Returns:
+            FindingRecord: The compact record.
+        """
+        record = cls.__new__(cls)
+        get = finding.get
+        for key, slot in _FIELD_SLOTS:
+            setattr(record, slot, get(key))
+        if table is not None:
+            record._share(table)
+        return record
+
+    def _share(self, table: StringTable) -> None:
+        for slot in _SHARED_STRINGS:
+            setattr(self, slot, table.string(getattr(self, slot)))
+        for slot in _SHARED_VALUES:
+            setattr(self, slot, table.value(getattr(self, slot)))
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _KEY_TO_SLOT:
+            raise KeyError(key)
+        return getattr(self, _KEY_TO_SLOT[key])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access by output key, so records can stand in for finding dicts."""
+        slot = _KEY_TO_SLOT.get(key)
+        return getattr(self, slot) if slot is not None else default
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, FindingRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FindingRecord({self.aws_service!r}, {self.findingArn!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the JSON-compatible finding dict, with keys in extract_findings order."""
+        return {key: getattr(self, slot) for key, slot in _FIELD_SLOTS}
+
+
+def to_records(findings: Iterable[Dict[str, Any]], table: Optional[StringTable] = None) -> Iterator[FindingRecord]:
+    """
+    Lazily converts extracted findings into compact records sharing one StringTable.
+
+    Args:
+        findings (Iterable[Dict[str, Any]]): Extracted findings.
+        table (Optional[StringTable]): The table to share values through. A new table is
+            created when none is given.
+
+    Yields:
+        FindingRecord: One record per finding.
+    """
+    table = table if table is not None else StringTable()
+    for finding in findings:
+        yield finding if isinstance(finding, FindingRecord) else FindingRecord.from_dict(finding, table)
+
+
+def json_default(value: Any) -> Any:
+    """``default`` hook for json.dump/json.dumps that serializes FindingRecords."""
+    if isinstance(value, FindingRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
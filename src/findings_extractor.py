@@ -1,103 +1,76 @@
 import os
+import re
 import json
 import datetime
 import sys
 import logging
 import boto3
 from botocore.exceptions import ClientError
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Sequence
+
+from src.field_spec import compile_extractor
 
 logger = logging.getLogger(__name__)
 
-def extract_basic_info(finding: Dict[str, Any], aws_service: str) -> Dict[str, Any]:
-    """
-    Extracts basic information from a finding.
+_VULNERABILITY_ID = re.compile(r"\b(CVE-\d{4}-\d{4,}|GHSA(?:-[23456789cfghjmpqrvwx]{4}){3}|ALAS\d*-\d{4}-\d+)\b")
 
-    Args:
-        finding (Dict[str, Any]): The finding dictionary.
-        aws_service (str): The name of the AWS service.
-
-    Returns:
-        Dict[str, Any]: A dictionary containing basic information about the finding.
-    """
-    return {
-        "AWS Service": aws_service,
-        "findingArn": finding.get("findingArn"),
-        "firstObservedAt": finding.get("firstObservedAt"),
-        "lastObservedAt": finding.get("lastObservedAt"),
-        "status": finding.get("status"),
-        "type": finding.get("type"),
-        "severity": finding.get("severity"),
-        "title": finding.get("title"),
-        "description": finding.get("description")
-    }
-
-def extract_service_specific_info(finding: Dict[str, Any], aws_service: str) -> Dict[str, Any]:
+def vulnerability_id(finding: Dict[str, Any]) -> Optional[str]:
     """
-    Extracts service-specific information from a finding.
+    Returns the vulnerability identifier (e.g. a CVE ID) of a raw or extracted finding.
+
+    Raw findings carry it in packageVulnerabilityDetails.vulnerabilityId. Extracted findings
+    do not, so it is recovered from the title ("CVE-2024-1234 - openssl") or the source URL,
+    falling back to the part of the title before " - ".
 
     Args:
         finding (Dict[str, Any]): The finding dictionary.
-        aws_service (str): The name of the AWS service.
 
     Returns:
-        Dict[str, Any]: A dictionary containing service-specific information about the finding.
+        Optional[str]: The vulnerability ID, or None if the finding has no title.
+    """
+    details = finding.get("packageVulnerabilityDetails")
+    if isinstance(details, dict) and details.get("vulnerabilityId"):
+        return details["vulnerabilityId"]
+    for field in ("title", "sourceUrl"):
+        value = finding.get(field)
+        if isinstance(value, str):
+            match = _VULNERABILITY_ID.search(value)
+            if match:
+                return match.group(1)
+    title = finding.get("title")
+    if isinstance(title, str) and title:
+        return title.split(" - ", 1)[0].strip()
+    return None
+
+def resource_id(finding: Dict[str, Any]) -> Optional[str]:
     """
-    return {
-        "codeVulnerabilityDetails": finding.get("codeVulnerabilityDetails") if aws_service == "Lambda" else None,
-        "awsLambdaFunction": finding.get("resources", [{}])[0].get("details", {}).get("awsLambdaFunction") if aws_service == "Lambda" else None,
-        "awsEc2Instance": finding.get("resources", [{}])[0].get("details", {}).get("awsEc2Instance") if aws_service == "EC2" else None,
-        "awsEcrContainerImage": finding.get("resources", [{}])[0].get("details", {}).get("awsEcrContainerImage") if aws_service in ["EKS", "ECR"] else None,
-    }
-
-def extract_vulnerability_details(finding: Dict[str, Any]) -> Dict[str, Any]:
+    Returns the ID (e.g. the instance ID or function ARN) of the first resource of a raw or
+    extracted finding, or None if it has no resources.
     """
-    Extracts vulnerability details from a finding.
+    resources = finding.get("resources")
+    if isinstance(resources, list) and resources and isinstance(resources[0], dict):
+        return resources[0].get("id")
+    return None
 
-    Args:
-        finding (Dict[str, Any]): The finding dictionary.
+# Inspector2 status of an open finding; SUPPRESSED and CLOSED findings are not open
+OPEN_STATUS = "ACTIVE"
 
-    Returns:
-        Dict[str, Any]: A dictionary containing vulnerability details about the finding.
+def is_open(finding: Dict[str, Any]) -> bool:
     """
-    return {
-        "epss": finding.get("epss", {}).get("score"),
-        "fixAvailable": finding.get("fixAvailable"),
-        "inspectorScoreDetails": finding.get("inspectorScoreDetails"),
-        "cvss2": finding.get("packageVulnerabilityDetails", {}).get("cvss", [{}])[0].get("cvss2"),
-        "cvss3": finding.get("packageVulnerabilityDetails", {}).get("cvss", [{}])[0].get("cvss3"),
-        "atigData": finding.get("atigData")
-    }
-
-def extract_vendor_info(finding: Dict[str, Any]) -> Dict[str, Any]:
+    Returns True if a raw or extracted finding is open, i.e. its status is OPEN_STATUS.
     """
-    Extracts vendor information from a finding.
-
-    Args:
-        finding (Dict[str, Any]): The finding dictionary.
+    return finding.get("status") == OPEN_STATUS
 
-    Returns:
-        Dict[str, Any]: A dictionary containing vendor information about the finding.
-    """
-    vuln_details = finding.get("packageVulnerabilityDetails", {})
-    return {
-        "referenceUrls": vuln_details.get("referenceUrls"),
-        "source": vuln_details.get("source"),
-        "sourceUrl": vuln_details.get("sourceUrl"),
-        "vendorSeverity": vuln_details.get("vendorSeverity"),
-        "vendorCreatedAt": vuln_details.get("vendorCreatedAt"),
-        "vendorUpdatedAt": vuln_details.get("vendorUpdatedAt"),
-        "relatedVulnerabilities": vuln_details.get("relatedVulnerabilities"),
-        "vulnerablePackages": vuln_details.get("vulnerablePackages")
-    }
-
-def extract_findings(findings: Optional[Dict[str, Any]], aws_service: str) -> List[Dict[str, Any]]:
+def extract_findings(findings: Optional[Dict[str, Any]], aws_service: str,
+                     projection: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
     """
     Extracts and processes findings for a given AWS service.
 
     Args:
         findings (Optional[Dict[str, Any]]): A dictionary containing findings or None.
         aws_service (str): The name of the AWS service for which findings are being processed.
+        projection (Optional[Sequence[str]]): Output fields to extract, in order. Defaults to every
+            field in field_spec.FIELD_SPEC.
 
     Returns:
         List[Dict[str, Any]]: A list of processed findings dictionaries. If no findings are provided or an error occurs, an empty list is returned.
@@ -106,8 +79,10 @@ def extract_findings(findings: Optional[Dict[str, Any]], aws_service: str) -> Li
     1. Checks if findings are None or not a list, logs appropriate warnings or errors, and returns an empty list.
     2. Iterates over each finding in the findings list.
     3. Validates that each finding is a dictionary, logs a warning if not, and skips invalid entries.
-    4. Extracts and combines basic information, service-specific information, vulnerability details, and vendor information from each finding.
-    5. Extracts additional details such as network reachability, remediation text and URL, resources, creation, and update timestamps.
+    4. Extracts basic information, service-specific information, vulnerability details, vendor information, network
+       reachability, remediation text and URL, resources, creation, and update timestamps using the extractor compiled
+       from field_spec.FIELD_SPEC (restricted to the projection, if one is given).
+    5. Missing or wrongly shaped nested values (e.g. an empty resources list) yield None for the affected fields.
     6. Appends the processed finding to the extracted_findings list.
     7. Logs any exceptions that occur during processing and continues with the next finding.
 
@@ -123,28 +98,32 @@ def extract_findings(findings: Optional[Dict[str, Any]], aws_service: str) -> Li
         logger.error(f"Findings for {aws_service} is not a list: {type(findings_list)}")
         return []
 
-    extracted_findings: List[Dict[str, Any]] = []
-    for f in findings_list:
+    return list(iter_extract_findings(findings_list, aws_service, projection))
+
+def iter_extract_findings(findings: Iterable[Dict[str, Any]], aws_service: str,
+                          projection: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily extracts findings for a given AWS service, one finding at a time.
+
+    Accepts any iterable of raw findings, such as the output of BaseInspector.iter_findings,
+    so that findings can be extracted as pages arrive without materializing the full result set.
+
+    Args:
+        findings (Iterable[Dict[str, Any]]): Raw Inspector2 findings.
+        aws_service (str): The name of the AWS service for which findings are being processed.
+        projection (Optional[Sequence[str]]): Output fields to extract, in order. Defaults to every field.
+
+    Yields:
+        Dict[str, Any]: A processed finding. Invalid findings are logged and skipped.
+    """
+    extract = compile_extractor(aws_service, projection)
+    for f in findings:
+        if not isinstance(f, dict):
+            logger.warning(f"Invalid finding structure for {aws_service}: {type(f)}")
+            continue
         try:
-            if not isinstance(f, dict):
-                logger.warning(f"Invalid finding structure for {aws_service}: {type(f)}")
-                continue
-                
-            finding: Dict[str, Any] = {
-                **extract_basic_info(f, aws_service),
-                **extract_service_specific_info(f, aws_service),
-                **extract_vulnerability_details(f),
-                **extract_vendor_info(f),
-                "networkReachabilityDetails": f.get("networkReachabilityDetails"),
-                "remediation": f.get("remediation", {}).get("recommendation", {}).get("text"),
-                "remediationUrl": f.get("remediation", {}).get("recommendation", {}).get("Url"),
-                "resources": f.get("resources", []),
-                "createdAt": f.get("createdAt"),
-                "updatedAt": f.get("updatedAt")
-            }
-            extracted_findings.append(finding)
+            finding = extract(f)
         except Exception as e:
             logger.error(f"Error processing finding for {aws_service}: {str(e)}")
             continue
-            
-    return extracted_findings
\ No newline at end of file
+        yield finding
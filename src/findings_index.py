@@ -0,0 +1,357 @@
+import os
+import re
+import sys
+import sqlite3
+import logging
+import argparse
+import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.snapshot_io import find_snapshots, iter_snapshot, snapshot_partition
+from src.findings_extractor import OPEN_STATUS, resource_id, vulnerability_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = "output/index/findings.sqlite"
+
+# Rows inserted per executemany call while ingesting a snapshot
+BATCH_SIZE = 5000
+
+_SNAPSHOT_NAME = re.compile(r"(\d{4})-(\d{2})-(\d{2})_(\d{2})(\d{2})(\d{2})")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    taken_at TEXT NOT NULL,
+    partition_key TEXT NOT NULL DEFAULT '',
+    finding_count INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    finding_arn TEXT PRIMARY KEY,
+    vulnerability_id TEXT,
+    resource_arn TEXT,
+    aws_service TEXT,
+    severity TEXT,
+    status TEXT,
+    title TEXT,
+    first_observed_at TEXT,
+    last_observed_at TEXT,
+    updated_at TEXT,
+    first_snapshot_at TEXT NOT NULL,
+    last_snapshot_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS observations (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    finding_arn TEXT NOT NULL,
+    status TEXT,
+    severity TEXT,
+    PRIMARY KEY (snapshot_id, finding_arn)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_findings_vulnerability ON findings (vulnerability_id);
+CREATE INDEX IF NOT EXISTS idx_findings_resource ON findings (resource_arn);
+CREATE INDEX IF NOT EXISTS idx_findings_severity ON findings (severity, status);
+CREATE INDEX IF NOT EXISTS idx_findings_first_observed ON findings (first_observed_at);
+CREATE INDEX IF NOT EXISTS idx_findings_last_observed ON findings (last_observed_at);
+CREATE INDEX IF NOT EXISTS idx_findings_last_snapshot ON findings (last_snapshot_at);
+CREATE INDEX IF NOT EXISTS idx_observations_finding ON observations (finding_arn);
+CREATE INDEX IF NOT EXISTS idx_snapshots_partition ON snapshots (partition_key, taken_at);
+"""
+
+# Findings observed in the most recent snapshot of their partition (e.g. the account/region
+# cell of a matrix run), as each partition is written with its own timestamps
+_IN_LATEST_SNAPSHOT = """finding_arn IN (
+    SELECT observations.finding_arn FROM observations JOIN snapshots ON snapshots.id = observations.snapshot_id
+    WHERE snapshots.taken_at = (SELECT MAX(latest.taken_at) FROM snapshots AS latest
+                                WHERE latest.partition_key = snapshots.partition_key)
+)"""
+
+# Keeps the most recent version of each finding when snapshots are ingested out of order
+_UPSERT_FINDING = """
+INSERT INTO findings (finding_arn, vulnerability_id, resource_arn, aws_service, severity, status, title,
+                      first_observed_at, last_observed_at, updated_at, first_snapshot_at, last_snapshot_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (finding_arn) DO UPDATE SET
+    vulnerability_id = CASE WHEN excluded.last_snapshot_at >= findings.last_snapshot_at
+                            THEN excluded.vulnerability_id ELSE findings.vulnerability_id END,
+    resource_arn = CASE WHEN excluded.last_snapshot_at >= findings.last_snapshot_at
+                        THEN excluded.resource_arn ELSE findings.resource_arn END,
+    aws_service = CASE WHEN excluded.last_snapshot_at >= findings.last_snapshot_at
+                       THEN excluded.aws_service ELSE findings.aws_service END,
+    severity = CASE WHEN excluded.last_snapshot_at >= findings.last_snapshot_at
+                    THEN excluded.severity ELSE findings.severity END,
+    status = CASE WHEN excluded.last_snapshot_at >= findings.last_snapshot_at
+                  THEN excluded.status ELSE findings.status END,
+    title = CASE WHEN excluded.last_snapshot_at >= findings.last_snapshot_at
+                 THEN excluded.title ELSE findings.title END,
+    first_observed_at = MIN(COALESCE(excluded.first_observed_at, findings.first_observed_at),
+                            COALESCE(findings.first_observed_at, excluded.first_observed_at)),
+    last_observed_at = MAX(COALESCE(excluded.last_observed_at, findings.last_observed_at),
+                           COALESCE(findings.last_observed_at, excluded.last_observed_at)),
+    updated_at = MAX(COALESCE(excluded.updated_at, findings.updated_at),
+                     COALESCE(findings.updated_at, excluded.updated_at)),
+    first_snapshot_at = MIN(excluded.first_snapshot_at, findings.first_snapshot_at),
+    last_snapshot_at = MAX(excluded.last_snapshot_at, findings.last_snapshot_at)
+"""
+
+
+def snapshot_taken_at(path: str) -> str:
+    """
+    Returns the ISO 8601 time a snapshot was taken, from its YYYY-MM-DD_HHMMSS file name.
+
+    Falls back to the file's modification time for files that do not follow the layout.
+    """
+    match = _SNAPSHOT_NAME.search(os.path.basename(path))
+    if match:
+        year, month, day, hour, minute, second = (int(part) for part in match.groups())
+        return datetime.datetime(year, month, day, hour, minute, second).isoformat()
+    return datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+
+
+class FindingsIndex:
+    """
+    A local SQLite index over the snapshots under output/.
+
+    Snapshots are ingested incrementally: files already indexed (same path, size and
+    modification time) are skipped. The ``findings`` table keeps the latest known state
+    of every finding, indexed by findingArn, vulnerability ID, resource ARN, severity and
+    observed dates; ``observations`` records which snapshots each finding appeared in.
+
+    A finding is considered open when its latest status is ACTIVE (findings_extractor.OPEN_STATUS)
+    and it appears in the most recent indexed snapshot of its partition (see
+    snapshot_io.snapshot_partition), so that every cell of a matrix run counts.
+
+    Parameters:
+        db_path (str): The SQLite database file. Default is "output/index/findings.sqlite".
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(snapshots)")}
+        if columns and "partition_key" not in columns:
+            # Indexes built before partitions were recorded are rebuilt by the next ingest
+            with self.connection:
+                self.connection.execute("DROP TABLE observations")
+                self.connection.execute("DROP TABLE snapshots")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self.connection.close()
+
+    def __enter__(self) -> "FindingsIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def ingest(self, root: str = "output", type_suffix: str = "inspector") -> int:
+        """
+        Indexes every snapshot under root that has not been indexed yet.
+
+        Args:
+            root (str): The output directory. Default is "output".
+            type_suffix (str): The findings type to index. Default is "inspector".
+
+        Returns:
+            int: The number of snapshots ingested.
+        """
+        ingested = 0
+        for path in find_snapshots(root, type_suffix):
+            if self.ingest_snapshot(path, root):
+                ingested += 1
+        logger.info(f"Indexed {ingested} new snapshots into {self.db_path}")
+        return ingested
+
+    def ingest_snapshot(self, path: str, root: str = "output") -> bool:
+        """
+        Indexes a single snapshot file unless it is already indexed and unchanged.
+
+        ``root`` is the output directory the snapshot's partition is read relative to.
+
+        Returns:
+            bool: True if the snapshot was (re)indexed.
+        """
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT id, size, mtime FROM snapshots WHERE path = ?", (path,)).fetchone()
+        if row is not None and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return False
+
+        taken_at = snapshot_taken_at(path)
+        with self.connection:
+            if row is not None:
+                self.connection.execute("DELETE FROM observations WHERE snapshot_id = ?", (row["id"],))
+                self.connection.execute("DELETE FROM snapshots WHERE id = ?", (row["id"],))
+            cursor = self.connection.execute(
+                "INSERT INTO snapshots (path, size, mtime, taken_at, partition_key, finding_count, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (path, stat.st_size, stat.st_mtime, taken_at, "/".join(snapshot_partition(path, root)),
+                 datetime.datetime.now().isoformat(timespec="seconds"))
+            )
+            snapshot_id = cursor.lastrowid
+            count = 0
+            for findings, observations in self._batches(iter_snapshot(path), snapshot_id, taken_at):
+                self.connection.executemany(_UPSERT_FINDING, findings)
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO observations (snapshot_id, finding_arn, status, severity) VALUES (?, ?, ?, ?)",
+                    observations
+                )
+                count += len(findings)
+            self.connection.execute("UPDATE snapshots SET finding_count = ? WHERE id = ?", (count, snapshot_id))
+        logger.info(f"Indexed {count} findings from {path}")
+        return True
+
+    @staticmethod
+    def _batches(findings: Iterable[Dict[str, Any]], snapshot_id: int,
+                 taken_at: str) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+        finding_rows: List[tuple] = []
+        observation_rows: List[tuple] = []
+        for finding in findings:
+            finding_arn = finding.get("findingArn")
+            if not finding_arn:
+                continue
+            finding_rows.append((
+                finding_arn, vulnerability_id(finding), resource_id(finding), finding.get("AWS Service"),
+                finding.get("severity"), finding.get("status"), finding.get("title"),
+                finding.get("firstObservedAt"), finding.get("lastObservedAt"), finding.get("updatedAt"),
+                taken_at, taken_at,
+            ))
+            observation_rows.append((snapshot_id, finding_arn, finding.get("status"), finding.get("severity")))
+            if len(finding_rows) >= BATCH_SIZE:
+                yield finding_rows, observation_rows
+                finding_rows, observation_rows = [], []
+        if finding_rows:
+            yield finding_rows, observation_rows
+
+    def latest_snapshot_at(self) -> Optional[str]:
+        """Returns when the most recent indexed snapshot was taken."""
+        row = self.connection.execute("SELECT MAX(taken_at) AS taken_at FROM snapshots").fetchone()
+        return row["taken_at"]
+
+    def longest_open(self, limit: int = 20, severity: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the open findings that were first observed longest ago.
+
+        Args:
+            limit (int): Maximum number of rows. Default is 20.
+            severity (Optional[str]): Restricts results to one severity (e.g. "CRITICAL").
+
+        Returns:
+            List[Dict[str, Any]]: Rows with vulnerability_id, resource_arn, severity,
+                first_observed_at, days_open and finding_arn.
+        """
+        sql = (
+            "SELECT vulnerability_id, resource_arn, severity, first_observed_at, finding_arn, "
+            "CAST(julianday(?) - julianday(first_observed_at) AS INTEGER) AS days_open "
+            f"FROM findings WHERE status = ? AND {_IN_LATEST_SNAPSHOT} "
+            "AND first_observed_at IS NOT NULL"
+        )
+        params: List[Any] = [self.latest_snapshot_at(), OPEN_STATUS]
+        if severity:
+            sql += " AND severity = ?"
+            params.append(severity)
+        sql += " ORDER BY first_observed_at ASC LIMIT ?"
+        params.append(limit)
+        return self.query(sql, params)
+
+    def resources_for_vulnerability(self, vuln_id: str, open_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Returns the resources affected by a vulnerability, oldest first.
+        """
+        sql = "SELECT resource_arn, severity, status, first_observed_at, last_observed_at, finding_arn " \
+              "FROM findings WHERE vulnerability_id = ?"
+        params: List[Any] = [vuln_id]
+        if open_only:
+            sql += f" AND status = ? AND {_IN_LATEST_SNAPSHOT}"
+            params.append(OPEN_STATUS)
+        return self.query(sql + " ORDER BY first_observed_at", params)
+
+    def vulnerabilities_for_resource(self, resource_arn: str, open_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Returns the vulnerabilities found on a resource, oldest first.
+        """
+        sql = "SELECT vulnerability_id, severity, status, first_observed_at, last_observed_at, finding_arn " \
+              "FROM findings WHERE resource_arn = ?"
+        params: List[Any] = [resource_arn]
+        if open_only:
+            sql += f" AND status = ? AND {_IN_LATEST_SNAPSHOT}"
+            params.append(OPEN_STATUS)
+        return self.query(sql + " ORDER BY first_observed_at", params)
+
+    def iter_observations(self, path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the findingArn, status and severity of every finding in an indexed snapshot,
+        in findingArn order.
+
+        Rows are read in primary key order, so no sort is needed and the result can be
+        merge-joined directly (see snapshot_diff.diff_sorted).
+
+        Raises:
+            KeyError: If the snapshot has not been indexed.
+        """
+        row = self.connection.execute("SELECT id FROM snapshots WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            raise KeyError(f"Snapshot not indexed: {path}")
+        cursor = self.connection.execute(
+            "SELECT finding_arn, status, severity FROM observations WHERE snapshot_id = ? ORDER BY finding_arn",
+            (row["id"],)
+        )
+        for finding_arn, status, severity in cursor:
+            yield {"findingArn": finding_arn, "status": status, "severity": severity}
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        """Runs an arbitrary read query and returns the rows as dicts."""
+        return [dict(row) for row in self.connection.execute(sql, tuple(params))]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Index output/ snapshots into SQLite and query them.")
+    parser.add_argument("--db", default=DEFAULT_INDEX_PATH, help="SQLite database path")
+    parser.add_argument("--root", default="output", help="Snapshot root directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("ingest", help="Index new snapshots")
+    longest = subparsers.add_parser("longest-open", help="Open findings first observed longest ago")
+    longest.add_argument("--limit", type=int, default=20)
+    longest.add_argument("--severity")
+    subparsers.add_parser("vulnerability", help="Resources affected by a vulnerability").add_argument("vuln_id")
+    subparsers.add_parser("resource", help="Vulnerabilities on a resource").add_argument("resource_arn")
+    diff = subparsers.add_parser("diff", help="New, resolved and severity/status changes between two snapshots")
+    diff.add_argument("old_path")
+    diff.add_argument("new_path")
+    args = parser.parse_args(argv)
+
+    with FindingsIndex(args.db) as index:
+        if args.command == "ingest":
+            index.ingest(args.root)
+            return
+        if args.command == "diff":
+            from src.snapshot_diff import diff_sorted
+            for change in diff_sorted(index.iter_observations(args.old_path), index.iter_observations(args.new_path),
+                                      fields=("severity", "status")):
+                print("\t".join([change.kind, change.finding_arn] +
+                                [f"{field}: {old} -> {new}" for field, (old, new) in change.changes.items()]))
+            return
+        if args.command == "longest-open":
+            rows = index.longest_open(args.limit, args.severity)
+        elif args.command == "vulnerability":
+            rows = index.resources_for_vulnerability(args.vuln_id)
+        else:
+            rows = index.vulnerabilities_for_resource(args.resource_arn)
+        for row in rows:
+            print("\t".join("" if value is None else str(value) for value in row.values()))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
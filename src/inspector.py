@@ -1,11 +1,12 @@
 import os
 import json
+import argparse
 import datetime
 import sys
 import logging
 import boto3
 from botocore.exceptions import ClientError
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -13,6 +14,20 @@ from collector import FindingsCollector
 from utils.aws_cli import run_aws_cli
 from findings_extractor import extract_findings
 from services.serviceinspector import ServiceInspector
+from query_planner import summarize_plans
+from fanout import FanOutExecutor
+from pipeline import Pipeline
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.retry import RetryPolicy, set_retry_policy
+from checkpoint import CollectionCheckpoint, merge_into_snapshot, DEFAULT_CHECKPOINT_PATH
+from field_spec import validate_projection
+from inventory_cache import InventoryCache, cache_scope, DEFAULT_INVENTORY_CACHE_PATH
+from ecr_digest_cache import EcrDigestCache, DEFAULT_ECR_CACHE_ROOT
+from utils.client_pool import ClientPool, DEFAULT_MAX_POOL_CONNECTIONS, set_default_pool
+from utils.metrics import RunMetrics, set_run_metrics
+from snapshot_io import metrics_path, poam_path
+from poam import PoamAggregator, write_poam
+from run_journal import RunJournal, DEFAULT_JOURNAL_PATH
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +43,39 @@ class Inspector:
         enable_ecr_repos (bool): Flag to enable ECR inspector. Default is False.
         enable_cis (bool): Flag to enable CIS inspector. Default is True.
         repositories_to_scan (Optional[List[str]]): List of ECR repositories to scan. Default is None.
+        max_workers (int): Concurrent Inspector2 queries; 1 runs everything sequentially. Default is 8.
+        requests_per_second (float): Initial Inspector2 request rate, adapted on throttling. Default is 10.
+        streaming (bool): Write each finding to the snapshot as soon as it is extracted. Default is False.
+        output_format (str): Streaming snapshot format, "ndjson", compact "json" or "normalized" (a
+            vulnerability catalog plus occurrences). Default is "ndjson".
+        incremental (bool): Pull only findings updated since the last checkpoint and merge them into
+            the previous snapshot by findingArn. Default is False.
+        checkpoint_path (str): Where the incremental checkpoint is stored. Default is
+            "output/checkpoints/inspector.json".
+        fields (Optional[List[str]]): Only extract these finding fields (see field_spec.FIELD_SPEC).
+            Default is None, which extracts every field.
+        inventory_cache_path (Optional[str]): Where resource inventories are cached between runs,
+            scoped to the caller's account (looked up once per run); None disables the cache.
+            Default is "output/cache/inventory.json".
+        refresh_inventory (bool): Drop cached inventories before running. Default is False.
+        prefilter (bool): Collect only active findings, using a finding aggregation pre-pass to
+            query only resources that have any. Default is False, which collects findings of
+            every status.
+        client_pool (Optional[ClientPool]): Pool providing every AWS client of the run, installed as
+            the process-wide pool. Default is a new pool sized for max_workers.
+        partition (Sequence[str]): Extra output path components, e.g. (account, region). Default is ().
+        ecr_cache_root (Optional[str]): Where ECR findings are cached by image digest, so unchanged
+            repositories are not queried again; None disables the cache. Default is "output/cache/ecr".
+        compression (Optional[str]): "gzip" or "zstd" to compress snapshots as they are written.
+            Default is None (plain files).
+        journal_path (Optional[str]): Where completed units of work are journaled, so an interrupted
+            run can be resumed; None disables the journal. Default is "output/checkpoints/journal.ndjson".
+        resume (bool): Resume the run interrupted at journal_path instead of starting over. Default is False.
+        poam (bool): Roll the findings up by vulnerability while they stream and write a POA&M CSV
+            next to the inspector snapshot, at ``poam_path``. Default is False.
+
+    Each run records its metrics (utils.metrics.RunMetrics) in ``metrics`` and writes them
+    next to the inspector snapshot as <snapshot>.metrics.json, at ``metrics_path``.
 
     Raises:
         boto3.exceptions.Boto3Error: If there is an error initializing the boto3 client.
@@ -42,13 +90,65 @@ class Inspector:
     """
     def __init__(self, enable_lambda: bool = True, enable_eks: bool = True, enable_ec2: bool = True, 
                  enable_rds: bool = True, enable_ecr_repos: bool = False, 
-                 enable_cis: bool = True, repositories_to_scan: Optional[List[str]] = None) -> None:
+                 enable_cis: bool = True, repositories_to_scan: Optional[List[str]] = None,
+                 max_workers: int = 8, requests_per_second: float = 10.0,
+                 streaming: bool = False, output_format: str = "ndjson",
+                 incremental: bool = False, checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+                 fields: Optional[List[str]] = None,
+                 inventory_cache_path: Optional[str] = DEFAULT_INVENTORY_CACHE_PATH,
+                 refresh_inventory: bool = False, prefilter: bool = False,
+                 client_pool: Optional[ClientPool] = None, partition: Sequence[str] = (),
+                 ecr_cache_root: Optional[str] = DEFAULT_ECR_CACHE_ROOT,
+                 compression: Optional[str] = None,
+                 journal_path: Optional[str] = DEFAULT_JOURNAL_PATH, resume: bool = False,
+                 poam: bool = False) -> None:
         logger.info("Initializing Inspector")
-        self.client = boto3.client('inspector2')
-        self.collector = FindingsCollector()
+        if client_pool is None:
+            client_pool = ClientPool(max_pool_connections=max(DEFAULT_MAX_POOL_CONNECTIONS, 2 * max_workers))
+        # CLI-style calls (inventories, ECR) go through the process-wide pool
+        set_default_pool(client_pool)
+        self.client_pool = client_pool
+        self.client = client_pool.client('inspector2')
+        self.collector = FindingsCollector(streaming=streaming, output_format=output_format,
+                                           compact=fields is None, partition=partition,
+                                           compression=compression)
+        self.rate_limiter = AdaptiveRateLimiter(rate=requests_per_second)
+        # A fresh policy per run, so the retry budget and circuit breakers start clean
+        self.retry_policy = RetryPolicy()
+        set_retry_policy(self.retry_policy)
+        self.metrics = RunMetrics()
+        set_run_metrics(self.metrics)
+        self.metrics_path: Optional[str] = None
+        self.poam = PoamAggregator() if poam else None
+        self.poam_path: Optional[str] = None
+        self.executor = FanOutExecutor(max_workers=max_workers) if max_workers > 1 else None
+        self.inventory_cache = None
+        if inventory_cache_path:
+            # Scoped to the caller's account: CI credentials name no profile, and a cache restored
+            # from another run must not serve a different account's inventory
+            account_id = client_pool.client('sts').get_caller_identity().get('Account')
+            self.inventory_cache = InventoryCache(inventory_cache_path, scope=cache_scope(account_id))
+            if refresh_inventory:
+                self.inventory_cache.invalidate()
+            self.inventory_cache.put("CallerIdentity", account_id)
         
+        projection = validate_projection(fields)
+        self.journal = RunJournal(journal_path, resume, projection) if journal_path else None
+
         # Initialize service inspector
-        self.service_inspector = ServiceInspector(self.client, repositories_to_scan, enabled=True)
+        self.service_inspector = ServiceInspector(self.client, repositories_to_scan, enabled=True,
+                                                  executor=self.executor, rate_limiter=self.rate_limiter,
+                                                  projection=projection,
+                                                  inventory_cache=self.inventory_cache, prefilter=prefilter,
+                                                  client_pool=client_pool,
+                                                  digest_cache=EcrDigestCache(ecr_cache_root) if ecr_cache_root else None,
+                                                  journal=self.journal)
+
+        self.incremental = incremental
+        self.checkpoint = CollectionCheckpoint.load(checkpoint_path) if incremental else None
+        if self.checkpoint is not None and self.checkpoint.is_usable():
+            logger.info(f"Incremental run: pulling findings updated since {self.checkpoint.updated_at}")
+            self.service_inspector.updated_since = dict(self.checkpoint.updated_at)
 
     def run(self) -> None:
         """
@@ -56,14 +156,94 @@ class Inspector:
         """
         logger.info("Inspector execution started")
         
-        combined_findings = self.service_inspector.get_findings()
-
-        self.collector.add_findings(combined_findings)
-        self.collector.save_findings()
+        pipeline = Pipeline(self.service_inspector.iter_service_findings())
+        if self.checkpoint is not None:
+            pipeline.through(self.checkpoint.track)
+            if self.checkpoint.is_usable():
+                snapshot = self.checkpoint.snapshot
+                pipeline.through(lambda findings: merge_into_snapshot(snapshot, findings))
+        if self.poam is not None:
+            pipeline.through(self.poam.track)
+        try:
+            with self.metrics.timer("Inspector", "pipeline"):
+                pipeline.run(self.collector.add_findings)
+        except BaseException:
+            self.collector.abort()
+            if self.journal is not None:
+                # Kept, so the run can be resumed
+                self.journal.close()
+            raise
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+        plan_summary = summarize_plans(self.service_inspector.query_plans)
+        for plan in plan_summary["plans"]:
+            logger.info(f"Query plan: {plan}")
+        logger.info(f"Estimated list_findings calls: {plan_summary['estimatedCalls']}")
+        for resource_type, skipped in self.service_inspector.skipped_resources.items():
+            logger.info(f"Skipped {skipped} {resource_type} resources without active findings")
+        logger.info(f"Inspector2 throttled {self.rate_limiter.throttle_count} times; "
+                    f"final request rate {self.rate_limiter.rate:.2f}/s")
+        for service, counters in self.retry_policy.stats.summary().items():
+            logger.info(f"{service} CLI calls: {counters['calls']:.0f} calls, {counters['retries']:.0f} retries "
+                        f"({counters['throttles']:.0f} throttled), {counters['waitSeconds']:.1f}s waiting, "
+                        f"{counters['failures']:.0f} failed, {counters['shortCircuited']:.0f} skipped by circuit breaker")
+        with self.metrics.timer("Inspector", "save"):
+            self.collector.save_findings()
+        if self.checkpoint is not None:
+            self.checkpoint.save(self.collector.output_paths["inspector"])
+        if self.poam is not None:
+            with self.metrics.timer("Inspector", "poam"):
+                self.poam_path = poam_path(self.collector.output_paths["inspector"])
+                write_poam(self.poam.items(), self.poam_path)
+        if self.journal is not None:
+            self.journal.discard()
+        summary = self.metrics.finish(self.retry_policy.stats, self.rate_limiter.throttle_count)
+        self.metrics_path = self.metrics.write(metrics_path(self.collector.output_paths["inspector"]))
+        logger.info(f"Collected {summary['findings']} findings in {summary['wallSeconds']:.1f}s "
+                    f"({summary['findingsPerSecond']:.0f}/s), {sum(c['calls'] for c in summary['apiCalls'])} API calls, "
+                    f"{summary['bytesReceived']} bytes received, peak RSS {summary['peakRssBytes'] / 2**20:.0f} MiB")
         logger.info("Inspector execution completed")
 
-def main():
-    inspector = Inspector()
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Collect AWS Inspector findings into output/.")
+    parser.add_argument("--max-workers", type=int, default=8,
+                        help="Concurrent Inspector2 queries (1 runs sequentially)")
+    parser.add_argument("--requests-per-second", type=float, default=10.0,
+                        help="Initial Inspector2 request rate, adapted on throttling")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write findings to the snapshot as they are extracted")
+    parser.add_argument("--output-format", choices=["ndjson", "json", "normalized"], default="ndjson",
+                        help="Snapshot format used with --stream")
+    parser.add_argument("--compression", choices=["gzip", "zstd"],
+                        help="Compress snapshots as they are written (.gz/.zst)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Pull only findings updated since the last checkpoint and merge them")
+    parser.add_argument("--fields", type=lambda value: [f.strip() for f in value.split(",") if f.strip()],
+                        help="Comma-separated finding fields to extract (default: all)")
+    parser.add_argument("--no-inventory-cache", action="store_true",
+                        help="Enumerate resource inventories from scratch and do not cache them")
+    parser.add_argument("--refresh-inventory", action="store_true",
+                        help="Invalidate cached inventories before running")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Collect only active findings, querying only resources that have any")
+    parser.add_argument("--poam", action="store_true",
+                        help="Also write a POA&M CSV with one row per vulnerability next to the snapshot")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted run from its journal, skipping completed resources")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="Do not journal completed work (the run cannot be resumed)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    inspector = Inspector(max_workers=args.max_workers, requests_per_second=args.requests_per_second,
+                          streaming=args.stream, output_format=args.output_format, compression=args.compression,
+                          incremental=args.incremental, fields=args.fields,
+                          inventory_cache_path=None if args.no_inventory_cache else DEFAULT_INVENTORY_CACHE_PATH,
+                          refresh_inventory=args.refresh_inventory, prefilter=args.prefilter,
+                          journal_path=None if args.no_journal else DEFAULT_JOURNAL_PATH, resume=args.resume,
+                          poam=args.poam)
     inspector.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVENTORY_CACHE_PATH = "output/cache/inventory.json"
+
+# Seconds an inventory stays fresh, per inventory kind. Instances churn faster than
+# functions, clusters and databases; the caller identity only changes with credentials.
+DEFAULT_TTLS: Dict[str, float] = {
+    "Lambda": 3600,
+    "EKS": 3600,
+    "EC2": 900,
+    "RDS": 3600,
+    "CallerIdentity": 86400,
+}
+DEFAULT_TTL = 900
+
+
+def cache_scope(account_id: Optional[str] = None) -> str:
+    """
+    Returns the account scope cached entries belong to: the AWS profile, the caller's account
+    when known, and the region.
+
+    Entries cached under one profile, account or region are never served to another. The
+    account matters where credentials name no profile, e.g. OIDC credentials in CI, whose
+    cache may be restored for a different role or account.
+    """
+    profile = os.environ.get("AWS_PROFILE", "default")
+    region = os.environ.get("AWS_REGION", "us-east-1")
+    if account_id:
+        return f"{profile}/{account_id}/{region}"
+    return f"{profile}/{region}"
+
+
+class InventoryCache:
+    """
+    Caches resource inventories (list/describe results) with per-kind TTLs.
+
+    Entries are keyed by kind (e.g. "EC2") and scope (see cache_scope), persisted as JSON
+    so that repeated runs within the TTL skip inventory enumeration, and can be invalidated
+    explicitly. The cache is safe to use from the concurrent service workers.
+
+    Parameters:
+        path (Optional[str]): Where the cache is persisted; None keeps it in memory only.
+            Default is "output/cache/inventory.json".
+        ttls (Optional[Dict[str, float]]): TTL in seconds per kind, overriding DEFAULT_TTLS.
+        clock (Callable[[], float]): Time source, for tests. Default is time.time.
+        scope (Optional[str]): Scope of entries stored or read without an explicit one.
+            Default is cache_scope() at the time of each call.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_INVENTORY_CACHE_PATH,
+                 ttls: Optional[Dict[str, float]] = None, clock: Callable[[], float] = time.time,
+                 scope: Optional[str] = None):
+        self.path = path
+        self.scope = scope
+        self.ttls: Dict[str, float] = {**DEFAULT_TTLS, **(ttls or {})}
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Ignoring unreadable inventory cache {self.path}: {e}")
+            return
+        self._entries = data.get("entries", {}) if isinstance(data, dict) else {}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"entries": self._entries}, f)
+        os.replace(temp_path, self.path)
+
+    def _key(self, kind: str, scope: Optional[str]) -> str:
+        return f"{scope or self.scope or cache_scope()}:{kind}"
+
+    def get(self, kind: str, scope: Optional[str] = None) -> Optional[Any]:
+        """
+        Returns the cached value for kind, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(kind, scope))
+        if entry is None:
+            return None
+        ttl = self.ttls.get(kind, DEFAULT_TTL)
+        if self.clock() - entry.get("cachedAt", 0) > ttl:
+            return None
+        return entry.get("value")
+
+    def put(self, kind: str, value: Any, scope: Optional[str] = None) -> None:
+        """
+        Stores a JSON-compatible value for kind and persists the cache.
+        """
+        with self._lock:
+            self._entries[self._key(kind, scope)] = {"cachedAt": self.clock(), "value": value}
+            self._save()
+
+    def get_or_fetch(self, kind: str, fetch: Callable[[], Any], scope: Optional[str] = None) -> Any:
+        """
+        Returns the cached value for kind, calling fetch and caching its result on a miss.
+
+        Empty results are cached too (an account without clusters stays without clusters
+        for the TTL), but a fetch returning None is treated as a failure and not cached.
+        """
+        value = self.get(kind, scope)
+        if value is not None:
+            self.hits += 1
+            logger.info(f"Using cached {kind} inventory")
+            return value
+        self.misses += 1
+        value = fetch()
+        if value is not None:
+            self.put(kind, value, scope)
+        return value
+
+    def invalidate(self, kind: Optional[str] = None, scope: Optional[str] = None) -> None:
+        """
+        Drops cached entries: one kind in one scope, or everything when kind is None.
+        """
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(kind, scope), None)
+            self._save()
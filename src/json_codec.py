@@ -0,0 +1,78 @@
+import os
+import json
+import logging
+from typing import Any, Union
+
+from src.finding_record import json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# JSON encoder used for snapshots: "orjson" (fast, used when installed) or the stdlib "json"
+JSON_BACKENDS = ("orjson", "json")
+
+
+def _available_backend(name: str) -> str:
+    if name == "orjson" and orjson is None:
+        logger.warning("orjson is not installed, falling back to the stdlib json module")
+        return "json"
+    return name
+
+
+def set_json_backend(backend: str) -> None:
+    """
+    Selects the JSON encoder used to write and read snapshots.
+
+    Args:
+        backend (str): "orjson" for the fast encoder (falls back to "json" if it is not
+            installed) or "json" for the standard library.
+
+    Raises:
+        ValueError: If the backend name is not recognised.
+    """
+    global _backend
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend {backend!r}, expected one of {JSON_BACKENDS}")
+    _backend = _available_backend(backend)
+
+
+def get_json_backend() -> str:
+    """Returns the name of the JSON encoder currently in use."""
+    return _backend
+
+
+_backend = _available_backend(os.environ.get("INSPECTOR_JSON_BACKEND", "orjson" if orjson else "json"))
+
+
+def dumps(value: Any, indent: bool = False) -> bytes:
+    """
+    Serializes a value to UTF-8 JSON, compact or indented by two spaces.
+
+    FindingRecords are serialized as their dict form. Both backends produce equivalent
+    documents; orjson writes non-ASCII characters as UTF-8 rather than escaping them.
+
+    Args:
+        value (Any): The value to serialize.
+        indent (bool): Indent the document by two spaces. Default is False.
+
+    Returns:
+        bytes: The encoded document.
+    """
+    if _backend == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(value, default=json_default, option=option)
+    if indent:
+        return json.dumps(value, indent=2, default=json_default).encode("utf-8")
+    return json.dumps(value, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parses a JSON document from bytes or text."""
+    if _backend == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
@@ -0,0 +1,116 @@
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.finding_record import json_default
+from src.findings_extractor import resource_id, vulnerability_id
+
+logger = logging.getLogger(__name__)
+
+VULNERABILITY = "vulnerability"
+RESOURCE = "resource"
+
+# Vulnerability metadata shared by every occurrence of a vulnerability, stored once per ID
+VULNERABILITY_FIELDS = ("title", "description", "epss", "cvss2", "cvss3", "atigData", "referenceUrls", "source",
+                        "sourceUrl", "vendorSeverity", "vendorCreatedAt", "vendorUpdatedAt",
+                        "relatedVulnerabilities", "vulnerablePackages", "remediation", "remediationUrl")
+
+# Resource details shared by every finding of a resource, stored once per resource ID
+RESOURCE_FIELDS = ("resources", "awsLambdaFunction", "awsEc2Instance", "awsEcrContainerImage")
+
+# Record markers; a record carrying none of them is a finding stored as is
+LAYOUT = "@layout"
+CATALOG = "@catalog"
+
+_MISSING = object()
+
+
+# Catalog kind -> (fields, key function)
+CATALOGS: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Optional[str]]]] = {
+    VULNERABILITY: (VULNERABILITY_FIELDS, vulnerability_id),
+    RESOURCE: (RESOURCE_FIELDS, resource_id),
+}
+
+
+class SnapshotNormalizer:
+    """
+    Splits a stream of findings into catalogs and a slim occurrence table.
+
+    The first finding of each vulnerability ID emits a catalog record holding its
+    VULNERABILITY_FIELDS, and the first finding of each resource one holding its
+    RESOURCE_FIELDS. Every finding is then written as an occurrence record that refers to
+    both catalog entries (as "@vulnerability" and "@resource") and omits the fields equal
+    to them. Fields that differ from the catalog entry (e.g. a resource's installed package
+    version) stay in the occurrence, so the original records are rebuilt exactly. The field
+    order of the findings is recorded in a layout record whenever it changes. Findings
+    without a vulnerability or resource ID are stored as is.
+
+    Catalog and layout records precede the first occurrence that uses them, so the stream
+    can be written and read in a single pass holding only the catalogs in memory.
+    """
+
+    def __init__(self):
+        self.catalogs: Dict[str, Dict[str, Dict[str, Any]]] = {kind: {} for kind in CATALOGS}
+        self._layout: Optional[List[str]] = None
+
+    def records(self, finding: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yields the records storing one finding (or FindingRecord)."""
+        if not isinstance(finding, dict):
+            finding = json_default(finding)
+        occurrence: Dict[str, Any] = {}
+        # The catalogs' fields are disjoint, so the entries of one finding merge into one dict
+        shared: Dict[str, Any] = {}
+        for kind, (fields, key) in CATALOGS.items():
+            entry_id = key(finding)
+            if entry_id is None:
+                continue
+            entry = self.catalogs[kind].get(entry_id)
+            if entry is None:
+                entry = {field: finding[field] for field in fields if field in finding}
+                self.catalogs[kind][entry_id] = entry
+                yield {CATALOG: kind, "id": entry_id, "fields": entry}
+            occurrence[f"@{kind}"] = entry_id
+            shared.update(entry)
+        if not occurrence:
+            yield finding
+            return
+        layout = list(finding)
+        if layout != self._layout:
+            self._layout = layout
+            yield {LAYOUT: layout}
+        occurrence.update({key: value for key, value in finding.items() if shared.get(key, _MISSING) != value})
+        yield occurrence
+
+
+class SnapshotDenormalizer:
+    """Rebuilds the flat findings from the records written by a SnapshotNormalizer."""
+
+    def __init__(self):
+        self.catalogs: Dict[str, Dict[str, Dict[str, Any]]] = {kind: {} for kind in CATALOGS}
+        self._layout: List[str] = []
+
+    def finding(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Consumes one record and returns the finding it stores, or None for catalog and
+        layout records.
+
+        Raises:
+            ValueError: If an occurrence refers to an entry missing from its catalog.
+        """
+        if CATALOG in record:
+            self.catalogs[record[CATALOG]][record["id"]] = record["fields"]
+            return None
+        if LAYOUT in record:
+            self._layout = record[LAYOUT]
+            return None
+        merged: Optional[Dict[str, Any]] = None
+        for kind in CATALOGS:
+            entry_id = record.get(f"@{kind}")
+            if entry_id is not None:
+                entry = self.catalogs[kind].get(entry_id)
+                if entry is None:
+                    raise ValueError(f"Occurrence of {kind} {entry_id} precedes its catalog entry")
+                merged = dict(entry) if merged is None else {**merged, **entry}
+        if merged is None:
+            return record
+        merged.update(record)
+        return {key: merged[key] for key in self._layout}
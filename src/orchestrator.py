@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.client_pool import ClientPool, set_default_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MATRIX_PATH = "config/accounts.json"
+
+
+class CollectionTarget:
+    """
+    One cell of the collection matrix: an account, the role used to reach it, and a region.
+
+    Attributes:
+        account_id (str): The AWS account ID, used to partition the output.
+        region (str): The region to collect.
+        role_arn (Optional[str]): The role to assume; None uses the base credentials.
+    """
+
+    def __init__(self, account_id: str, region: str, role_arn: Optional[str] = None):
+        self.account_id = account_id
+        self.region = region
+        self.role_arn = role_arn
+
+    def __repr__(self) -> str:
+        return f"CollectionTarget({self.account_id!r}, {self.region!r})"
+
+    @property
+    def partition(self) -> tuple:
+        """The output path components for this cell."""
+        return (self.account_id, self.region)
+
+
+def build_matrix(config: Dict[str, Any]) -> List[CollectionTarget]:
+    """
+    Expands an account/role/region configuration into collection targets.
+
+    The configuration lists accounts with their role and, optionally, their own regions;
+    accounts without regions use the top-level ``regions``::
+
+        {"regions": ["us-east-1", "us-west-2"],
+         "accounts": [{"account_id": "111111111111",
+                       "role_arn": "arn:aws:iam::111111111111:role/InspectorRead",
+                       "regions": ["eu-west-1"]}]}
+
+    Raises:
+        ValueError: If an account has no account_id or no regions.
+    """
+    default_regions = config.get("regions", [])
+    targets = []
+    for account in config.get("accounts", []):
+        account_id = account.get("account_id")
+        regions = account.get("regions", default_regions)
+        if not account_id or not regions:
+            raise ValueError(f"Account entry needs an account_id and at least one region: {account}")
+        for region in regions:
+            targets.append(CollectionTarget(str(account_id), region, account.get("role_arn")))
+    return targets
+
+
+def load_matrix(path: str = DEFAULT_MATRIX_PATH) -> List[CollectionTarget]:
+    """Loads and expands the collection matrix from a JSON configuration file."""
+    with open(path, "r") as f:
+        return build_matrix(json.load(f))
+
+
+def collect_target(target: CollectionTarget, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs an Inspector for one matrix cell. Executed in a worker process.
+
+    The cell gets its own region environment, assumed-role ClientPool, output partition,
+    checkpoint, run journal and inventory cache, so cells share no state.
+
+    Returns:
+        Dict[str, Any]: The cell result with its output paths.
+    """
+    from inspector import Inspector
+
+    os.environ["AWS_REGION"] = target.region
+    pool = ClientPool(role_arn=target.role_arn)
+    set_default_pool(pool)
+    partition_dir = os.path.join(*target.partition)
+    inspector = Inspector(
+        client_pool=pool,
+        partition=target.partition,
+        checkpoint_path=os.path.join("output", "checkpoints", partition_dir, "inspector.json"),
+        journal_path=os.path.join("output", "checkpoints", partition_dir, "journal.ndjson"),
+        inventory_cache_path=os.path.join("output", "cache", partition_dir, "inventory.json"),
+        ecr_cache_root=os.path.join("output", "cache", partition_dir, "ecr"),
+        **options,
+    )
+    inspector.run()
+    return {"outputPaths": dict(inspector.collector.output_paths), "metricsPath": inspector.metrics_path}
+
+
+def _run_cell(collect: Callable[[CollectionTarget, Dict[str, Any]], Dict[str, Any]],
+              target: CollectionTarget, options: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.monotonic()
+    result: Dict[str, Any] = {"accountId": target.account_id, "region": target.region, "roleArn": target.role_arn}
+    try:
+        result.update(collect(target, options))
+        result["status"] = "succeeded"
+    except Exception as e:
+        logger.exception(f"Collection failed for {target}")
+        result.update({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+    result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+class Orchestrator:
+    """
+    Collects findings across an account/role/region matrix in parallel.
+
+    Each cell runs in its own process with an assumed-role session, so a run takes about
+    as long as its slowest cell. Cell snapshots land in the regular output/ layout,
+    partitioned as output/YYYY/MM/<type>/<account>/<region>/, and a manifest of the run
+    is written to output/runs/. A failing cell is recorded and does not stop the others.
+
+    Parameters:
+        targets (List[CollectionTarget]): The matrix cells.
+        max_processes (Optional[int]): Worker processes. Default is one per cell, capped at the CPU count * 4
+            since cells spend most of their time waiting on AWS.
+        options (Optional[Dict[str, Any]]): Extra Inspector keyword arguments for every cell.
+        collect (Callable): The per-cell function; must be picklable. Default is collect_target.
+    """
+
+    def __init__(self, targets: List[CollectionTarget], max_processes: Optional[int] = None,
+                 options: Optional[Dict[str, Any]] = None,
+                 collect: Callable[[CollectionTarget, Dict[str, Any]], Dict[str, Any]] = collect_target):
+        self.targets = targets
+        self.max_processes = max_processes or max(1, min(len(targets), (os.cpu_count() or 1) * 4))
+        self.options = dict(options or {})
+        self.collect = collect
+        self.results: List[Dict[str, Any]] = []
+
+    def run(self) -> List[Dict[str, Any]]:
+        """
+        Runs every cell and returns the results in matrix order.
+        """
+        started = datetime.datetime.now()
+        logger.info(f"Collecting {len(self.targets)} account/region cells with {self.max_processes} processes")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(self.targets)
+        with ProcessPoolExecutor(max_workers=self.max_processes) as pool:
+            futures = {pool.submit(_run_cell, self.collect, target, self.options): index
+                       for index, target in enumerate(self.targets)}
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                logger.info(f"{result['accountId']}/{result['region']}: {result['status']} in {result['seconds']}s")
+        self.results = [result for result in results if result is not None]
+        self._write_manifest(started)
+        return self.results
+
+    @property
+    def failed(self) -> List[Dict[str, Any]]:
+        """The results of cells that failed."""
+        return [result for result in self.results if result["status"] != "succeeded"]
+
+    def _write_manifest(self, started: datetime.datetime) -> str:
+        path = os.path.join("output", "runs", f"{started:%Y-%m-%d_%H%M%S}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "startedAt": started.isoformat(),
+                "finishedAt": datetime.datetime.now().isoformat(),
+                "cells": self.results,
+            }, f, indent=2)
+        logger.info(f"Wrote run manifest to {path}")
+        return path
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Collect AWS Inspector findings across accounts and regions.")
+    parser.add_argument("--matrix", default=DEFAULT_MATRIX_PATH,
+                        help="JSON file listing accounts, roles and regions")
+    parser.add_argument("--processes", type=int, help="Worker processes (default: one per cell)")
+    parser.add_argument("--max-workers", type=int, default=4,
+                        help="Concurrent Inspector2 queries within each cell")
+    parser.add_argument("--requests-per-second", type=float, default=5.0,
+                        help="Initial Inspector2 request rate per cell")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Pull only findings updated since each cell's last checkpoint")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume each cell's interrupted run from its journal")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    options = {"max_workers": args.max_workers, "requests_per_second": args.requests_per_second,
+               "incremental": args.incremental, "resume": args.resume}
+    orchestrator = Orchestrator(load_matrix(args.matrix), args.processes, options)
+    orchestrator.run()
+    return 1 if orchestrator.failed else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import queue
+import logging
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Items handed between stages per queue slot; amortizes queue overhead over a page of findings
+DEFAULT_CHUNK_SIZE = 100
+# Chunks buffered between two stages before the producer blocks
+DEFAULT_QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class BoundedStream:
+    """
+    Runs an iterable in a background worker and hands its items over through a bounded queue.
+
+    The producer starts as soon as the stream is created and groups items into chunks of
+    ``chunk_size``; at most ``queue_size`` chunks are buffered, after which the producer
+    blocks until the consumer catches up (backpressure). Memory held by the stream is
+    therefore bounded by ``queue_size * chunk_size`` items, however long the source is.
+
+    Errors raised by the source are re-raised to the consumer. If the consumer stops early
+    (or fails), ``close()`` tells the producer to stop at its next chunk.
+
+    Parameters:
+        source (Iterable[T]): The items to produce.
+        queue_size (int): Chunks buffered between producer and consumer. Default is 8.
+        chunk_size (int): Items per chunk. Default is 100.
+        executor (Optional[Executor]): Runs the producer; a dedicated daemon thread is used if None.
+        name (str): Thread name, for logs.
+    """
+
+    def __init__(self, source: Iterable[T], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, executor: Optional[Executor] = None,
+                 name: str = "pipeline-stage"):
+        if queue_size < 1 or chunk_size < 1:
+            raise ValueError("queue_size and chunk_size must be at least 1")
+        self._queue: "queue.Queue[Any]" = queue.Queue(queue_size)
+        self._stopped = threading.Event()
+        self._chunk_size = chunk_size
+        self._source = source
+        if executor is None:
+            threading.Thread(target=self._produce, name=name, daemon=True).start()
+        else:
+            executor.submit(self._produce)
+
+    def _put(self, item: Any) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self) -> None:
+        try:
+            chunk: List[T] = []
+            for item in self._source:
+                chunk.append(item)
+                if len(chunk) >= self._chunk_size:
+                    if not self._put(chunk):
+                        return
+                    chunk = []
+            if chunk and not self._put(chunk):
+                return
+        except BaseException as e:
+            self._put(_Failure(e))
+        else:
+            self._put(_DONE)
+        finally:
+            close = getattr(self._source, "close", None)
+            if close is not None and self._stopped.is_set():
+                close()
+
+    def __iter__(self) -> Iterator[T]:
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is _DONE:
+                    return
+                if isinstance(chunk, _Failure):
+                    raise chunk.error
+                yield from chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stops the producer; buffered chunks are dropped."""
+        self._stopped.set()
+
+
+class Pipeline:
+    """
+    A chain of streaming stages from a source to a sink, each stage in its own thread.
+
+    Stages are connected by BoundedStreams, so fetching, transforming and writing overlap
+    while the number of findings in flight stays bounded by the queue sizes rather than
+    by the size of the account::
+
+        Pipeline(service_inspector.iter_service_findings())
+            .through(checkpoint.track)
+            .filter(lambda f: f["severity"] != "INFORMATIONAL")
+            .run(collector.add_findings)
+
+    Parameters:
+        source (Iterable[T]): The first stage, e.g. a lazily paginated findings generator.
+        queue_size (int): Chunks buffered between stages. Default is 8.
+        chunk_size (int): Items per chunk handed between stages. Default is 100.
+    """
+
+    def __init__(self, source: Iterable[T], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self._stages: List[Callable[[Iterable[Any]], Iterable[Any]]] = []
+        self._source = source
+
+    def through(self, stage: Callable[[Iterable[Any]], Iterable[Any]]) -> "Pipeline":
+        """Adds a stage that transforms the whole stream lazily (e.g. a generator function)."""
+        self._stages.append(stage)
+        return self
+
+    def map(self, fn: Callable[[Any], Any]) -> "Pipeline":
+        """Adds a stage applying fn to every item (e.g. enrichment)."""
+        return self.through(lambda items: (fn(item) for item in items))
+
+    def filter(self, predicate: Callable[[Any], bool]) -> "Pipeline":
+        """Adds a stage keeping only the items for which predicate is true."""
+        return self.through(lambda items: (item for item in items if predicate(item)))
+
+    def __iter__(self) -> Iterator[Any]:
+        streams: List[BoundedStream] = []
+        stream: Iterable[Any] = self._source
+        for index, stage in enumerate([lambda items: items] + self._stages):
+            bounded = BoundedStream(stage(stream), self.queue_size, self.chunk_size, name=f"pipeline-stage-{index}")
+            streams.append(bounded)
+            stream = bounded
+        try:
+            yield from stream
+        finally:
+            for bounded in streams:
+                bounded.close()
+
+    def run(self, sink: Callable[[Iterable[Any]], Any]) -> Any:
+        """
+        Drains the pipeline into a sink that consumes an iterable (e.g. FindingsCollector.add_findings).
+
+        Returns:
+            Any: The sink's return value.
+        """
+        return sink(iter(self))
@@ -0,0 +1,376 @@
+import os
+import sys
+import csv
+import heapq
+import logging
+import argparse
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.findings_extractor import is_open, resource_id, vulnerability_id
+from src.snapshot_io import SnapshotWriter, iter_snapshot, latest_snapshots, parse_partition, poam_path
+
+logger = logging.getLogger(__name__)
+
+# Severities from lowest to highest; a POA&M item takes the highest severity of its findings
+SEVERITY_ORDER = ("UNTRIAGED", "INFORMATIONAL", "LOW", "MEDIUM", "HIGH", "CRITICAL")
+_SEVERITY_RANK = {severity: rank for rank, severity in enumerate(SEVERITY_ORDER)}
+
+# Fix availability from least to most actionable
+_FIX_ORDER = ("NO", "PARTIAL", "YES")
+
+POAM_COLUMNS = (
+    "POA&M ID", "Weakness Name", "Weakness Description", "Weakness Detector Source", "Weakness Source Identifier",
+    "Asset Identifier", "Affected Resource Count", "Finding Count", "Original Detection Date", "Last Observed Date",
+    "Original Risk Rating", "Fix Available", "Remediation Plan", "Services",
+)
+
+DETECTOR_SOURCE = "AWS Inspector"
+
+# Excel truncates longer cells, so the asset list is cut to fit
+XLSX_CELL_LIMIT = 32_767
+
+# Vulnerabilities plus affected resources held in memory before partial groups are spilled to disk
+DEFAULT_MAX_ENTRIES = 500_000
+
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+class PoamItem:
+    """
+    One POA&M item: every open finding of one vulnerability, rolled up.
+
+    Attributes:
+        vulnerability (str): The vulnerability ID (e.g. a CVE ID), the grouping key.
+        title (Optional[str]): The first finding's title.
+        description (Optional[str]): The first finding's description.
+        remediation (Optional[str]): The first non-empty remediation text.
+        severity (Optional[str]): The highest severity of the findings.
+        fix_available (Optional[str]): The most actionable fixAvailable value ("YES", "PARTIAL", "NO").
+        first_observed (Optional[str]): The earliest firstObservedAt.
+        last_observed (Optional[str]): The latest lastObservedAt.
+        resources (Set[str]): The affected resource IDs.
+        services (Set[str]): The AWS services of the findings.
+        findings (int): The number of findings rolled up.
+    """
+
+    __slots__ = ("vulnerability", "title", "description", "remediation", "severity", "fix_available",
+                 "first_observed", "last_observed", "resources", "services", "findings")
+
+    def __init__(self, vulnerability: str):
+        self.vulnerability = vulnerability
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+        self.remediation: Optional[str] = None
+        self.severity: Optional[str] = None
+        self.fix_available: Optional[str] = None
+        self.first_observed: Optional[str] = None
+        self.last_observed: Optional[str] = None
+        self.resources: Set[str] = set()
+        self.services: Set[str] = set()
+        self.findings = 0
+
+    def __repr__(self) -> str:
+        return f"PoamItem({self.vulnerability!r}, {self.findings} findings)"
+
+    def add(self, finding: Dict[str, Any]) -> None:
+        """Rolls one extracted finding into the item."""
+        self._combine(finding.get("title"), finding.get("description"), finding.get("remediation"),
+                      finding.get("severity"), finding.get("fixAvailable"), _iso(finding.get("firstObservedAt")),
+                      _iso(finding.get("lastObservedAt")), 1)
+        resource = resource_id(finding)
+        if resource:
+            self.resources.add(resource)
+        service = finding.get("AWS Service")
+        if service:
+            self.services.add(service)
+
+    def merge(self, other: "PoamItem") -> None:
+        """Rolls a partial item of the same vulnerability into this one."""
+        self._combine(other.title, other.description, other.remediation, other.severity, other.fix_available,
+                      other.first_observed, other.last_observed, other.findings)
+        self.resources |= other.resources
+        self.services |= other.services
+
+    def _combine(self, title, description, remediation, severity, fix_available, first_observed, last_observed,
+                 findings: int) -> None:
+        self.title = self.title or title
+        self.description = self.description or description
+        self.remediation = self.remediation or remediation
+        if severity and (self.severity is None
+                         or _SEVERITY_RANK.get(severity, -1) > _SEVERITY_RANK.get(self.severity, -1)):
+            self.severity = severity
+        if fix_available in _FIX_ORDER and (self.fix_available not in _FIX_ORDER or
+                                            _FIX_ORDER.index(fix_available) > _FIX_ORDER.index(self.fix_available)):
+            self.fix_available = fix_available
+        if first_observed and (self.first_observed is None or first_observed < self.first_observed):
+            self.first_observed = first_observed
+        if last_observed and (self.last_observed is None or last_observed > self.last_observed):
+            self.last_observed = last_observed
+        self.findings += findings
+
+    def sort_key(self) -> Tuple[int, str]:
+        """Orders items by descending severity, then vulnerability ID."""
+        return -_SEVERITY_RANK.get(self.severity, -1), self.vulnerability
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the JSON-compatible partial aggregate, as spilled to disk."""
+        return {"vulnerability": self.vulnerability, "title": self.title, "description": self.description,
+                "remediation": self.remediation, "severity": self.severity, "fixAvailable": self.fix_available,
+                "firstObservedAt": self.first_observed, "lastObservedAt": self.last_observed,
+                "resources": sorted(self.resources), "services": sorted(self.services), "findings": self.findings}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PoamItem":
+        item = cls(data["vulnerability"])
+        item._combine(data["title"], data["description"], data["remediation"], data["severity"],
+                      data["fixAvailable"], data["firstObservedAt"], data["lastObservedAt"], data["findings"])
+        item.resources = set(data["resources"])
+        item.services = set(data["services"])
+        return item
+
+    def row(self) -> Dict[str, Any]:
+        """Returns the item's POA&M row, keyed by POAM_COLUMNS."""
+        return {
+            "POA&M ID": f"INSP-{self.vulnerability}",
+            "Weakness Name": self.title,
+            "Weakness Description": self.description,
+            "Weakness Detector Source": DETECTOR_SOURCE,
+            "Weakness Source Identifier": self.vulnerability,
+            "Asset Identifier": _asset_cell(sorted(self.resources)),
+            "Affected Resource Count": len(self.resources),
+            "Finding Count": self.findings,
+            "Original Detection Date": self.first_observed,
+            "Last Observed Date": self.last_observed,
+            "Original Risk Rating": self.severity,
+            "Fix Available": self.fix_available,
+            "Remediation Plan": self.remediation,
+            "Services": ", ".join(sorted(self.services)),
+        }
+
+
+def _asset_cell(resources: List[str]) -> str:
+    cell = "\n".join(resources)
+    if len(cell) <= XLSX_CELL_LIMIT:
+        return cell
+    kept: List[str] = []
+    length = 0
+    for resource in resources:
+        length += len(resource) + 1
+        if length > XLSX_CELL_LIMIT - 40:
+            break
+        kept.append(resource)
+    return "\n".join(kept) + f"\n... and {len(resources) - len(kept)} more"
+
+
+class PoamAggregator:
+    """
+    Groups findings into POA&M items by vulnerability in one streaming pass.
+
+    Findings are hash-aggregated in memory. Once the items hold more than ``max_entries``
+    vulnerabilities plus affected resources, the partial items are spilled to a temporary
+    run file sorted by vulnerability ID and memory is released. At the end the runs are
+    merged by vulnerability ID, combining the partial items of one vulnerability as they
+    meet, and the combined items are put in POA&M order by an external sort with runs of
+    ``max_entries``. Memory thus stays bounded by ``max_entries`` plus one item per run
+    however many findings and vulnerabilities are read; only a single vulnerability's
+    resources are never split. Findings that are not open (findings_extractor.is_open:
+    suppressed or closed) are skipped unless ``include_closed`` is set.
+
+    The aggregator can be fed directly (``add_many``) or as a pass-through stage of a
+    Pipeline (``track``), e.g. while a run streams its snapshot.
+
+    Parameters:
+        max_entries (int): Vulnerabilities plus resources held before spilling. Default is 500,000.
+        include_closed (bool): Also roll up suppressed and closed findings. Default is False.
+        temp_dir (Optional[str]): Where runs are spilled. Default is the system temp directory.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, include_closed: bool = False,
+                 temp_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.include_closed = include_closed
+        self.temp_dir = temp_dir
+        self.findings = 0
+        self._items: Dict[str, PoamItem] = {}
+        self._entries = 0
+        self._scratch: Optional[tempfile.TemporaryDirectory] = None
+        self._runs: List[str] = []
+
+    def add(self, finding: Dict[str, Any]) -> None:
+        """Rolls one extracted finding into its vulnerability's item."""
+        if not self.include_closed and not is_open(finding):
+            return
+        key = vulnerability_id(finding) or finding.get("findingArn") or "UNKNOWN"
+        item = self._items.get(key)
+        if item is None:
+            item = self._items[key] = PoamItem(key)
+            self._entries += 1
+        resources = len(item.resources)
+        item.add(finding)
+        self._entries += len(item.resources) - resources
+        self.findings += 1
+        if self._entries > self.max_entries:
+            self._spill()
+
+    def add_many(self, findings: Iterable[Dict[str, Any]]) -> None:
+        """Rolls findings from any iterable into their items, consuming it lazily."""
+        for finding in findings:
+            self.add(finding)
+
+    def track(self, findings: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pipeline stage: aggregates findings while passing them through unchanged."""
+        for finding in findings:
+            self.add(finding)
+            yield finding
+
+    def _spill(self) -> None:
+        if self._scratch is None:
+            self._scratch = tempfile.TemporaryDirectory(prefix="poam-", dir=self.temp_dir)
+        logger.debug(f"Spilling {len(self._items)} partial POA&M items ({self._entries} entries)")
+        self._runs.append(_write_run(self._scratch.name, len(self._runs),
+                                     (self._items[key] for key in sorted(self._items))))
+        self._items = {}
+        self._entries = 0
+
+    def items(self) -> Iterator[PoamItem]:
+        """
+        Yields the POA&M items by descending severity, then vulnerability ID, and resets the
+        aggregator.
+        """
+        if self._scratch is None:
+            items = sorted(self._items.values(), key=PoamItem.sort_key)
+            self._items, self._entries = {}, 0
+            yield from items
+            return
+        self._spill()
+        scratch, self._scratch = self._scratch, None
+        partial_runs, self._runs = self._runs, []
+        with scratch:
+            sorted_runs: List[str] = []
+            batch: List[PoamItem] = []
+            entries = 0
+            for item in _combine_runs(partial_runs):
+                batch.append(item)
+                entries += 1 + len(item.resources)
+                if entries > self.max_entries:
+                    batch.sort(key=PoamItem.sort_key)
+                    sorted_runs.append(_write_run(scratch.name, len(partial_runs) + len(sorted_runs), batch))
+                    batch, entries = [], 0
+            for path in partial_runs:
+                os.remove(path)
+            batch.sort(key=PoamItem.sort_key)
+            if not sorted_runs:
+                yield from batch
+                return
+            if batch:
+                sorted_runs.append(_write_run(scratch.name, len(partial_runs) + len(sorted_runs), batch))
+                batch = []
+            yield from _merge_runs(sorted_runs, PoamItem.sort_key)
+
+
+def _write_run(directory: str, number: int, items: Iterable[PoamItem]) -> str:
+    path = os.path.join(directory, f"run-{number:05d}.ndjson")
+    with SnapshotWriter(path) as writer:
+        writer.write_many(item.to_dict() for item in items)
+    return path
+
+
+def _merge_runs(paths: Iterable[str], key) -> Iterator[PoamItem]:
+    streams = ((PoamItem.from_dict(data) for data in iter_snapshot(path)) for path in paths)
+    return heapq.merge(*streams, key=key)
+
+
+def _combine_runs(paths: Iterable[str]) -> Iterator[PoamItem]:
+    # The runs are sorted by vulnerability ID, so the partial items of a vulnerability meet in the merge
+    item = None
+    for partial in _merge_runs(paths, lambda partial: partial.vulnerability):
+        if item is not None and item.vulnerability == partial.vulnerability:
+            item.merge(partial)
+            continue
+        if item is not None:
+            yield item
+        item = partial
+    if item is not None:
+        yield item
+
+
+def _cell(value: Any) -> Any:
+    # Keeps spreadsheet applications from evaluating text cells as formulas
+    if isinstance(value, str) and value.startswith(("=", "+", "-", "@")):
+        return f"'{value}"
+    return "" if value is None else value
+
+
+def write_poam(items: Iterable[PoamItem], output_path: str) -> int:
+    """
+    Writes POA&M items as CSV rows, one item at a time, and returns the number of rows.
+
+    The file is UTF-8 with a byte order mark so spreadsheet applications detect the
+    encoding; it is written to a temp file and atomically renamed into place.
+
+    Args:
+        items (Iterable[PoamItem]): The items, e.g. PoamAggregator.items().
+        output_path (str): The CSV path.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    temp_path = f"{output_path}.tmp"
+    rows = 0
+    with open(temp_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=POAM_COLUMNS)
+        writer.writeheader()
+        for item in items:
+            writer.writerow({column: _cell(value) for column, value in item.row().items()})
+            rows += 1
+    os.replace(temp_path, output_path)
+    logger.info(f"Wrote {rows} POA&M items to {output_path}")
+    return rows
+
+
+def export_poam(findings: Iterable[Dict[str, Any]], output_path: str,
+                max_entries: int = DEFAULT_MAX_ENTRIES, include_closed: bool = False) -> int:
+    """
+    Rolls findings up by vulnerability and writes the POA&M CSV; returns the number of rows.
+
+    Args:
+        findings (Iterable[Dict[str, Any]]): Extracted findings, e.g. extract_findings(...) or
+            iter_snapshot(path).
+        output_path (str): The CSV path.
+        max_entries (int): Vulnerabilities plus resources held in memory. Default is 500,000.
+        include_closed (bool): Also roll up suppressed and closed findings. Default is False.
+    """
+    aggregator = PoamAggregator(max_entries=max_entries, include_closed=include_closed)
+    aggregator.add_many(findings)
+    return write_poam(aggregator.items(), output_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export a findings snapshot as a POA&M CSV, one row per vulnerability.")
+    parser.add_argument("snapshot", nargs="?", help="Snapshot path (default: the most recent inspector snapshot)")
+    parser.add_argument("--root", default="output", help="Snapshot root directory")
+    parser.add_argument("--partition", type=parse_partition,
+                        help="Partition of a matrix run, as ACCOUNT/REGION (default: the only one)")
+    parser.add_argument("--output", help="CSV path (default: next to the snapshot, as <snapshot>.poam.csv)")
+    parser.add_argument("--include-closed", action="store_true", help="Also roll up suppressed and closed findings")
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Vulnerabilities plus resources held in memory before spilling to disk")
+    args = parser.parse_args(argv)
+
+    snapshot = args.snapshot
+    if snapshot is None:
+        try:
+            snapshot = latest_snapshots(args.root, "inspector", partition=args.partition)[-1]
+        except ValueError as e:
+            parser.error(str(e))
+    output_path = args.output or poam_path(snapshot)
+    logger.info(f"Exporting POA&M for {snapshot}")
+    return export_poam(iter_snapshot(snapshot), output_path, args.max_entries, args.include_closed)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
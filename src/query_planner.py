@@ -0,0 +1,168 @@
+import math
+import logging
+from typing import List, Dict, Any, Optional, Sequence, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Query strategies, from cheapest for tiny inventories to cheapest for large ones
+PER_RESOURCE = "per_resource"
+BATCHED_ARNS = "batched_arns"
+RESOURCE_TYPE_SCAN = "resource_type_scan"
+# The findings of a whole resource type updated since a checkpoint, whatever the inventory
+DELTA_SCAN = "delta_scan"
+
+
+class QueryPlan:
+    """
+    The set of Inspector2 list_findings queries chosen for one resource type.
+
+    Attributes:
+        service (str): The AWS service label used for extraction (e.g. "EC2").
+        resource_type (str): The Inspector2 resource type filter value (e.g. "Ec2Instance").
+        strategy (str): One of PER_RESOURCE, BATCHED_ARNS, RESOURCE_TYPE_SCAN or DELTA_SCAN.
+        batches (List[List[str]]): The ARN groups to query. A RESOURCE_TYPE_SCAN or DELTA_SCAN
+            plan has a single empty batch, meaning "no ARN filter".
+        resource_arns (List[str]): The full inventory the plan covers.
+        estimated_calls (int): The estimated number of list_findings calls.
+    """
+
+    def __init__(self, service: str, resource_type: str, strategy: str, batches: List[List[str]],
+                 resource_arns: List[str], estimated_calls: int):
+        self.service = service
+        self.resource_type = resource_type
+        self.strategy = strategy
+        self.batches = batches
+        self.resource_arns = resource_arns
+        self.estimated_calls = estimated_calls
+        self._lookup: Optional[Dict[str, str]] = None
+
+    def describe(self) -> str:
+        """Returns a one-line, human readable summary of the plan."""
+        return (f"{self.service}: {self.strategy} for {len(self.resource_arns)} resources "
+                f"(~{self.estimated_calls} list_findings calls)")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the plan as a JSON-compatible summary."""
+        return {
+            "service": self.service,
+            "resourceType": self.resource_type,
+            "strategy": self.strategy,
+            "resources": len(self.resource_arns),
+            "queries": len(self.batches),
+            "estimatedCalls": self.estimated_calls,
+        }
+
+    def match_resource(self, finding: Dict[str, Any]) -> Optional[str]:
+        """
+        Returns the inventory ARN a finding belongs to, or None if it is outside the inventory.
+
+        Used to split RESOURCE_TYPE_SCAN results on the client side. Findings are matched on
+        their resource ids, which may be either the full ARN or its trailing resource id
+        (e.g. "i-0abc..." for "arn:aws:ec2:...:instance/i-0abc...").
+        """
+        if self._lookup is None:
+            lookup = {}
+            for arn in self.resource_arns:
+                lookup[arn] = arn
+                lookup.setdefault(arn.rsplit("/", 1)[-1], arn)
+            self._lookup = lookup
+        for resource in finding.get("resources") or []:
+            arn = self._lookup.get(resource.get("id"))
+            if arn is not None:
+                return arn
+        return None
+
+
+class QueryPlanner:
+    """
+    Chooses how to query Inspector2 findings for an inventory of resources.
+
+    Sending one list_findings query per resource makes N+1 calls. The planner instead packs
+    up to ``batch_size`` ARNs into a single multi-value resourceArn filter, and once the
+    inventory is large enough runs one resourceType-wide scan whose results are split by
+    ARN on the client side.
+
+    Parameters:
+        batch_size (int): Maximum number of ARN values per filter. Inspector2 string
+            filters accept at most 10 values. Default is 10.
+        scan_threshold (int): Inventory size above which a resourceType-wide scan is used
+            when the number of findings for the type is unknown. Default is 100.
+        page_size (int): The maxResults used per list_findings page. Default is 100.
+    """
+
+    def __init__(self, batch_size: int = 10, scan_threshold: int = 100, page_size: int = 100):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.batch_size = batch_size
+        self.scan_threshold = scan_threshold
+        self.page_size = page_size
+
+    def plan(self, service: str, resource_type: str, resource_arns: Sequence[str],
+             type_finding_count: Optional[int] = None) -> QueryPlan:
+        """
+        Builds the query plan for one resource type.
+
+        Args:
+            service (str): The AWS service label used for extraction.
+            resource_type (str): The Inspector2 resource type filter value.
+            resource_arns (Sequence[str]): The enumerated inventory.
+            type_finding_count (Optional[int]): Total findings for the resource type, if known
+                (e.g. from a finding aggregation). Lets the planner compare the real cost of a
+                scan against batching instead of relying on scan_threshold.
+
+        Returns:
+            QueryPlan: The chosen plan.
+        """
+        arns = list(dict.fromkeys(resource_arns))
+        count = len(arns)
+        batch_calls = math.ceil(count / self.batch_size)
+
+        if count == 0:
+            strategy, batches, calls = PER_RESOURCE, [], 0
+        elif type_finding_count is not None:
+            scan_calls = max(1, math.ceil(type_finding_count / self.page_size))
+            if scan_calls < batch_calls:
+                strategy, batches, calls = RESOURCE_TYPE_SCAN, [[]], scan_calls
+            else:
+                strategy, batches, calls = self._batched(arns, batch_calls)
+        elif count > self.scan_threshold:
+            strategy, batches, calls = RESOURCE_TYPE_SCAN, [[]], 1
+        else:
+            strategy, batches, calls = self._batched(arns, batch_calls)
+
+        plan = QueryPlan(service, resource_type, strategy, batches, arns, calls)
+        logger.info(f"Query plan {plan.describe()}")
+        return plan
+
+    def plan_delta(self, service: str, resource_type: str) -> QueryPlan:
+        """
+        Builds the plan of an incremental run for one resource type: a single resourceType-wide
+        scan that is not split by inventory, so that it also returns the findings of resources
+        deleted since the checkpoint.
+        """
+        plan = QueryPlan(service, resource_type, DELTA_SCAN, [[]], [], 1)
+        logger.info(f"Query plan {plan.describe()}")
+        return plan
+
+    def _batched(self, arns: List[str], batch_calls: int):
+        if len(arns) == 1:
+            return PER_RESOURCE, [arns], 1
+        batches = [arns[i:i + self.batch_size] for i in range(0, len(arns), self.batch_size)]
+        return BATCHED_ARNS, batches, batch_calls
+
+
+def summarize_plans(plans: Iterable[QueryPlan]) -> Dict[str, Any]:
+    """
+    Summarizes a run's query plans for reporting.
+
+    Args:
+        plans (Iterable[QueryPlan]): The plans executed during a run.
+
+    Returns:
+        Dict[str, Any]: Per-service plan summaries plus the total estimated call count.
+    """
+    summaries = [plan.to_dict() for plan in plans]
+    return {
+        "plans": summaries,
+        "estimatedCalls": sum(summary["estimatedCalls"] for summary in summaries),
+    }
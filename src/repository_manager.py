@@ -5,7 +5,8 @@ import sys
 import logging
 import boto3
 from botocore.exceptions import ClientError
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Dict, Iterable, Set
+from utils.client_pool import ClientPool, get_default_pool
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -50,38 +51,83 @@ def validate_repository(ecr_client: boto3.client, account_id: str, repo_name: st
         logger.error(f"Error validating repository {repo_name}: {e}")
         return False
 
-def get_latest_digest(repo_arn: str) -> Optional[str]:
+def list_repository_names(ecr_client: boto3.client, account_id: str) -> Set[str]:
+    """
+    List every repository in a registry with paginated describe_repositories calls.
+
+    One call returns up to 1000 repositories, so validating many repositories this way
+    costs a handful of calls instead of one per repository.
+    """
+    names: Set[str] = set()
+    paginator = ecr_client.get_paginator('describe_repositories')
+    for page in paginator.paginate(registryId=account_id):
+        names.update(repo['repositoryName'] for repo in page.get('repositories', []))
+    return names
+
+def latest_image_digest(ecr_client: boto3.client, account_id: str, repo_name: str) -> Optional[str]:
+    """Return the digest of the most recently pushed tagged image in a repository."""
+    latest = None
+    paginator = ecr_client.get_paginator('describe_images')
+    for page in paginator.paginate(registryId=account_id, repositoryName=repo_name,
+                                   filter={'tagStatus': 'TAGGED'}):
+        for image in page.get('imageDetails', []):
+            if latest is None or image.get('imagePushedAt') > latest.get('imagePushedAt'):
+                latest = image
+    if latest is None:
+        logger.info(f"No tagged images found in {repo_name}")
+        return None
+    return latest.get('imageDigest')
+
+def get_latest_digests(repo_arns: Iterable[str], client_pool: Optional[ClientPool] = None) -> Dict[str, Optional[str]]:
+    """
+    Get the latest image digest for many ECR repositories.
+
+    Repositories are validated in bulk per registry, and one shared ECR client per region
+    is used for every call.
+
+    Args:
+        repo_arns (Iterable[str]): Repository ARNs.
+        client_pool (Optional[ClientPool]): Pool providing the ECR clients. Default is the process-wide pool.
+    Returns:
+        Dict[str, Optional[str]]: The latest digest per repository ARN; None for repositories that
+            do not exist, have no tagged images, or could not be read.
+    """
+    pool = client_pool or get_default_pool()
+    digests: Dict[str, Optional[str]] = {}
+    registries: Dict[Tuple[str, Optional[str]], List[Tuple[str, str]]] = {}
+    for repo_arn in repo_arns:
+        digests[repo_arn] = None
+        try:
+            account_id, repo_name = parse_repository_arn(repo_arn)
+        except ValueError:
+            continue
+        region = repo_arn.split(':')[3] or None
+        registries.setdefault((account_id, region), []).append((repo_arn, repo_name))
+
+    for (account_id, region), repos in registries.items():
+        ecr_client = pool.client('ecr', region)
+        try:
+            existing = list_repository_names(ecr_client, account_id)
+        except Exception as e:
+            logger.error(f"Error listing repositories in registry {account_id}: {e}")
+            continue
+        for repo_arn, repo_name in repos:
+            if repo_name not in existing:
+                logger.warning(f"Repository {repo_name} not found in account {account_id}")
+                continue
+            try:
+                digests[repo_arn] = latest_image_digest(ecr_client, account_id, repo_name)
+            except Exception as e:
+                logger.error(f"Error getting latest digest for {repo_name}: {e}")
+    return digests
+
+def get_latest_digest(repo_arn: str, client_pool: Optional[ClientPool] = None) -> Optional[str]:
     """
     Get the latest image digest for a given ECR repository.
     Args:
         repo_arn (str): The Amazon Resource Name (ARN) of the ECR repository.
+        client_pool (Optional[ClientPool]): Pool providing the shared ECR client. Default is the process-wide pool.
     Returns:
         Optional[str]: The latest image digest if found, otherwise None.
-    Raises:
-        Exception: If there is an error in retrieving the image digest.
     """
-    try:
-        account_id, repo_name = parse_repository_arn(repo_arn)
-        ecr_client = boto3.client('ecr')
-        
-        if not validate_repository(ecr_client, account_id, repo_name):
-            return None
-            
-        response = ecr_client.describe_images(
-            registryId=account_id,
-            repositoryName=repo_name,
-            filter={'tagStatus': 'TAGGED'},
-            maxResults=1,
-            orderBy='TIMESTAMP',
-            sort='DESC'
-        )
-        
-        if not response.get('imageDetails'):
-            logger.info(f"No tagged images found in {repo_name}")
-            return None
-            
-        return response['imageDetails'][0].get('imageDigest')
-        
-    except Exception as e:
-        logger.error(f"Error getting latest digest for {repo_name}: {e}")
-        return None
+    return get_latest_digests([repo_arn], client_pool).get(repo_arn)
@@ -0,0 +1,267 @@
+import os
+import sys
+import math
+import logging
+import argparse
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.snapshot_io import iter_snapshot, latest_snapshots, parse_partition
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Base score assumed for findings without a CVSS or Inspector score, by severity
+SEVERITY_SCORES = {"CRITICAL": 9.5, "HIGH": 8.0, "MEDIUM": 5.5, "LOW": 2.5, "INFORMATIONAL": 0.0, "UNTRIAGED": 5.0}
+_SEVERITY_CODES = {severity: code for code, severity in enumerate(SEVERITY_SCORES, start=1)}
+# Code 0: no or unknown severity
+DEFAULT_BASE_SCORE = 5.0
+
+FIX_VALUES = {"YES": 1.0, "PARTIAL": 0.5, "NO": 0.0}
+
+_EMPTY: Dict[str, Any] = {}
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("risk scoring requires numpy (pip install -r requirements.txt)")
+
+
+def _adjusted_cvss(finding: Any) -> float:
+    details = finding.get("inspectorScoreDetails")
+    if details.__class__ is dict:
+        adjusted = details.get("adjustedCvss")
+        if adjusted.__class__ is dict:
+            score = adjusted.get("score")
+            if isinstance(score, (int, float)):
+                return float(score)
+    return math.nan
+
+
+def _cvss3_score(finding: Any) -> float:
+    cvss3 = finding.get("cvss3")
+    if cvss3.__class__ is dict:
+        cvss3 = cvss3.get("baseScore")
+    if isinstance(cvss3, (int, float)):
+        return float(cvss3)
+    return math.nan
+
+
+def _epss(finding: Any) -> float:
+    epss = finding.get("epss")
+    return float(epss) if isinstance(epss, (int, float)) else math.nan
+
+
+class RiskColumns:
+    """
+    The risk inputs of a batch of findings, packed into columnar NumPy arrays.
+
+    Attributes:
+        base (np.ndarray): float64 CVSS-scale base scores (adjusted CVSS, else CVSS v3), NaN when missing.
+        epss (np.ndarray): float64 EPSS probabilities, NaN when missing.
+        fix (np.ndarray): float64 fix availability: 1 for YES, 0.5 for PARTIAL, 0 otherwise.
+        reachable (np.ndarray): bool, whether the finding has network reachability details.
+        severity (np.ndarray): int8 severity codes (index into SEVERITY_SCORES, starting at 1; 0 if unknown).
+    """
+
+    __slots__ = ("base", "epss", "fix", "reachable", "severity")
+
+    def __init__(self, base, epss, fix, reachable, severity):
+        self.base = base
+        self.epss = epss
+        self.fix = fix
+        self.reachable = reachable
+        self.severity = severity
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    @classmethod
+    def from_findings(cls, findings: Sequence[Any]) -> "RiskColumns":
+        """
+        Packs extracted findings (dicts or FindingRecords) into columns, one field at a time.
+
+        The base score is Inspector's environment-adjusted CVSS, else the CVSS v3 base score.
+        Numeric columns are first gathered with plain comprehensions, leaving NumPy to turn
+        missing values into NaN; only a batch containing unexpected shapes is checked finding
+        by finding.
+
+        Raises:
+            RuntimeError: If numpy is not installed.
+        """
+        _require_numpy()
+        count = len(findings)
+        try:
+            base = np.array([((f.get("inspectorScoreDetails") or _EMPTY).get("adjustedCvss") or _EMPTY).get("score")
+                             for f in findings], dtype=np.float64)
+        except (AttributeError, TypeError, ValueError):
+            base = np.fromiter(map(_adjusted_cvss, findings), np.float64, count)
+        missing = np.flatnonzero(np.isnan(base))
+        if len(missing):
+            base[missing] = [_cvss3_score(findings[index]) for index in missing]
+        try:
+            epss = np.array([f.get("epss") for f in findings], dtype=np.float64)
+        except (TypeError, ValueError):
+            epss = np.fromiter(map(_epss, findings), np.float64, count)
+        fix_values, severity_codes = FIX_VALUES.get, _SEVERITY_CODES.get
+        return cls(
+            base=base,
+            epss=epss,
+            fix=np.fromiter((fix_values(f.get("fixAvailable"), 0.0) for f in findings), np.float64, count),
+            reachable=np.fromiter((f.get("networkReachabilityDetails") is not None for f in findings),
+                                  np.bool_, count),
+            severity=np.fromiter((severity_codes(f.get("severity"), 0) for f in findings), np.int8, count),
+        )
+
+
+class RiskModel:
+    """
+    A configurable composite risk score, computed for a whole batch at once.
+
+    The score is the weighted mean of four components, scaled to 0-100: the base score
+    (Inspector's adjusted CVSS, else the CVSS v3 base score, else a score implied by the
+    severity) divided by 10, the EPSS exploit probability, fix availability and network
+    reachability. Missing EPSS values count as ``missing_epss``.
+
+    Parameters:
+        cvss (float): Weight of the base score. Default is 0.5.
+        epss (float): Weight of the EPSS probability. Default is 0.3.
+        fix_available (float): Weight of fix availability (an available fix is actionable). Default is 0.1.
+        network_reachable (float): Weight of network reachability. Default is 0.1.
+        missing_epss (float): EPSS probability assumed when a finding has none. Default is 0.
+    """
+
+    def __init__(self, cvss: float = 0.5, epss: float = 0.3, fix_available: float = 0.1,
+                 network_reachable: float = 0.1, missing_epss: float = 0.0):
+        weights = (cvss, epss, fix_available, network_reachable)
+        if min(weights) < 0 or not sum(weights):
+            raise ValueError("Risk weights must be non-negative and not all zero")
+        self.cvss = cvss
+        self.epss = epss
+        self.fix_available = fix_available
+        self.network_reachable = network_reachable
+        self.missing_epss = missing_epss
+
+    def score(self, columns: RiskColumns) -> "np.ndarray":
+        """Returns the float64 risk scores of packed findings, in the findings' order."""
+        _require_numpy()
+        severity_scores = np.array([DEFAULT_BASE_SCORE] + list(SEVERITY_SCORES.values()))
+        base = np.where(np.isnan(columns.base), severity_scores[columns.severity], columns.base)
+        epss = np.where(np.isnan(columns.epss), self.missing_epss, columns.epss)
+        total = self.cvss + self.epss + self.fix_available + self.network_reachable
+        scores = base * (self.cvss / 10)
+        scores += epss * self.epss
+        scores += columns.fix * self.fix_available
+        scores += columns.reachable * self.network_reachable
+        scores *= 100 / total
+        return scores
+
+
+def rank(scores: "np.ndarray", top_k: Optional[int] = None) -> "np.ndarray":
+    """
+    Returns the indexes of the highest scores, highest first; equal scores keep input order.
+
+    With ``top_k``, only the top K are selected (in linear time with np.partition) and
+    sorted, so the result equals the first K of the full ranking.
+
+    Args:
+        scores (np.ndarray): The scores, e.g. RiskModel.score(columns).
+        top_k (Optional[int]): Return only the K best. Default is None, a full ranking.
+    """
+    _require_numpy()
+    if top_k is None or top_k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    threshold = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+    above = np.flatnonzero(scores > threshold)
+    # Scores tied at the threshold are taken in input order
+    tied = np.flatnonzero(scores == threshold)[:top_k - len(above)]
+    candidates = np.concatenate((above, tied))
+    candidates.sort()
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class RankedFindings(Sequence):
+    """
+    Findings in risk order, as returned by rank_findings: a sequence of (score, finding) pairs.
+
+    The ranking is held as arrays and a pair is only built when it is accessed, so ranking a
+    large batch does not allocate a tuple per finding.
+
+    Attributes:
+        findings (Sequence[Any]): The scored findings, in input order.
+        scores (np.ndarray): The float64 scores of every finding, in input order.
+        indexes (np.ndarray): Indexes into findings, riskiest first.
+    """
+
+    __slots__ = ("findings", "scores", "indexes")
+
+    def __init__(self, findings: Sequence[Any], scores: "np.ndarray", indexes: "np.ndarray"):
+        self.findings = findings
+        self.scores = scores
+        self.indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[n] for n in range(*position.indices(len(self)))]
+        index = self.indexes[position]
+        return float(self.scores[index]), self.findings[index]
+
+    def __iter__(self) -> Iterator[Tuple[float, Any]]:
+        for index in self.indexes:
+            yield float(self.scores[index]), self.findings[index]
+
+
+def rank_findings(findings: Sequence[Any], top_k: Optional[int] = None,
+                  model: Optional[RiskModel] = None) -> RankedFindings:
+    """
+    Scores a batch of extracted findings and returns their (score, finding) pairs, riskiest first.
+
+    Args:
+        findings (Sequence[Any]): Extracted findings (dicts or FindingRecords).
+        top_k (Optional[int]): Return only the K riskiest findings. Default is None, all of them.
+        model (Optional[RiskModel]): The scoring weights. Default is RiskModel().
+
+    Raises:
+        RuntimeError: If numpy is not installed.
+    """
+    scores = (model or RiskModel()).score(RiskColumns.from_findings(findings))
+    return RankedFindings(findings, scores, rank(scores, top_k))
+
+
+def main(argv: Optional[List[str]] = None) -> RankedFindings:
+    parser = argparse.ArgumentParser(description="Rank the findings of a snapshot by composite risk score.")
+    parser.add_argument("snapshot", nargs="?", help="Snapshot path (default: the most recent inspector snapshot)")
+    parser.add_argument("--root", default="output", help="Snapshot root directory")
+    parser.add_argument("--partition", type=parse_partition,
+                        help="Partition of a matrix run, as ACCOUNT/REGION (default: the only one)")
+    parser.add_argument("--top", type=int, default=20, help="Number of findings to print (0 for all)")
+    for weight, default in (("cvss", 0.5), ("epss", 0.3), ("fix-available", 0.1), ("network-reachable", 0.1)):
+        parser.add_argument(f"--{weight}-weight", type=float, default=default, help=f"Weight of {weight}")
+    args = parser.parse_args(argv)
+
+    snapshot = args.snapshot
+    if snapshot is None:
+        try:
+            snapshot = latest_snapshots(args.root, "inspector", partition=args.partition)[-1]
+        except ValueError as e:
+            parser.error(str(e))
+    model = RiskModel(args.cvss_weight, args.epss_weight, args.fix_available_weight, args.network_reachable_weight)
+    ranked = rank_findings(list(iter_snapshot(snapshot)), args.top or None, model)
+    for score, finding in ranked:
+        print(f"{score:6.2f}\t{finding.get('severity')}\t{finding.get('findingArn')}\t{finding.get('title')}")
+    return ranked
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,148 @@
+import os
+import logging
+import datetime
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Set
+
+from src import json_codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = "output/checkpoints/journal.ndjson"
+
+
+class JournalUnit:
+    """
+    One unit of work being journaled: a query for a set of resources of one resource type.
+
+    Findings are appended as they are produced; the unit only counts as completed once
+    ``commit`` is called, so a unit interrupted by a crash or an error is redone on resume.
+    """
+
+    def __init__(self, journal: "RunJournal", unit_id: str, resource_type: str):
+        self.journal = journal
+        self.unit_id = unit_id
+        self.resource_type = resource_type
+
+    def write(self, finding: Dict[str, Any]) -> None:
+        """Appends one extracted finding of the unit."""
+        self.journal._append({"unit": self.unit_id, "finding": finding})
+
+    def commit(self, resources: Iterable[str]) -> None:
+        """Marks the unit as completed for the given resource ARNs and flushes the journal."""
+        self.journal._append({"unit": self.unit_id, "resourceType": self.resource_type, "resources": list(resources)},
+                             flush=True)
+
+
+class RunJournal:
+    """
+    A crash-safe, append-only NDJSON journal of the units of work a collection run completed.
+
+    Each unit's extracted findings are appended as they are produced, followed by a commit
+    record naming the unit's resource type and resource ARNs. The journal is flushed at
+    every commit, so when the process dies, every committed unit survives and any
+    uncommitted findings are ignored. A resumed run skips the committed resources and
+    replays their findings from the journal instead of querying them again.
+
+    Each attempt starts with a header recording the extraction projection; a journal written
+    with a different projection is not resumed, since its findings have a different shape.
+
+    Parameters:
+        path (str): The journal file. Default is "output/checkpoints/journal.ndjson".
+        resume (bool): Continue an existing journal instead of starting a new one. Default is False.
+        projection (Optional[Sequence[str]]): The run's extraction projection.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, resume: bool = False,
+                 projection: Optional[Sequence[str]] = None):
+        self.path = path
+        self.projection = list(projection) if projection is not None else None
+        self._completed: Dict[str, Set[str]] = {}
+        self._completed_units: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._next_unit = 0
+        attempt = 1
+        if resume and os.path.exists(path):
+            attempt = self._load()
+        elif os.path.exists(path):
+            logger.warning(f"Starting a new run journal; the previous one at {path} is discarded")
+        if attempt == 1:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "wb")
+        else:
+            self._file = open(path, "ab")
+        self.attempt = attempt
+        self._append({"attempt": attempt, "startedAt": datetime.datetime.now().isoformat(timespec="seconds"),
+                      "projection": self.projection}, flush=True)
+
+    def _load(self) -> int:
+        """Reads the committed units of an existing journal and returns the next attempt number."""
+        attempts = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json_codec.loads(line)
+                except ValueError:
+                    # A line torn by a crash; the unit it belonged to is not committed
+                    continue
+                if "attempt" in record:
+                    attempts = record["attempt"]
+                    if record.get("projection") != self.projection:
+                        logger.warning(f"Run journal {self.path} was written with another projection; "
+                                       f"starting over")
+                        self._completed, self._completed_units = {}, {}
+                        return 1
+                elif "resources" in record:
+                    self._completed_units[record["unit"]] = record["resourceType"]
+                    self._completed.setdefault(record["resourceType"], set()).update(record["resources"])
+        logger.info(f"Resuming from {self.path}: {len(self._completed_units)} completed units, "
+                    + ", ".join(f"{len(arns)} {resource_type}" for resource_type, arns in self._completed.items()))
+        return attempts + 1
+
+    def _append(self, record: Dict[str, Any], flush: bool = False) -> None:
+        line = json_codec.dumps(record) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            if flush:
+                self._file.flush()
+
+    def begin(self, resource_type: str) -> JournalUnit:
+        """Starts a new unit of work for a resource type."""
+        with self._lock:
+            self._next_unit += 1
+            unit_id = f"{self.attempt}.{self._next_unit}"
+        return JournalUnit(self, unit_id, resource_type)
+
+    def completed(self, resource_type: str) -> Set[str]:
+        """Returns the resource ARNs of a resource type completed by the attempts being resumed."""
+        return self._completed.get(resource_type, set())
+
+    def replay(self, resource_type: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the journaled findings of every unit of a resource type committed by the
+        attempts being resumed, in the order they were recorded. The journal is read
+        sequentially, not loaded whole.
+        """
+        units = {unit for unit, unit_type in self._completed_units.items() if unit_type == resource_type}
+        if not units:
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json_codec.loads(line)
+                except ValueError:
+                    continue
+                if "finding" in record and record["unit"] in units:
+                    yield record["finding"]
+
+    def close(self) -> None:
+        """Closes the journal, keeping it for a later resume."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def discard(self) -> None:
+        """Closes and deletes the journal once its run has been saved."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
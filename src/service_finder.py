@@ -5,11 +5,46 @@ import sys
 import logging
 import boto3
 from botocore.exceptions import ClientError
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable
+
+from src.snapshot_io import write_document
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+def build_filter_criteria(service_type: str, resource_arns: Optional[Iterable[str]] = None,
+                          updated_since: Optional[str] = None, finding_status: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Builds the Inspector2 filterCriteria for a resource type and optional resource ARNs.
+
+    Args:
+        service_type (str): The type of AWS service to filter findings for.
+        resource_arns (Optional[Iterable[str]], optional): Resource ARNs to filter by. Multiple ARNs
+            are combined into a single multi-value filter. Defaults to None.
+        updated_since (Optional[str], optional): ISO 8601 timestamp; only findings updated at or
+            after it are matched. Defaults to None.
+        finding_status (Optional[str], optional): Only match findings with this status (e.g.
+            "ACTIVE"). Defaults to None, which matches every status.
+
+    Returns:
+        Dict[str, Any]: The filter criteria.
+    """
+    base_criteria: Dict[str, Any] = {
+        "resourceType": [{
+            "comparison": "EQUALS", 
+            "value": service_type
+        }]
+    }
+    if resource_arns:
+        base_criteria["resourceArn"] = [
+            {"comparison": "EQUALS", "value": resource_arn} for resource_arn in resource_arns
+        ]
+    if updated_since:
+        base_criteria["updatedAt"] = [{"startInclusive": updated_since}]
+    if finding_status:
+        base_criteria["findingStatus"] = [{"comparison": "EQUALS", "value": finding_status}]
+    return base_criteria
+
 def get_service_findings(service_type: str, resource_arn: Optional[str] = None) -> str:
     """
     This function creates a JSON string that represents the filter criteria for AWS Inspector findings based on the provided service type and optional resource ARN.
@@ -24,23 +59,14 @@ def get_service_findings(service_type: str, resource_arn: Optional[str] = None)
     Raises:
         TypeError: If `service_type` is not a string or `resource_arn` is not a string or None.
     """
-    base_criteria = {
-        "resourceType": [{
-            "comparison": "EQUALS", 
-            "value": service_type
-        }]
-    }
-    if resource_arn:
-        base_criteria["resourceArn"] = [{
-            "comparison": "EQUALS",
-            "value": resource_arn
-        }]
-    
-    return json.dumps(base_criteria)
+    return json.dumps(build_filter_criteria(service_type, [resource_arn] if resource_arn else None))
 
 def save_findings(file_path: str, findings: Dict[str, Any]) -> None:
     """
     Save findings to a JSON file.
+
+    The file is written with the fast JSON backend when available, and compressed when
+    file_path ends in .gz or .zst.
     
     Args:
         file_path (str): Path where findings should be saved
@@ -50,9 +76,7 @@ def save_findings(file_path: str, findings: Dict[str, Any]) -> None:
         Exception: If there's an error creating directory or saving file
     """
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w") as output_file:
-            json.dump(findings, output_file, indent=2)
+        write_document(file_path, findings)
         logger.info(f"Findings saved to {file_path}")
     except Exception as e:
         logger.error(f"Failed to save findings to {file_path}: {e}")
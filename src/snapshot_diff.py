@@ -0,0 +1,275 @@
+import os
+import sys
+import heapq
+import logging
+import argparse
+import itertools
+import tempfile
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.snapshot_io import SnapshotWriter, iter_snapshot, latest_snapshots, parse_partition
+from src.findings_extractor import is_open as _finding_is_open
+
+logger = logging.getLogger(__name__)
+
+NEW = "new"
+RESOLVED = "resolved"
+CHANGED = "changed"
+PERSISTING = "persisting"
+
+# Fields compared between the two versions of a finding that is open in both snapshots
+DEFAULT_COMPARED_FIELDS = ("severity", "status", "fixAvailable", "inspectorScoreDetails", "vulnerablePackages")
+
+# Findings sorted in memory per run of the external merge sort
+DEFAULT_RUN_SIZE = 20_000
+
+
+class FindingDiff:
+    """
+    One difference between two snapshots.
+
+    Attributes:
+        kind (str): "new", "resolved", "changed" or "persisting".
+        finding_arn (str): The finding's ARN.
+        old (Optional[Dict[str, Any]]): The finding in the older snapshot, if present.
+        new (Optional[Dict[str, Any]]): The finding in the newer snapshot, if present.
+        changes (Dict[str, Tuple[Any, Any]]): Compared fields whose value changed, as (old, new).
+    """
+
+    def __init__(self, kind: str, finding_arn: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]],
+                 changes: Optional[Dict[str, Tuple[Any, Any]]] = None):
+        self.kind = kind
+        self.finding_arn = finding_arn
+        self.old = old
+        self.new = new
+        self.changes = changes or {}
+
+    def __repr__(self) -> str:
+        return f"FindingDiff({self.kind!r}, {self.finding_arn!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the JSON-compatible record written by the CLI, carrying the latest version of the finding."""
+        return {
+            "kind": self.kind,
+            "findingArn": self.finding_arn,
+            "changes": {field: {"old": old, "new": new} for field, (old, new) in self.changes.items()},
+            "finding": self.new if self.new is not None else self.old,
+        }
+
+
+def _finding_arn(finding: Dict[str, Any]) -> str:
+    return finding["findingArn"]
+
+
+def _last_per_arn(findings: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    # Sorted input: keeps the last of each run of equal ARNs, as a later record supersedes an earlier one
+    for _, group in itertools.groupby(findings, key=_finding_arn):
+        finding = None
+        for finding in group:
+            pass
+        yield finding
+
+
+def iter_sorted_findings(findings: Iterable[Dict[str, Any]], run_size: int = DEFAULT_RUN_SIZE,
+                         temp_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yields findings sorted by findingArn with an external merge sort.
+
+    Findings are sorted in memory ``run_size`` at a time and each sorted run is spilled to
+    a temporary NDJSON file; the runs are then merged lazily, holding one finding per run.
+    Input that fits in a single run is sorted in memory without touching the disk. When a
+    findingArn occurs more than once, only its last occurrence is kept; findings without
+    a findingArn are skipped.
+
+    Args:
+        findings (Iterable[Dict[str, Any]]): The findings, e.g. iter_snapshot(path).
+        run_size (int): Findings held in memory at once. Default is 20,000.
+        temp_dir (Optional[str]): Where runs are spilled. Default is the system temp directory.
+
+    Yields:
+        Dict[str, Any]: The findings in findingArn order.
+    """
+    skipped = 0
+
+    def with_arn() -> Iterator[Dict[str, Any]]:
+        nonlocal skipped
+        for finding in findings:
+            if finding.get("findingArn"):
+                yield finding
+            else:
+                skipped += 1
+
+    source = with_arn()
+    run = sorted(itertools.islice(source, run_size), key=_finding_arn)
+    if len(run) < run_size:
+        yield from _last_per_arn(run)
+    else:
+        with tempfile.TemporaryDirectory(prefix="snapshot-sort-", dir=temp_dir) as scratch:
+            runs: List[str] = []
+            while run:
+                path = os.path.join(scratch, f"run-{len(runs):05d}.ndjson")
+                with SnapshotWriter(path) as writer:
+                    writer.write_many(run)
+                runs.append(path)
+                # Release the spilled run before reading the next one
+                run.clear()
+                run = sorted(itertools.islice(source, run_size), key=_finding_arn)
+            logger.debug(f"Merging {len(runs)} sorted runs")
+            yield from _last_per_arn(heapq.merge(*(iter_snapshot(path) for path in runs), key=_finding_arn))
+    if skipped:
+        logger.warning(f"Skipped {skipped} findings without a findingArn")
+
+
+def _is_open(finding: Optional[Dict[str, Any]]) -> bool:
+    return finding is not None and _finding_is_open(finding)
+
+
+def join_sorted(old: Iterable[Dict[str, Any]], new: Iterable[Dict[str, Any]]
+                ) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """
+    Merge-joins two findingArn-sorted finding streams on findingArn.
+
+    Yields (old, new) pairs in findingArn order, with None on the side missing the ARN.
+    Only the current finding of each stream is held in memory.
+    """
+    old_iter, new_iter = iter(old), iter(new)
+    old_finding, new_finding = next(old_iter, None), next(new_iter, None)
+    while old_finding is not None or new_finding is not None:
+        if new_finding is None or (old_finding is not None
+                                   and old_finding["findingArn"] < new_finding["findingArn"]):
+            yield old_finding, None
+            old_finding = next(old_iter, None)
+        elif old_finding is None or new_finding["findingArn"] < old_finding["findingArn"]:
+            yield None, new_finding
+            new_finding = next(new_iter, None)
+        else:
+            yield old_finding, new_finding
+            old_finding, new_finding = next(old_iter, None), next(new_iter, None)
+
+
+def diff_sorted(old: Iterable[Dict[str, Any]], new: Iterable[Dict[str, Any]],
+                fields: Sequence[str] = DEFAULT_COMPARED_FIELDS,
+                include_persisting: bool = False) -> Iterator[FindingDiff]:
+    """
+    Merge-joins two findingArn-sorted finding streams and yields their differences.
+
+    A finding is open while its status is ACTIVE (findings_extractor.is_open). A finding
+    open in the new stream but not in the old one (absent, suppressed or closed) is new; one
+    open in the old stream but absent, suppressed or closed in the new one is resolved; one
+    open in both is changed if any compared field differs, and persisting otherwise.
+
+    Args:
+        old (Iterable[Dict[str, Any]]): The older snapshot's findings, sorted by findingArn.
+        new (Iterable[Dict[str, Any]]): The newer snapshot's findings, sorted by findingArn.
+        fields (Sequence[str]): Fields compared for open findings. Default is DEFAULT_COMPARED_FIELDS.
+        include_persisting (bool): Also yield unchanged open findings. Default is False.
+
+    Yields:
+        FindingDiff: One record per difference, in findingArn order.
+    """
+    for before, after in join_sorted(old, new):
+        finding_arn = (after or before)["findingArn"]
+        was_open, is_open = _is_open(before), _is_open(after)
+        if is_open and not was_open:
+            yield FindingDiff(NEW, finding_arn, before, after)
+        elif was_open and not is_open:
+            changes = {"status": (before.get("status"), after.get("status"))} if after is not None else {}
+            yield FindingDiff(RESOLVED, finding_arn, before, after, changes)
+        elif was_open:
+            changes = {field: (before.get(field), after.get(field))
+                       for field in fields if before.get(field) != after.get(field)}
+            if changes:
+                yield FindingDiff(CHANGED, finding_arn, before, after, changes)
+            elif include_persisting:
+                yield FindingDiff(PERSISTING, finding_arn, before, after)
+
+
+def diff_snapshots(old_path: str, new_path: str, fields: Sequence[str] = DEFAULT_COMPARED_FIELDS,
+                   include_persisting: bool = False, run_size: int = DEFAULT_RUN_SIZE,
+                   temp_dir: Optional[str] = None) -> Iterator[FindingDiff]:
+    """
+    Yields the differences between two snapshot files with memory bounded by ``run_size``.
+
+    Both snapshots are externally sorted by findingArn (iter_sorted_findings) and merge-joined
+    (diff_sorted). NDJSON snapshots are read line by line; legacy JSON array snapshots are
+    still parsed whole by iter_snapshot, so very large snapshots should be NDJSON.
+
+    Args:
+        old_path (str): The older snapshot, e.g. last month's.
+        new_path (str): The newer snapshot.
+        fields (Sequence[str]): Fields compared for open findings. Default is DEFAULT_COMPARED_FIELDS.
+        include_persisting (bool): Also yield unchanged open findings. Default is False.
+        run_size (int): Findings sorted in memory at once. Default is 20,000.
+        temp_dir (Optional[str]): Where sorted runs are spilled.
+
+    Yields:
+        FindingDiff: One record per difference, in findingArn order.
+    """
+    old = iter_sorted_findings(iter_snapshot(old_path), run_size, temp_dir)
+    new = iter_sorted_findings(iter_snapshot(new_path), run_size, temp_dir)
+    yield from diff_sorted(old, new, fields, include_persisting)
+
+
+def latest_snapshot_pair(root: str = "output", type_suffix: str = "inspector",
+                         partition: Optional[Sequence[str]] = None) -> Tuple[str, str]:
+    """
+    Returns the two most recent snapshots of a findings type in one partition, oldest first.
+
+    Raises:
+        ValueError: If fewer than two snapshots exist, or no partition is given and the
+            snapshots span several (see snapshot_io.latest_snapshots).
+    """
+    old_path, new_path = latest_snapshots(root, type_suffix, 2, partition)
+    return old_path, new_path
+
+
+def main(argv: Optional[List[str]] = None) -> Counter:
+    parser = argparse.ArgumentParser(description="Diff two findings snapshots: new, resolved and changed findings.")
+    parser.add_argument("snapshots", nargs="*", metavar="SNAPSHOT",
+                        help="Old and new snapshot paths (default: the two most recent inspector snapshots)")
+    parser.add_argument("--root", default="output", help="Snapshot root directory")
+    parser.add_argument("--partition", type=parse_partition,
+                        help="Partition of a matrix run to diff, as ACCOUNT/REGION (default: the only one)")
+    parser.add_argument("--output", help="Write the diff records as NDJSON to this path")
+    parser.add_argument("--fields", type=lambda value: [f.strip() for f in value.split(",") if f.strip()],
+                        default=list(DEFAULT_COMPARED_FIELDS), help="Comma-separated fields compared for changes")
+    parser.add_argument("--include-persisting", action="store_true", help="Also output unchanged open findings")
+    parser.add_argument("--run-size", type=int, default=DEFAULT_RUN_SIZE, help="Findings sorted in memory at once")
+    args = parser.parse_args(argv)
+    if len(args.snapshots) not in (0, 2):
+        parser.error("give either no snapshots or exactly two")
+
+    if args.snapshots:
+        old_path, new_path = args.snapshots
+    else:
+        try:
+            old_path, new_path = latest_snapshot_pair(args.root, partition=args.partition)
+        except ValueError as e:
+            parser.error(str(e))
+    logger.info(f"Diffing {old_path} -> {new_path}")
+    counts: Counter = Counter()
+    writer = SnapshotWriter(args.output) if args.output else None
+    try:
+        for diff in diff_snapshots(old_path, new_path, args.fields, args.include_persisting, args.run_size):
+            counts[diff.kind] += 1
+            if writer is not None:
+                writer.write(diff.to_dict())
+            else:
+                print(f"{diff.kind}\t{diff.finding_arn}\t"
+                      + ", ".join(f"{field}: {old} -> {new}" for field, (old, new) in diff.changes.items()))
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.close()
+    logger.info(", ".join(f"{counts[kind]} {kind}" for kind in (NEW, RESOLVED, CHANGED, PERSISTING)))
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
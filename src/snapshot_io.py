@@ -0,0 +1,382 @@
+import io
+import os
+import gzip
+import logging
+from typing import BinaryIO, Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src import json_codec
+from src.normalized_snapshot import SnapshotNormalizer, SnapshotDenormalizer
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "ndjson"
+JSON = "json"
+NORMALIZED = "normalized"
+OUTPUT_FORMATS = (NDJSON, JSON, NORMALIZED)
+FORMAT_EXTENSIONS = {NDJSON: "ndjson", JSON: "json", NORMALIZED: "normalized.ndjson"}
+
+GZIP = "gzip"
+ZSTD = "zstd"
+COMPRESSIONS = (GZIP, ZSTD)
+COMPRESSION_SUFFIXES = {GZIP: ".gz", ZSTD: ".zst"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Flush the temp file every N records so a crashed run leaves most of its work on disk
+FLUSH_EVERY = 1000
+
+# Run metrics are stored next to their snapshot as <snapshot name>.metrics.json
+METRICS_SUFFIX = ".metrics.json"
+
+# POA&M exports are stored next to their snapshot as <snapshot name>.poam.csv
+POAM_SUFFIX = ".poam.csv"
+
+
+def compression_for(path: str) -> Optional[str]:
+    """Returns the compression implied by a file name ("gzip", "zstd"), or None."""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def compressed_path(path: str, compression: Optional[str]) -> str:
+    """Appends the suffix of a compression to a path; None leaves the path unchanged."""
+    if compression is None:
+        return path
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}")
+    return f"{path}{COMPRESSION_SUFFIXES[compression]}"
+
+
+def _strip_compression(path: str) -> str:
+    compression = compression_for(path)
+    return path[:-len(COMPRESSION_SUFFIXES[compression])] if compression else path
+
+
+def _require_zstd() -> None:
+    if zstd is None and zstandard is None:
+        raise RuntimeError("zstd compression requires Python 3.14+ or the zstandard package")
+
+
+def _compressing_writer(raw: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    # Wraps an open binary file; closing the wrapper finishes the stream but leaves raw open
+    if compression is None:
+        return raw
+    if compression == GZIP:
+        # No file name and a fixed mtime, so identical findings compress to identical bytes
+        return gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=GZIP_LEVEL, mtime=0)
+    _require_zstd()
+    if zstd is not None:
+        return zstd.ZstdFile(raw, "wb", level=ZSTD_LEVEL)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+
+
+def open_snapshot_file(path: str) -> BinaryIO:
+    """
+    Opens a snapshot for binary reading, decompressing it according to its suffix.
+
+    Parameters:
+    -----------
+    path : str
+        Path to a plain, .gz or .zst snapshot.
+    """
+    compression = compression_for(path)
+    if compression == GZIP:
+        return gzip.open(path, "rb")
+    if compression == ZSTD:
+        _require_zstd()
+        if zstd is not None:
+            return zstd.open(path, "rb")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+
+class SnapshotWriter:
+    """
+    Streams findings to a snapshot file as they are produced.
+
+    Records are appended to ``<output_path>.tmp`` and the file is atomically renamed to
+    ``output_path`` when the writer is closed, so readers never observe a half-written
+    snapshot and a crashed run leaves its partial output in the temp file.
+
+    Records are encoded with the selected JSON backend (json_codec) and, when the path ends
+    in .gz or .zst, compressed as they are written.
+
+    Parameters:
+        output_path (str): The final snapshot path.
+        output_format (str): "ndjson" writes one compact JSON document per line; "json" writes
+            a single compact JSON array for consumers that expect the legacy document;
+            "normalized" writes NDJSON with each vulnerability's metadata stored once in a
+            catalog (see normalized_snapshot.SnapshotNormalizer).
+    """
+
+    def __init__(self, output_path: str, output_format: str = NDJSON):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+        self.output_path = output_path
+        self.output_format = output_format
+        self.temp_path = f"{output_path}.tmp"
+        self.count = 0
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        self._raw = open(self.temp_path, "wb")
+        self._file = _compressing_writer(self._raw, compression_for(output_path))
+        self._normalizer = SnapshotNormalizer() if output_format == NORMALIZED else None
+        if output_format == JSON:
+            self._file.write(b"[")
+
+    def write(self, finding: Dict[str, Any]) -> None:
+        """
+        Appends a single finding to the snapshot.
+
+        Parameters:
+        -----------
+        finding : Dict[str, Any]
+            The finding (or FindingRecord) to write.
+        """
+        if self._normalizer is not None:
+            for record in self._normalizer.records(finding):
+                self._file.write(json_codec.dumps(record))
+                self._file.write(b"\n")
+        elif self.output_format == NDJSON:
+            self._file.write(json_codec.dumps(finding))
+            self._file.write(b"\n")
+        else:
+            line = json_codec.dumps(finding)
+            if self.count:
+                self._file.write(b",")
+            self._file.write(line)
+        self.count += 1
+        if self.count % FLUSH_EVERY == 0:
+            self._file.flush()
+
+    def write_many(self, findings: Iterable[Dict[str, Any]]) -> int:
+        """
+        Appends findings from any iterable, consuming it lazily.
+
+        Returns:
+        --------
+        int
+            The number of findings written.
+        """
+        written = 0
+        for finding in findings:
+            self.write(finding)
+            written += 1
+        self._file.flush()
+        return written
+
+    def close(self) -> str:
+        """
+        Finishes the snapshot and atomically moves it into place.
+
+        Returns:
+        --------
+        str
+            The final snapshot path.
+        """
+        if self._raw.closed:
+            return self.output_path
+        if self.output_format == JSON:
+            self._file.write(b"]")
+        if self._file is not self._raw:
+            self._file.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self.temp_path, self.output_path)
+        logger.info(f"Wrote {self.count} findings to {self.output_path}")
+        return self.output_path
+
+    def abort(self) -> None:
+        """Closes the temp file without publishing it, keeping the partial output for inspection."""
+        if not self._raw.closed:
+            if self._file is not self._raw:
+                self._file.close()
+            self._raw.close()
+        logger.warning(f"Snapshot left incomplete at {self.temp_path}")
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_document(output_path: str, data: Any, indent: bool = True) -> str:
+    """
+    Atomically writes a whole JSON document, compressed according to the path's suffix.
+
+    Parameters:
+    -----------
+    output_path : str
+        The destination path, optionally ending in .gz or .zst.
+    data : Any
+        The document; FindingRecords are serialized as dicts.
+    indent : bool
+        Indent the document by two spaces. Default is True.
+
+    Returns:
+    --------
+    str
+        The path written.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "wb") as raw:
+        out = _compressing_writer(raw, compression_for(output_path))
+        out.write(json_codec.dumps(data, indent=indent))
+        if out is not raw:
+            out.close()
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def snapshot_format(path: str) -> str:
+    """Returns the snapshot format implied by a file name, ignoring any compression suffix."""
+    path = _strip_compression(path)
+    if path.endswith(f".{FORMAT_EXTENSIONS[NORMALIZED]}"):
+        return NORMALIZED
+    return NDJSON if path.endswith(".ndjson") else JSON
+
+
+def metrics_path(snapshot_path: str) -> str:
+    """Returns the path of the run metrics stored next to a snapshot."""
+    return f"{os.path.splitext(_strip_compression(snapshot_path))[0]}{METRICS_SUFFIX}"
+
+
+def poam_path(snapshot_path: str) -> str:
+    """Returns the path of the POA&M export stored next to a snapshot."""
+    return f"{os.path.splitext(_strip_compression(snapshot_path))[0]}{POAM_SUFFIX}"
+
+
+def iter_snapshot(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the findings stored in a snapshot file.
+
+    NDJSON snapshots are read one line at a time; JSON array snapshots are loaded whole.
+    Normalized snapshots are read one line at a time too, and their findings are rebuilt
+    from the vulnerability catalog. Compressed snapshots are decompressed as they are read.
+
+    Parameters:
+    -----------
+    path : str
+        Path to a .json, .ndjson or .normalized.ndjson snapshot, optionally ending in .gz or .zst.
+    """
+    output_format = snapshot_format(path)
+    with open_snapshot_file(path) as f:
+        if output_format == NORMALIZED:
+            denormalizer = SnapshotDenormalizer()
+            for line in f:
+                if line.strip():
+                    finding = denormalizer.finding(json_codec.loads(line))
+                    if finding is not None:
+                        yield finding
+        elif output_format == NDJSON:
+            for line in f:
+                if line.strip():
+                    yield json_codec.loads(line)
+        else:
+            data = json_codec.loads(f.read())
+            yield from (data if isinstance(data, list) else [])
+
+
+def load_snapshot(path: str) -> list:
+    """Loads every finding in a snapshot file into a list."""
+    return list(iter_snapshot(path))
+
+
+def find_snapshots(root: str = "output", type_suffix: Optional[str] = None) -> Iterator[str]:
+    """
+    Yields snapshot paths under the output/YYYY/MM/<type>/ layout in chronological order.
+
+    Parameters:
+    -----------
+    root : str
+        The output directory.
+    type_suffix : Optional[str]
+        Restricts results to one findings type (e.g. "inspector" or "cis").
+
+    Compressed snapshots (.gz, .zst) are included. Files outside the YYYY/MM layout (checkpoints, caches, run manifests) and run metrics
+    are skipped.
+    """
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        components = os.path.relpath(dirpath, root).split(os.sep)
+        if len(components) < 3 or not (components[0].isdigit() and components[1].isdigit()):
+            continue
+        if type_suffix is not None and components[2] != type_suffix:
+            continue
+        for filename in filenames:
+            if (_strip_compression(filename).endswith((".json", ".ndjson"))
+                    and not filename.endswith(METRICS_SUFFIX)):
+                paths.append(os.path.join(dirpath, filename))
+    yield from sorted(paths, key=lambda p: (os.path.basename(p), p))
+
+
+def snapshot_partition(path: str, root: str = "output") -> Tuple[str, ...]:
+    """
+    Returns the partition of a snapshot under the output/YYYY/MM/<type>/ layout, e.g.
+    (account, region) for a matrix run cell, or () for an unpartitioned snapshot.
+    """
+    return tuple(os.path.relpath(os.path.dirname(path), root).split(os.sep)[3:])
+
+
+def latest_snapshots(root: str = "output", type_suffix: str = "inspector", count: int = 1,
+                     partition: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Returns the ``count`` most recent snapshots of one partition, oldest first.
+
+    After a matrix run every (account, region) cell has its own snapshots, and the most
+    recent files of different cells are not successive states of anything. Without
+    ``partition`` the snapshots must therefore all belong to a single partition.
+
+    Parameters:
+    -----------
+    root : str
+        The output directory.
+    type_suffix : str
+        The findings type, e.g. "inspector".
+    count : int
+        The number of snapshots wanted.
+    partition : Optional[Sequence[str]]
+        The partition to pick from, e.g. ("123456789012", "us-east-1"); () is the
+        unpartitioned output.
+
+    Raises:
+    -------
+    ValueError:
+        If no partition is given and the snapshots span several, or fewer than ``count``
+        snapshots exist in the partition.
+    """
+    by_partition: Dict[Tuple[str, ...], List[str]] = {}
+    for path in find_snapshots(root, type_suffix):
+        by_partition.setdefault(snapshot_partition(path, root), []).append(path)
+    if partition is None:
+        if len(by_partition) > 1:
+            found = ", ".join("/".join(key) or "(unpartitioned)" for key in sorted(by_partition))
+            raise ValueError(f"{type_suffix} snapshots under {root} span several partitions ({found}); "
+                             f"choose one")
+        partition = next(iter(by_partition), ())
+    paths = by_partition.get(tuple(partition), [])
+    if len(paths) < count:
+        label = "/".join(partition) or "(unpartitioned)"
+        raise ValueError(f"Need {count} {type_suffix} snapshots in partition {label} under {root}, found {len(paths)}")
+    return paths[len(paths) - count:]
+
+
+def parse_partition(value: str) -> Tuple[str, ...]:
+    """Parses a --partition argument: "ACCOUNT/REGION", or "" for unpartitioned output."""
+    return tuple(component for component in value.split("/") if component)
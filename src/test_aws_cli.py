@@ -0,0 +1,58 @@
+import unittest
+import datetime
+from unittest.mock import patch
+from botocore.stub import Stubber
+
+from utils import aws_cli
+from utils.aws_transport import Boto3Transport, UnsupportedCommandError
+
+
+class TestBoto3Transport(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Boto3Transport()
+
+    def test_parse_list_findings(self):
+        parsed = self.transport.parse(
+            "aws inspector2 list-findings "
+            "--filter-criteria '{\"resourceType\":[{\"comparison\":\"EQUALS\",\"value\":\"Ec2Instance\"}]}' "
+            "--region eu-west-1"
+        )
+        self.assertEqual(parsed.service, "inspector2")
+        self.assertEqual(parsed.operation, "list_findings")
+        self.assertEqual(parsed.region, "eu-west-1")
+        self.assertEqual(parsed.params["filterCriteria"]["resourceType"][0]["value"], "Ec2Instance")
+
+    def test_parse_rejects_shorthand(self):
+        with self.assertRaises(UnsupportedCommandError):
+            self.transport.parse("aws ec2 describe-instances --filters Name=tag:Env,Values=prod")
+
+    def test_execute_paginates_and_serializes_datetimes(self):
+        client = self.transport.get_client("rds", "us-east-1")
+        created = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        with Stubber(client) as stubber:
+            stubber.add_response("describe_db_instances",
+                                 {"DBInstances": [{"DBInstanceIdentifier": "db-1", "InstanceCreateTime": created}],
+                                  "Marker": "next"}, {})
+            stubber.add_response("describe_db_instances",
+                                 {"DBInstances": [{"DBInstanceIdentifier": "db-2"}]}, {"Marker": "next"})
+            output = self.transport.run("aws rds describe-db-instances --region us-east-1")
+        self.assertEqual([db["DBInstanceIdentifier"] for db in output["DBInstances"]], ["db-1", "db-2"])
+        self.assertEqual(output["DBInstances"][0]["InstanceCreateTime"], created.isoformat())
+
+
+class TestRunAwsCli(unittest.TestCase):
+
+    @patch("utils.aws_cli._run_subprocess", return_value={"EC2": {"Reservations": []}})
+    def test_falls_back_to_subprocess_for_unsupported_commands(self, mock_subprocess):
+        command = "aws ec2 describe-instances --filters Name=tag:Env,Values=prod"
+        self.assertEqual(aws_cli.run_aws_cli(command, "EC2", transport="boto3"), {"EC2": {"Reservations": []}})
+        mock_subprocess.assert_called_once_with(command, "EC2")
+
+    def test_set_transport_rejects_unknown_names(self):
+        with self.assertRaises(ValueError):
+            aws_cli.set_transport("carrier-pigeon")
+
+
+if __name__ == '__main__':
+    unittest.main()
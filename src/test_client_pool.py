@@ -0,0 +1,21 @@
+import unittest
+
+from utils.aws_transport import Boto3Transport
+from utils.client_pool import ClientPool
+
+
+class TestClientPool(unittest.TestCase):
+
+    def test_clients_are_shared_per_service_region_and_tuned(self):
+        pool = ClientPool(max_pool_connections=32)
+        client = pool.client("inspector2", "us-east-1")
+        self.assertIs(pool.client("inspector2", "us-east-1"), client)
+        self.assertIsNot(pool.client("inspector2", "eu-west-1"), client)
+        self.assertIs(pool.session(), pool.session())
+        self.assertEqual(client.meta.config.max_pool_connections, 32)
+        self.assertTrue(client.meta.config.tcp_keepalive)
+        self.assertIs(Boto3Transport(pool).get_client("inspector2", "us-east-1"), client)
+
+
+if __name__ == '__main__':
+    unittest.main()
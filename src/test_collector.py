@@ -0,0 +1,187 @@
+import os
+import json
+import tempfile
+import unittest
+import tracemalloc
+
+from src.collector import FindingsCollector
+from src.snapshot_io import iter_snapshot, find_snapshots, zstd, zstandard
+from src import json_codec
+from src.checkpoint import CollectionCheckpoint, merge_findings
+from src.service_finder import build_filter_criteria
+from src.findings_extractor import extract_findings
+from src.finding_record import FindingRecord, StringTable, to_records
+from src.fake_backend import FakeFleet, raw_page
+
+
+class TestStreamingCollector(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _findings(self, count):
+        return ({"findingArn": f"arn:finding/{n}", "severity": "LOW"} for n in range(count))
+
+    def test_ndjson_is_streamed_through_a_temp_file(self):
+        collector = FindingsCollector(streaming=True)
+        collector.add_findings(self._findings(3))
+        writer = collector._writers["inspector"]
+        self.assertTrue(os.path.exists(writer.temp_path))
+        self.assertFalse(os.path.exists(writer.output_path))
+        self.assertEqual(collector.findings, [])
+
+        collector.save_findings()
+        self.assertTrue(writer.output_path.startswith(f"output/{collector.run_date.year}/"))
+        self.assertTrue(writer.output_path.endswith(".ndjson"))
+        self.assertFalse(os.path.exists(writer.temp_path))
+        self.assertEqual([f["findingArn"] for f in iter_snapshot(writer.output_path)],
+                         [f"arn:finding/{n}" for n in range(3)])
+        self.assertEqual(list(iter_snapshot(collector._writers["cis"].output_path)), [])
+
+    def test_compact_json_mode_matches_buffered_output(self):
+        streamed = FindingsCollector(streaming=True, output_format="json")
+        streamed.add_findings(self._findings(5))
+        streamed.save_findings()
+        with open(streamed._writers["inspector"].output_path) as f:
+            content = f.read()
+        self.assertNotIn("\n", content)
+        self.assertEqual(json.loads(content), list(self._findings(5)))
+
+    def test_abort_keeps_partial_output(self):
+        collector = FindingsCollector(streaming=True)
+        collector.add_findings(self._findings(2))
+        collector.abort()
+        writer = collector._writers["inspector"]
+        self.assertFalse(os.path.exists(writer.output_path))
+        with open(writer.temp_path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+
+    def test_compressed_snapshots_round_trip_with_both_backends(self):
+        compressions = ["gzip"] + (["zstd"] if zstd or zstandard else [])
+        backend = json_codec.get_json_backend()
+        try:
+            for json_backend in json_codec.JSON_BACKENDS:
+                json_codec.set_json_backend(json_backend)
+                for compression in compressions:
+                    for streaming in (True, False):
+                        collector = FindingsCollector(streaming=streaming, compression=compression)
+                        collector.add_findings(self._findings(4))
+                        collector.save_findings()
+                        path = collector.output_paths["inspector"]
+                        self.assertTrue(path.endswith((".gz", ".zst")))
+                        self.assertEqual(list(iter_snapshot(path)), list(self._findings(4)))
+                        self.assertIn(path, list(find_snapshots("output", "inspector")))
+                        os.remove(path)
+        finally:
+            json_codec.set_json_backend(backend)
+        with self.assertRaises(ValueError):
+            FindingsCollector(compression="lz4")
+
+    def test_normalized_snapshot_rebuilds_findings_exactly(self):
+        fleet = FakeFleet(resources=50, findings=2000, vulnerabilities=40, seed=3)
+        findings = list(extract_findings({"EC2": list(fleet.iter_findings("Ec2Instance"))}, "EC2"))
+        findings[1]["description"] = "Overridden for one resource"
+        findings.append({"findingArn": "arn:finding/no-vulnerability", "severity": "LOW"})
+        sizes = {}
+        for output_format in ("ndjson", "normalized"):
+            collector = FindingsCollector(streaming=True, output_format=output_format)
+            collector.add_findings(findings)
+            collector.save_findings()
+            path = collector.output_paths["inspector"]
+            self.assertEqual(list(iter_snapshot(path)), findings)
+            sizes[output_format] = os.path.getsize(path)
+        self.assertTrue(path.endswith(".normalized.ndjson"))
+        self.assertLess(sizes["normalized"], sizes["ndjson"] / 2)
+
+
+class TestIncrementalCollection(unittest.TestCase):
+
+    def test_checkpoint_tracks_latest_updated_at_per_resource_type(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = CollectionCheckpoint(os.path.join(tmp, "checkpoint.json"))
+            findings = [
+                {"AWS Service": "EC2", "updatedAt": "2025-03-01T00:00:00+00:00"},
+                {"AWS Service": "EC2", "updatedAt": "2025-03-05T10:00:00.500000+00:00"},
+                {"AWS Service": "EC2", "updatedAt": "2025-03-02T00:00:00Z"},
+                {"AWS Service": "Lambda", "updatedAt": None},
+            ]
+            self.assertEqual(list(checkpoint.track(findings)), findings)
+            snapshot = os.path.join(tmp, "snapshot.ndjson")
+            open(snapshot, "w").close()
+            checkpoint.save(snapshot)
+
+            loaded = CollectionCheckpoint.load(checkpoint.path)
+            self.assertEqual(loaded.updated_at, {"Ec2Instance": "2025-03-05T10:00:00.500000+00:00"})
+            self.assertTrue(loaded.is_usable())
+
+    def test_delta_is_merged_by_finding_arn(self):
+        previous = [{"findingArn": "a", "status": "ACTIVE"}, {"findingArn": "b", "status": "ACTIVE"}]
+        delta = [{"findingArn": "b", "status": "CLOSED"}, {"findingArn": "c", "status": "ACTIVE"}]
+        self.assertEqual(list(merge_findings(previous, delta)), [
+            {"findingArn": "a", "status": "ACTIVE"},
+            {"findingArn": "b", "status": "CLOSED"},
+            {"findingArn": "c", "status": "ACTIVE"},
+        ])
+
+    def test_spilled_merge_matches_and_passes_findings_without_arn_through(self):
+        previous = [{"findingArn": f"arn:{n:04d}", "status": "ACTIVE"} for n in range(0, 500, 2)]
+        previous.insert(7, {"title": "no arn", "status": "ACTIVE"})
+        delta = [{"findingArn": f"arn:{n:04d}", "status": "CLOSED"} for n in range(499, 0, -3)]
+        delta.append({"title": "also no arn", "status": "ACTIVE"})
+        merged = list(merge_findings(previous, delta, run_size=16))
+        expected = {f["findingArn"]: f for f in previous if "findingArn" in f}
+        expected.update({f["findingArn"]: f for f in delta if "findingArn" in f})
+        self.assertEqual(merged[:len(expected)], [expected[arn] for arn in sorted(expected)])
+        self.assertEqual(merged[len(expected):], [{"title": "no arn", "status": "ACTIVE"},
+                                                  {"title": "also no arn", "status": "ACTIVE"}])
+
+    def test_updated_since_filter(self):
+        criteria = build_filter_criteria("Ec2Instance", updated_since="2025-03-05T10:00:00+00:00")
+        self.assertEqual(criteria["updatedAt"], [{"startInclusive": "2025-03-05T10:00:00+00:00"}])
+
+
+class TestFindingRecord(unittest.TestCase):
+
+    def _extract(self, compact):
+        table = StringTable()
+        collected = []
+        tracemalloc.start()
+        for start in range(0, 3000, 100):
+            extracted = extract_findings({"EC2": json.loads(raw_page(start, 100))}, "EC2")
+            collected.extend(to_records(extracted, table) if compact else extracted)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return collected, used
+
+    def test_records_serialize_identically_and_use_less_memory(self):
+        findings, dict_bytes = self._extract(compact=False)
+        records, record_bytes = self._extract(compact=True)
+        self.assertEqual(json.dumps(findings), json.dumps([record.to_dict() for record in records]))
+        self.assertLess(record_bytes * 3, dict_bytes)
+        self.assertIs(records[0].resources, records[300].resources)
+        self.assertEqual(records[0]["AWS Service"], "EC2")
+
+    def test_compact_collector_writes_the_same_file(self):
+        findings = extract_findings({"EC2": json.loads(raw_page(0, 20))}, "EC2")
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for compact in (False, True):
+                collector = FindingsCollector(compact=compact)
+                collector.add_findings(findings)
+                path = os.path.join(tmp, f"{compact}.json")
+                collector._save_to_file(path, collector.findings)
+                paths.append(path)
+            self.assertIsInstance(collector.findings[0], FindingRecord)
+            with open(paths[0]) as plain, open(paths[1]) as compacted:
+                self.assertEqual(plain.read(), compacted.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import unittest
+
+from src.findings_extractor import extract_findings
+from src.field_spec import compile_extractor, FIELD_NAMES
+from src.fake_backend import raw_page
+
+
+def _legacy_extract(f, aws_service):
+    """The field-by-field extraction extract_findings performed before the compiled spec."""
+    details = f.get("resources", [{}])[0].get("details", {})
+    vuln_details = f.get("packageVulnerabilityDetails", {})
+    return {
+        "AWS Service": aws_service,
+        "findingArn": f.get("findingArn"),
+        "firstObservedAt": f.get("firstObservedAt"),
+        "lastObservedAt": f.get("lastObservedAt"),
+        "status": f.get("status"),
+        "type": f.get("type"),
+        "severity": f.get("severity"),
+        "title": f.get("title"),
+        "description": f.get("description"),
+        "codeVulnerabilityDetails": f.get("codeVulnerabilityDetails") if aws_service == "Lambda" else None,
+        "awsLambdaFunction": details.get("awsLambdaFunction") if aws_service == "Lambda" else None,
+        "awsEc2Instance": details.get("awsEc2Instance") if aws_service == "EC2" else None,
+        "awsEcrContainerImage": details.get("awsEcrContainerImage") if aws_service in ["EKS", "ECR"] else None,
+        "epss": f.get("epss", {}).get("score"),
+        "fixAvailable": f.get("fixAvailable"),
+        "inspectorScoreDetails": f.get("inspectorScoreDetails"),
+        "cvss2": vuln_details.get("cvss", [{}])[0].get("cvss2"),
+        "cvss3": vuln_details.get("cvss", [{}])[0].get("cvss3"),
+        "atigData": f.get("atigData"),
+        "referenceUrls": vuln_details.get("referenceUrls"),
+        "source": vuln_details.get("source"),
+        "sourceUrl": vuln_details.get("sourceUrl"),
+        "vendorSeverity": vuln_details.get("vendorSeverity"),
+        "vendorCreatedAt": vuln_details.get("vendorCreatedAt"),
+        "vendorUpdatedAt": vuln_details.get("vendorUpdatedAt"),
+        "relatedVulnerabilities": vuln_details.get("relatedVulnerabilities"),
+        "vulnerablePackages": vuln_details.get("vulnerablePackages"),
+        "networkReachabilityDetails": f.get("networkReachabilityDetails"),
+        "remediation": f.get("remediation", {}).get("recommendation", {}).get("text"),
+        "remediationUrl": f.get("remediation", {}).get("recommendation", {}).get("Url"),
+        "resources": f.get("resources", []),
+        "createdAt": f.get("createdAt"),
+        "updatedAt": f.get("updatedAt"),
+    }
+
+
+class TestCompiledExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = json.loads(raw_page(0, 50))
+        self.raw[0]["epss"] = {"score": 0.42}
+        self.raw[0]["remediation"] = {"recommendation": {"text": "Upgrade", "Url": "https://fix"}}
+        self.raw[1]["resources"][0]["details"] = {"awsLambdaFunction": {"functionName": "fn"}}
+
+    def test_matches_legacy_extraction_for_every_service(self):
+        for service in ("Lambda", "EKS", "EC2", "RDS", "ECR", "CIS"):
+            extracted = extract_findings({service: self.raw}, service)
+            self.assertEqual(json.dumps(extracted), json.dumps([_legacy_extract(f, service) for f in self.raw]))
+            self.assertEqual(tuple(extracted[0]), FIELD_NAMES)
+
+    def test_projection_extracts_only_requested_fields(self):
+        extracted = extract_findings({"EC2": self.raw}, "EC2", projection=["severity", "findingArn", "awsEc2Instance"])
+        self.assertEqual(list(extracted[0]), ["severity", "findingArn", "awsEc2Instance"])
+        self.assertEqual(extracted[0]["awsEc2Instance"]["type"], "t3.micro")
+        with self.assertRaises(ValueError):
+            compile_extractor("EC2", ["notAField"])
+
+    def test_missing_nested_values_yield_none(self):
+        extract = compile_extractor("EC2")
+        finding = extract({"findingArn": "arn", "resources": [], "epss": None, "packageVulnerabilityDetails": {"cvss": []}})
+        self.assertIsNone(finding["awsEc2Instance"])
+        self.assertIsNone(finding["epss"])
+        self.assertIsNone(finding["cvss3"])
+        self.assertEqual(finding["resources"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
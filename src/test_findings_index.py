@@ -0,0 +1,85 @@
+import os
+import json
+import tempfile
+import unittest
+
+from src.findings_index import FindingsIndex, snapshot_taken_at
+from src.findings_extractor import vulnerability_id
+
+
+def _finding(n, status="ACTIVE", first="2025-01-01T00:00:00+00:00"):
+    return {
+        "AWS Service": "EC2", "findingArn": f"arn:finding/{n}", "status": status, "severity": "HIGH",
+        "title": f"CVE-2024-000{n} - openssl", "firstObservedAt": first, "lastObservedAt": first,
+        "updatedAt": first, "resources": [{"id": f"i-{n % 2}"}],
+    }
+
+
+class _SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "output")
+        os.makedirs(os.path.join(self.root, "2025", "03", "inspector"))
+        self.index = FindingsIndex(os.path.join(self._tmp.name, "index.sqlite"))
+
+    def tearDown(self):
+        self.index.close()
+        self._tmp.cleanup()
+
+    def _snapshot(self, name, findings):
+        path = os.path.join(self.root, "2025", "03", "inspector", name)
+        with open(path, "w") as f:
+            f.writelines(json.dumps(finding) + "\n" for finding in findings)
+        return path
+
+
+class TestFindingsIndex(_SnapshotTestCase):
+
+    def test_ingest_is_incremental_and_tracks_open_findings(self):
+        self._snapshot("2025-03-01_000000_inspector.ndjson",
+                       [_finding(1, first="2025-01-01T00:00:00+00:00"), _finding(2), _finding(3)])
+        self.assertEqual(self.index.ingest(self.root), 1)
+        self.assertEqual(self.index.ingest(self.root), 0)
+
+        self._snapshot("2025-03-02_000000_inspector.ndjson",
+                       [_finding(1, first="2025-01-01T00:00:00+00:00"), _finding(2, status="CLOSED"),
+                        _finding(4, first="2025-02-01T00:00:00+00:00")])
+        self.assertEqual(self.index.ingest(self.root), 1)
+
+        oldest = self.index.longest_open(limit=5)
+        self.assertEqual([row["finding_arn"] for row in oldest], ["arn:finding/1", "arn:finding/4"])
+        self.assertEqual(oldest[0]["days_open"], 60)
+        self.assertEqual([row["resource_arn"] for row in self.index.resources_for_vulnerability("CVE-2024-0001")],
+                         ["i-1"])
+        self.assertEqual([row["vulnerability_id"] for row in self.index.vulnerabilities_for_resource("i-0")],
+                         ["CVE-2024-0004"])
+        self.assertEqual(len(self.index.query("SELECT * FROM observations")), 6)
+
+    def test_open_findings_span_every_partition(self):
+        for partition, name, findings in (
+                (("111111111111", "us-east-1"), "2025-03-01_000000.ndjson", [_finding(1), _finding(2)]),
+                (("111111111111", "us-east-1"), "2025-03-02_000000.ndjson", [_finding(1)]),
+                (("222222222222", "us-east-1"), "2025-03-02_000500.ndjson", [_finding(3)])):
+            directory = os.path.join(self.root, "2025", "03", "inspector", *partition)
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, name), "w") as f:
+                f.writelines(json.dumps(finding) + "\n" for finding in findings)
+        self.assertEqual(self.index.ingest(self.root), 3)
+        self.assertEqual(sorted(row["finding_arn"] for row in self.index.longest_open()),
+                         ["arn:finding/1", "arn:finding/3"])
+        self.assertEqual(sorted(row["finding_arn"] for row in self.index.vulnerabilities_for_resource("i-1")),
+                         ["arn:finding/1", "arn:finding/3"])
+
+    def test_snapshot_time_and_vulnerability_id(self):
+        self.assertEqual(snapshot_taken_at("output/2025/03/inspector/2025-03-02_134501_inspector.ndjson"),
+                         "2025-03-02T13:45:01")
+        self.assertEqual(vulnerability_id({"packageVulnerabilityDetails": {"vulnerabilityId": "GHSA-abcd"}}),
+                         "GHSA-abcd")
+        self.assertEqual(vulnerability_id({"sourceUrl": "https://alas.aws.amazon.com/AL2/ALAS2-2024-2500.html"}),
+                         "ALAS2-2024-2500")
+        self.assertIsNone(vulnerability_id({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,90 +1,87 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+import unittest.mock
+
 from src.inspector import Inspector
+from src.snapshot_io import load_snapshot, find_snapshots, metrics_path
+from src.fake_backend import FakeFleet, FakeClientPool
+
 
 class TestInspector(unittest.TestCase):
+    """Runs the Inspector end to end against the synthetic Inspector2 backend."""
+
+    def setUp(self):
+        self.fleet = FakeFleet(resources=200, findings=3000, closed_fraction=0.2, seed=1)
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
 
-    @patch('findings.inspector.boto3.client')
-    @patch('findings.inspector.FindingsCollector')
-    @patch('findings.inspector.LambdaInspector')
-    @patch('findings.inspector.EksInspector')
-    @patch('findings.inspector.Ec2Inspector')
-    @patch('findings.inspector.RdsInspector')
-    @patch('findings.inspector.EcrInspector')
-    @patch('findings.inspector.CisInspector')
-    def test_inspector_initialization(self, MockCisInspector, MockEcrInspector, MockRdsInspector, 
-                                      MockEc2Inspector, MockEksInspector, MockLambdaInspector, 
-                                      MockFindingsCollector, MockBotoClient):
-        # Mock the boto3 client and FindingsCollector
-        mock_client = MockBotoClient.return_value
-        mock_collector = MockFindingsCollector.return_value
-
-        # Initialize the Inspector
-        inspector = Inspector()
-
-        # Assertions to check if the inspectors are initialized
-        self.assertIsNotNone(inspector.lambda_inspector)
-        self.assertIsNotNone(inspector.eks_inspector)
-        self.assertIsNotNone(inspector.ec2_inspector)
-        self.assertIsNotNone(inspector.rds_inspector)
-        self.assertIsNone(inspector.ecr_inspector)
-        self.assertIsNotNone(inspector.cis_inspector)
-
-        # Check if boto3 client and FindingsCollector were called
-        MockBotoClient.assert_called_once_with('inspector2')
-        MockFindingsCollector.assert_called_once()
-
-    @patch('findings.inspector.boto3.client')
-    @patch('findings.inspector.FindingsCollector')
-    @patch('findings.inspector.LambdaInspector')
-    @patch('findings.inspector.EksInspector')
-    @patch('findings.inspector.Ec2Inspector')
-    @patch('findings.inspector.RdsInspector')
-    @patch('findings.inspector.EcrInspector')
-    @patch('findings.inspector.CisInspector')
-    def test_inspector_run(self, MockCisInspector, MockEcrInspector, MockRdsInspector, 
-                           MockEc2Inspector, MockEksInspector, MockLambdaInspector, 
-                           MockFindingsCollector, MockBotoClient):
-        # Mock the boto3 client and FindingsCollector
-        mock_client = MockBotoClient.return_value
-        mock_collector = MockFindingsCollector.return_value
-
-        # Mock the inspectors
-        mock_lambda_inspector = MockLambdaInspector.return_value
-        mock_eks_inspector = MockEksInspector.return_value
-        mock_ec2_inspector = MockEc2Inspector.return_value
-        mock_rds_inspector = MockRdsInspector.return_value
-        mock_cis_inspector = MockCisInspector.return_value
-
-        # Mock the get_findings method for each inspector
-        mock_lambda_inspector.get_findings.return_value = ['lambda_finding']
-        mock_eks_inspector.get_findings.return_value = ['eks_finding']
-        mock_ec2_inspector.get_findings.return_value = ['ec2_finding']
-        mock_rds_inspector.get_findings.return_value = ['rds_finding']
-        mock_cis_inspector.get_findings.return_value = ['cis_finding']
-
-        # Initialize the Inspector
-        inspector = Inspector()
-
-        # Run the inspector
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _run(self, **options):
+        pool = FakeClientPool(self.fleet)
+        inspector = Inspector(client_pool=pool, streaming=True, requests_per_second=1e6,
+                              inventory_cache_path=None, ecr_cache_root=None, **options)
         inspector.run()
+        return inspector, pool, load_snapshot(inspector.collector.output_paths["inspector"])
+
+    def test_run_collects_every_finding(self):
+        inspector, pool, findings = self._run(max_workers=4)
+        expected = sum(self.fleet.finding_count(t) for t in self.fleet.resources if t != "EcrRepository")
+        self.assertEqual(len(findings), expected)
+        self.assertEqual(len({f["findingArn"] for f in findings}), expected)
+        self.assertEqual(pool.call_counts()["sts.get_caller_identity"], 1)
+
+        snapshot = inspector.collector.output_paths["inspector"]
+        self.assertEqual(inspector.metrics_path, metrics_path(snapshot))
+        self.assertEqual(inspector.metrics.summary["findings"], expected)
+        self.assertIn({"service": "EC2", "stage": "inventory", "seconds": unittest.mock.ANY, "count": 1},
+                      inspector.metrics.summary["stages"])
+        self.assertEqual(list(find_snapshots("output", "inspector")), [snapshot])
+
+    def test_concurrent_run_matches_sequential_run(self):
+        _, _, sequential = self._run(max_workers=1)
+        _, _, concurrent = self._run(max_workers=4)
+        self.assertEqual([f["findingArn"] for f in concurrent], [f["findingArn"] for f in sequential])
+
+    def test_prefilter_collects_only_active_findings_with_fewer_calls(self):
+        inspector, pool, findings = self._run(max_workers=4, prefilter=True)
+        _, unfiltered_pool, unfiltered = self._run(max_workers=4, prefilter=False)
+        self.assertIn("CLOSED", {f["status"] for f in unfiltered})
+        self.assertEqual([f["findingArn"] for f in findings],
+                         [f["findingArn"] for f in unfiltered if f["status"] == "ACTIVE"])
+        self.assertTrue(inspector.service_inspector.skipped_resources)
+        self.assertLess(pool.call_counts()["inspector2.list_findings"],
+                        unfiltered_pool.call_counts()["inspector2.list_findings"])
+
+    def test_resume_after_crash_skips_journaled_resources(self):
+        _, full_pool, full = self._run(max_workers=1)
+
+        crashing_pool = FakeClientPool(self.fleet)
+        client = crashing_pool.client("inspector2")
+        list_findings = client.list_findings
+
+        def crash_after_20_calls(**kwargs):
+            if client.calls["list_findings"] >= 20:
+                raise RuntimeError("simulated crash")
+            return list_findings(**kwargs)
 
-        # Assertions to check if the get_findings methods were called
-        mock_lambda_inspector.get_findings.assert_called_once()
-        mock_eks_inspector.get_findings.assert_called_once()
-        mock_ec2_inspector.get_findings.assert_called_once()
-        mock_rds_inspector.get_findings.assert_called_once()
-        mock_cis_inspector.get_findings.assert_called_once()
+        client.list_findings = crash_after_20_calls
+        inspector = Inspector(client_pool=crashing_pool, streaming=True, requests_per_second=1e6, max_workers=1,
+                              inventory_cache_path=None, ecr_cache_root=None)
+        with self.assertRaises(RuntimeError):
+            inspector.run()
+        self.assertTrue(os.path.exists(inspector.journal.path))
 
-        # Assertions to check if the findings were added to the collector
-        mock_collector.add_findings.assert_any_call(['lambda_finding'])
-        mock_collector.add_findings.assert_any_call(['eks_finding'])
-        mock_collector.add_findings.assert_any_call(['ec2_finding'])
-        mock_collector.add_findings.assert_any_call(['rds_finding'])
-        mock_collector.add_cis_findings.assert_called_once_with(['cis_finding'])
+        inspector, pool, resumed = self._run(max_workers=1, resume=True)
+        self.assertEqual(sorted(f["findingArn"] for f in resumed), sorted(f["findingArn"] for f in full))
+        self.assertLess(pool.call_counts()["inspector2.list_findings"],
+                        full_pool.call_counts()["inspector2.list_findings"])
+        self.assertFalse(os.path.exists(inspector.journal.path))
 
-        # Check if save_findings was called
-        mock_collector.save_findings.assert_called_once()
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from botocore.stub import Stubber
+
+from utils.client_pool import ClientPool
+from utils.metrics import RunMetrics, set_run_metrics, add_metrics_hook, remove_metrics_hook
+from utils.retry import RetryPolicy
+
+
+class TestRunMetrics(unittest.TestCase):
+
+    def test_pooled_calls_stages_and_hooks_are_recorded(self):
+        now = [0.0]
+        metrics = RunMetrics(clock=lambda: now[0])
+        set_run_metrics(metrics)
+        client = ClientPool().client("sts", "us-east-1")
+        with Stubber(client) as stubber:
+            stubber.add_response("get_caller_identity", {"Account": "123456789012"}, {})
+            client.get_caller_identity()
+
+        def produce():
+            for n in range(3):
+                now[0] += 1
+                yield n
+
+        for _ in metrics.timed_iter("EC2", "findings", produce(), count_findings=True):
+            now[0] += 10  # consumer time is not charged to the stage
+        with metrics.timer("Inspector", "save"):
+            now[0] += 2
+        finished = []
+        add_metrics_hook(finished.append)
+        try:
+            summary = metrics.finish(RetryPolicy().stats, throttles=4)
+        finally:
+            remove_metrics_hook(finished.append)
+        self.assertEqual(finished, [metrics])
+        self.assertEqual(summary["apiCalls"], [{"service": "sts", "operation": "GetCallerIdentity",
+                                                "calls": 1, "bytesReceived": 0}])
+        self.assertEqual([(s["service"], s["stage"], s["seconds"]) for s in summary["stages"]],
+                         [("EC2", "findings", 3), ("Inspector", "save", 2)])
+        self.assertEqual((summary["findings"], summary["wallSeconds"], summary["throttles"]), (3, 35, 4))
+        samples = {(name, tuple(sorted(labels.items()))): value for name, labels, value in metrics.samples()}
+        self.assertEqual(samples[("inspector_run_findings_total", (("service", "EC2"),))], 3)
+        self.assertGreater(summary["peakRssBytes"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import time
+import tempfile
+import unittest
+
+from src.orchestrator import Orchestrator, CollectionTarget, build_matrix
+from src.collector import FindingsCollector
+from src.snapshot_io import find_snapshots
+
+
+def _slow_cell(target, options):
+    if target.account_id == "222222222222" and target.region == "eu-west-1":
+        raise RuntimeError("AccessDenied")
+    time.sleep(options["delay"])
+    collector = FindingsCollector(streaming=True, partition=target.partition)
+    collector.add_findings([{"findingArn": f"arn:{target.account_id}:{target.region}"}])
+    collector.save_findings()
+    return {"outputPaths": collector.output_paths, "pid": os.getpid()}
+
+
+class TestOrchestrator(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_build_matrix(self):
+        targets = build_matrix({
+            "regions": ["us-east-1", "us-west-2"],
+            "accounts": [{"account_id": "111111111111", "role_arn": "arn:aws:iam::111111111111:role/r"},
+                         {"account_id": 222222222222, "regions": ["eu-west-1"]}],
+        })
+        self.assertEqual([(t.account_id, t.region, t.role_arn) for t in targets], [
+            ("111111111111", "us-east-1", "arn:aws:iam::111111111111:role/r"),
+            ("111111111111", "us-west-2", "arn:aws:iam::111111111111:role/r"),
+            ("222222222222", "eu-west-1", None),
+        ])
+        with self.assertRaises(ValueError):
+            build_matrix({"accounts": [{"account_id": "1"}]})
+
+    def test_cells_run_in_parallel_into_partitioned_output(self):
+        targets = [CollectionTarget(account, region)
+                   for account in ("111111111111", "222222222222") for region in ("us-east-1", "eu-west-1")]
+        orchestrator = Orchestrator(targets, max_processes=4, options={"delay": 0.5}, collect=_slow_cell)
+        started = time.monotonic()
+        results = orchestrator.run()
+        self.assertLess(time.monotonic() - started, 1.4)
+
+        self.assertEqual([(r["accountId"], r["region"]) for r in results], [t.partition for t in targets])
+        self.assertEqual([r["accountId"] + "/" + r["region"] for r in orchestrator.failed],
+                         ["222222222222/eu-west-1"])
+        self.assertIn("AccessDenied", orchestrator.failed[0]["error"])
+        self.assertEqual(len({r["pid"] for r in results if "pid" in r}), 3)
+        snapshots = list(find_snapshots("output", "inspector"))
+        self.assertEqual(len(snapshots), 3)
+        self.assertIn(os.path.join("inspector", "111111111111", "us-east-1"), results[0]["outputPaths"]["inspector"])
+        self.assertEqual(len(os.listdir(os.path.join("output", "runs"))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
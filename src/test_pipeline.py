@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import subprocess
+import unittest
+
+from src.pipeline import Pipeline, BoundedStream
+from src.fanout import FanOutExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Streams n synthetic raw findings through fetch -> extract -> filter -> serialize and
+# prints the process's peak RSS in KiB
+_MEMORY_PROBE = """
+import sys, json, resource
+from src.pipeline import Pipeline
+from src.findings_extractor import iter_extract_findings
+
+def pages(n):
+    for start in range(0, n, 100):
+        yield [{"findingArn": f"arn:finding/{i}", "severity": "LOW" if i % 3 == 0 else "HIGH",
+                "title": f"CVE-2024-{i % 500:04d} - openssl", "status": "ACTIVE",
+                "resources": [{"id": f"i-{i % 1000:08x}", "details": {"awsEc2Instance": {"type": "t3.micro"}}}]}
+               for i in range(start, min(start + 100, n))]
+
+def fetch(n):
+    for page in pages(n):
+        yield from page
+
+written = (Pipeline(iter_extract_findings(fetch(int(sys.argv[1])), "EC2"))
+           .filter(lambda f: f["severity"] != "LOW")
+           .run(lambda findings: sum(len(json.dumps(f)) for f in findings)))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def _peak_rss_kib(count):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "src")]))
+    output = subprocess.run([sys.executable, "-c", _MEMORY_PROBE, str(count)], cwd=ROOT, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return int(output.split()[-1])
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_stages_preserve_order(self):
+        result = (Pipeline(range(1000), chunk_size=7)
+                  .map(lambda n: n * 2)
+                  .filter(lambda n: n % 3 == 0)
+                  .run(list))
+        self.assertEqual(result, [n * 2 for n in range(1000) if (n * 2) % 3 == 0])
+
+    def test_producer_blocks_when_the_queue_is_full(self):
+        produced = []
+
+        def source():
+            for n in range(1000):
+                produced.append(n)
+                yield n
+
+        stream = iter(BoundedStream(source(), queue_size=2, chunk_size=10))
+        self.assertEqual(next(stream), 0)
+        time.sleep(0.2)
+        # One chunk taken by the consumer, two queued and one being filled
+        self.assertLessEqual(len(produced), 40)
+        stream.close()
+
+    def test_source_errors_reach_the_consumer(self):
+        def source():
+            yield 1
+            raise RuntimeError("page fetch failed")
+
+        with self.assertRaises(RuntimeError):
+            Pipeline(source()).run(list)
+
+    def test_services_stream_concurrently_in_order(self):
+        def service(name):
+            def run():
+                for n in range(250):
+                    yield (name, n)
+            return run
+
+        with FanOutExecutor(max_workers=2, max_service_workers=3) as executor:
+            items = list(executor.iter_services([service("a"), service("b"), service("c")]))
+        self.assertEqual(items, [(name, n) for name in "abc" for n in range(250)])
+
+    def test_peak_memory_is_independent_of_finding_count(self):
+        # Buffering 100k findings would take well over 50 MiB; the 1M-finding streaming run
+        # is the pipeline.streaming benchmark case
+        small = _peak_rss_kib(10_000)
+        large = _peak_rss_kib(100_000)
+        self.assertLess(large - small, 8 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
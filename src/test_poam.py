@@ -0,0 +1,71 @@
+import os
+import csv
+import tempfile
+import unittest
+from unittest import mock
+
+from src.poam import PoamAggregator, export_poam, POAM_COLUMNS
+from src.findings_extractor import extract_findings
+from src.snapshot_io import SnapshotWriter
+from src.fake_backend import FakeFleet
+
+
+def _finding(arn, cve, resource, severity="LOW", first="2024-03-01T00:00:00", status="ACTIVE"):
+    return {"AWS Service": "EC2", "findingArn": arn, "title": f"{cve} - openssl", "severity": severity,
+            "status": status, "firstObservedAt": first, "lastObservedAt": first, "fixAvailable": "NO",
+            "resources": [{"id": resource}]}
+
+
+class TestPoam(unittest.TestCase):
+
+    def test_findings_roll_up_by_vulnerability(self):
+        findings = [
+            _finding("arn:1", "CVE-2024-0001", "i-1", "LOW", "2024-03-01T00:00:00"),
+            _finding("arn:2", "CVE-2024-0001", "i-2", "HIGH", "2024-01-01T00:00:00"),
+            _finding("arn:3", "CVE-2024-0001", "i-2", "MEDIUM", "2024-02-01T00:00:00"),
+            _finding("arn:4", "CVE-2024-0002", "i-1", "CRITICAL"),
+            _finding("arn:5", "CVE-2024-0003", "i-3", "CRITICAL", status="CLOSED"),
+            _finding("arn:6", "CVE-2024-0004", "i-3", "CRITICAL", status="SUPPRESSED"),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "poam.csv")
+            self.assertEqual(export_poam(findings, path), 2)
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(tuple(rows[0]), POAM_COLUMNS)
+        self.assertEqual([row["Weakness Source Identifier"] for row in rows], ["CVE-2024-0002", "CVE-2024-0001"])
+        self.assertEqual(rows[1]["Original Risk Rating"], "HIGH")
+        self.assertEqual(rows[1]["Original Detection Date"], "2024-01-01T00:00:00")
+        self.assertEqual(rows[1]["Asset Identifier"], "i-1\ni-2")
+        self.assertEqual((rows[1]["Affected Resource Count"], rows[1]["Finding Count"]), ("2", "3"))
+
+    def test_spilled_aggregation_matches_in_memory_aggregation(self):
+        fleet = FakeFleet(resources=100, findings=5000, vulnerabilities=300, seed=4)
+        findings = extract_findings({"EC2": list(fleet.iter_findings("Ec2Instance"))}, "EC2")
+        in_memory = PoamAggregator()
+        in_memory.add_many(findings)
+        spilled = PoamAggregator(max_entries=200)
+        spilled.add_many(findings)
+        self.assertIsNotNone(spilled._scratch)
+        expected = [item.row() for item in in_memory.items()]
+        self.assertEqual([item.row() for item in spilled.items()], expected)
+        self.assertEqual(sum(row["Finding Count"] for row in expected), len(findings))
+
+    def test_items_stay_bounded_with_far_more_vulnerabilities_than_entries(self):
+        fleet = FakeFleet(resources=100, findings=5000, vulnerabilities=1000, seed=5)
+        findings = extract_findings({"EC2": list(fleet.iter_findings("Ec2Instance"))}, "EC2")
+        in_memory = PoamAggregator()
+        in_memory.add_many(findings)
+        expected = [item.row() for item in in_memory.items()]
+        self.assertGreater(len(expected), 500)
+        spilled = PoamAggregator(max_entries=20)
+        spilled.add_many(findings)
+        with mock.patch("src.poam.SnapshotWriter", wraps=SnapshotWriter) as writer:
+            rows = [item.row() for item in spilled.items()]
+        self.assertEqual(rows, expected)
+        # Ordering the combined items spills sorted runs instead of holding every item
+        self.assertGreater(writer.call_count, len(expected) // 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import unittest.mock
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+
+from utils import aws_cli
+from utils.retry import (RetryPolicy, RetryBudget, CircuitBreaker, CircuitOpenError, AwsCliError, classify_error,
+                         THROTTLE, TRANSIENT, FATAL)
+
+
+def _client_error(code, status=400):
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "Op")
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_errors_are_classified(self):
+        self.assertEqual(classify_error(_client_error("ThrottlingException")), THROTTLE)
+        self.assertEqual(classify_error(_client_error("Weird", 503)), TRANSIENT)
+        self.assertEqual(classify_error(_client_error("AccessDeniedException", 403)), FATAL)
+        self.assertEqual(classify_error(AwsCliError(254, "An error occurred (RequestLimitExceeded) when calling")),
+                         THROTTLE)
+        self.assertEqual(classify_error(AwsCliError(255, "Could not connect to the endpoint URL")), TRANSIENT)
+        self.assertEqual(classify_error(ValueError("bug")), FATAL)
+
+    def test_retries_with_jitter_within_budget(self):
+        sleeps = []
+        policy = RetryPolicy(max_attempts=4, budget=RetryBudget(max_retries=5), sleep=sleeps.append)
+        calls = iter([_client_error("ThrottlingException"), _client_error("InternalError", 500), "ok"])
+
+        def flaky():
+            outcome = next(calls)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(policy.call("EC2", flaky), "ok")
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(2 <= sleeps[0] <= 6)
+        stats = policy.stats.summary()["EC2"]
+        self.assertEqual((stats["retries"], stats["throttles"]), (2, 1))
+        self.assertAlmostEqual(stats["waitSeconds"], sum(sleeps))
+
+        fatal = unittest.mock.Mock(side_effect=_client_error("AccessDeniedException"))
+        with self.assertRaises(ClientError):
+            policy.call("EC2", fatal)
+        self.assertEqual(fatal.call_count, 1)
+
+        failing = unittest.mock.Mock(side_effect=_client_error("ServiceUnavailable", 503))
+        with self.assertRaises(ClientError):
+            policy.call("RDS", failing)
+        self.assertEqual(failing.call_count, 4)
+        with self.assertRaises(ClientError):
+            policy.call("RDS", failing)
+        self.assertEqual(failing.call_count, 5)
+        self.assertTrue(policy.budget.exhausted)
+
+    def test_circuit_breaker_stops_a_failing_service(self):
+        policy = RetryPolicy(max_attempts=1, failure_threshold=2, sleep=lambda s: None)
+        failing = unittest.mock.Mock(side_effect=_client_error("ServiceUnavailable", 503))
+        for _ in range(2):
+            with self.assertRaises(ClientError):
+                policy.call("Lambda", failing)
+        with self.assertRaises(CircuitOpenError):
+            policy.call("Lambda", failing)
+        self.assertEqual(failing.call_count, 2)
+        self.assertEqual(policy.call("EC2", lambda: "ok"), "ok")
+        with patch("utils.aws_cli.get_retry_policy", return_value=policy):
+            self.assertEqual(aws_cli.run_aws_cli("aws lambda list-functions", "Lambda"), {"Lambda": []})
+        self.assertEqual(policy.stats.summary()["Lambda"]["shortCircuited"], 2)
+
+    def test_fatal_error_during_a_probe_closes_the_circuit(self):
+        policy = RetryPolicy(max_attempts=1, failure_threshold=1, reset_timeout=0, sleep=lambda s: None)
+        with self.assertRaises(ClientError):
+            policy.call("ECR", unittest.mock.Mock(side_effect=_client_error("ThrottlingException")))
+        self.assertEqual(policy.breaker("ECR").state, CircuitBreaker.OPEN)
+        with self.assertRaises(ClientError):
+            policy.call("ECR", unittest.mock.Mock(side_effect=_client_error("ValidationException")))
+        self.assertEqual(policy.breaker("ECR").state, CircuitBreaker.CLOSED)
+        self.assertEqual(policy.call("ECR", lambda: "ok"), "ok")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from src.risk_scoring import RiskColumns, RiskModel, rank, rank_findings, np
+
+
+def _finding(arn, severity="MEDIUM", score=None, epss=None, fix="NO", reachable=False):
+    return {"findingArn": arn, "severity": severity, "epss": epss, "fixAvailable": fix,
+            "inspectorScoreDetails": {"adjustedCvss": {"score": score}} if score is not None else None,
+            "networkReachabilityDetails": {"protocol": "TCP"} if reachable else None}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestRiskScoring(unittest.TestCase):
+
+    def test_composite_scores_combine_every_component(self):
+        findings = [
+            _finding("arn:1", score=10.0, epss=1.0, fix="YES", reachable=True),
+            _finding("arn:2", score=5.0, epss=0.5, fix="PARTIAL"),
+            _finding("arn:3", severity="CRITICAL"),
+            _finding("arn:4", severity=None),
+        ]
+        scores = RiskModel().score(RiskColumns.from_findings(findings))
+        expected = [100.0, 25.0 + 15.0 + 5.0, 47.5, 25.0]
+        self.assertEqual([round(float(score), 6) for score in scores], expected)
+        only_epss = RiskModel(cvss=0, epss=1, fix_available=0, network_reachable=0, missing_epss=0.2)
+        self.assertEqual([round(float(s), 6) for s in only_epss.score(RiskColumns.from_findings(findings))],
+                         [100.0, 50.0, 20.0, 20.0])
+        with self.assertRaises(ValueError):
+            RiskModel(cvss=0, epss=0, fix_available=0, network_reachable=0)
+
+    def test_top_k_matches_the_full_ranking_with_ties(self):
+        scores = np.array([3.0, 7.0, 7.0, 1.0, 7.0, 5.0, 3.0, 9.0])
+        full = rank(scores)
+        self.assertEqual(full.tolist(), [7, 1, 2, 4, 5, 0, 6, 3])
+        for k in range(len(scores) + 2):
+            self.assertEqual(rank(scores, k).tolist(), full[:k].tolist())
+
+        findings = [_finding(f"arn:{n}", score=float(n % 10), epss=(n % 7) / 10) for n in range(1000)]
+        ranked = rank_findings(findings, top_k=5)
+        self.assertEqual([finding for _, finding in ranked],
+                         [finding for _, finding in rank_findings(findings)][:5])
+        self.assertEqual(ranked[0][1]["findingArn"], "arn:69")
+        self.assertEqual(len(ranked), 5)
+        self.assertEqual(list(ranked)[1:3], ranked[1:3])
+        self.assertEqual(ranked.indexes.tolist()[0], 69)
+
+
+if __name__ == '__main__':
+    unittest.main()
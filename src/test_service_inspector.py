@@ -0,0 +1,298 @@
+import os
+import time
+import random
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from src.base_inspector import BaseInspector
+from src.query_planner import QueryPlanner, PER_RESOURCE, BATCHED_ARNS, RESOURCE_TYPE_SCAN, DELTA_SCAN
+from src.checkpoint import merge_findings
+from src.fanout import FanOutExecutor
+from services.serviceinspector import ServiceInspector
+from utils.rate_limiter import AdaptiveRateLimiter
+from src.inventory_cache import InventoryCache, cache_scope
+from src.ecr_digest_cache import EcrDigestCache
+from src.repository_manager import get_latest_digests
+
+
+def _finding(n, resource_id="arn:aws:lambda:us-east-1:123456789012:function:fn"):
+    return {
+        "findingArn": f"arn:aws:inspector2:us-east-1:123456789012:finding/{n}",
+        "severity": "HIGH",
+        "resources": [{"id": resource_id, "details": {}}],
+    }
+
+
+def _paged_client(findings, page_size):
+    """Returns a mock inspector2 client that serves findings in nextToken-linked pages."""
+    client = MagicMock()
+
+    def list_findings(filterCriteria, maxResults, nextToken=None):
+        start = int(nextToken or 0)
+        response = {"findings": findings[start:start + page_size]}
+        if start + page_size < len(findings):
+            response["nextToken"] = str(start + page_size)
+        return response
+
+    client.list_findings.side_effect = list_findings
+    return client
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_iter_finding_pages_follows_next_token(self):
+        client = _paged_client([_finding(n) for n in range(250)], page_size=100)
+        pages = list(BaseInspector(client).iter_finding_pages({}))
+        self.assertEqual([len(page) for page in pages], [100, 100, 50])
+        self.assertEqual(client.list_findings.call_count, 3)
+
+    def test_get_findings_for_resource_returns_every_page(self):
+        client = _paged_client([_finding(n) for n in range(150)], page_size=100)
+        self.assertEqual(len(BaseInspector(client).get_findings_for_resource("fn", "LambdaFunction")), 150)
+
+    def test_resource_findings_are_extracted_lazily(self):
+        client = _paged_client([_finding(n) for n in range(250)], page_size=100)
+        inspector = ServiceInspector(client)
+        findings = inspector._iter_resource_findings("LambdaFunction", "arn:fn", "Lambda")
+        first = next(findings)
+        self.assertEqual(first["AWS Service"], "Lambda")
+        self.assertEqual(client.list_findings.call_count, 1)
+        self.assertEqual(len(list(findings)), 249)
+
+    def test_connection_errors_end_a_query_without_failing_the_run(self):
+        client = MagicMock()
+        client.list_findings.side_effect = EndpointConnectionError(endpoint_url="https://inspector2")
+        inspector = ServiceInspector(client)
+        self.assertEqual(list(inspector._iter_planned_findings("RDS", "RdsInstance", ["db-1", "db-2"])), [])
+        self.assertEqual(list(inspector._iter_resource_findings("LambdaFunction", "arn:fn", "Lambda")), [])
+        self.assertIsNone(inspector._fetch_repo_findings("app"))
+
+
+class TestQueryPlanner(unittest.TestCase):
+
+    def test_strategy_follows_inventory_size(self):
+        planner = QueryPlanner(batch_size=10, scan_threshold=100)
+        self.assertEqual(planner.plan("RDS", "RdsInstance", ["db-1"]).strategy, PER_RESOURCE)
+        batched = planner.plan("RDS", "RdsInstance", [f"db-{n}" for n in range(25)])
+        self.assertEqual(batched.strategy, BATCHED_ARNS)
+        self.assertEqual([len(batch) for batch in batched.batches], [10, 10, 5])
+        self.assertEqual(planner.plan("RDS", "RdsInstance", [f"db-{n}" for n in range(500)]).strategy,
+                         RESOURCE_TYPE_SCAN)
+
+    def test_known_finding_count_drives_the_choice(self):
+        planner = QueryPlanner(batch_size=10, scan_threshold=100)
+        arns = [f"db-{n}" for n in range(500)]
+        self.assertEqual(planner.plan("RDS", "RdsInstance", arns, type_finding_count=20000).strategy, BATCHED_ARNS)
+        self.assertEqual(planner.plan("RDS", "RdsInstance", arns[:50], type_finding_count=300).strategy,
+                         RESOURCE_TYPE_SCAN)
+
+    def test_scan_results_are_split_by_arn(self):
+        arn = "arn:aws:ec2:us-east-1:123456789012:instance/i-1"
+        findings = [_finding(1, "i-1"), _finding(2, "i-2"), _finding(3, arn)]
+        client = _paged_client(findings, page_size=100)
+        inspector = ServiceInspector(client, planner=QueryPlanner(scan_threshold=0))
+        extracted = list(inspector._iter_planned_findings("EC2", "Ec2Instance", [arn]))
+        self.assertEqual([f["findingArn"][-1] for f in extracted], ["1", "3"])
+        self.assertEqual(inspector.query_plans[0].strategy, RESOURCE_TYPE_SCAN)
+        self.assertNotIn("resourceArn", client.list_findings.call_args.kwargs["filterCriteria"])
+
+    def test_aggregation_prefilter_skips_clean_resources(self):
+        arns = [f"arn:aws:ec2:us-east-1:123456789012:instance/i-{n}" for n in range(5)]
+        client = _paged_client([_finding(1, "i-3")], page_size=100)
+        client.list_finding_aggregations.side_effect = [
+            {"responses": [{"ec2InstanceAggregation": {"instanceId": "i-3", "severityCounts": {"all": 1}}}],
+             "nextToken": "1"},
+            {"responses": [{"ec2InstanceAggregation": {"instanceId": "i-4", "severityCounts": {"all": 0}}}]},
+        ]
+        inspector = ServiceInspector(client, prefilter=True)
+        extracted = list(inspector._iter_planned_findings("EC2", "Ec2Instance", arns))
+        self.assertEqual(len(extracted), 1)
+        self.assertEqual(inspector.skipped_resources, {"Ec2Instance": 4})
+        self.assertEqual(client.list_findings.call_count, 1)
+        criteria = client.list_findings.call_args.kwargs["filterCriteria"]
+        self.assertEqual(criteria["resourceArn"], [{"comparison": "EQUALS", "value": arns[3]}])
+        self.assertEqual(criteria["findingStatus"], [{"comparison": "EQUALS", "value": "ACTIVE"}])
+
+    def test_delta_carries_findings_of_resources_deleted_since_the_checkpoint(self):
+        gone = "arn:aws:ec2:us-east-1:123456789012:instance/i-gone"
+        previous = [dict(_finding(1, gone), status="ACTIVE"), dict(_finding(2, "i-1"), status="ACTIVE")]
+        client = _paged_client([dict(_finding(1, gone), status="CLOSED")], page_size=100)
+        inspector = ServiceInspector(client, planner=QueryPlanner(scan_threshold=0),
+                                     updated_since={"Ec2Instance": "2025-03-01T00:00:00+00:00"})
+        with patch.object(inspector, "_list_instances", return_value=["i-1"]) as list_instances:
+            delta = list(inspector._iter_ec2_findings())
+        list_instances.assert_not_called()
+        self.assertEqual(inspector.query_plans[0].strategy, DELTA_SCAN)
+        criteria = client.list_findings.call_args.kwargs["filterCriteria"]
+        self.assertNotIn("resourceArn", criteria)
+        self.assertEqual(criteria["updatedAt"], [{"startInclusive": "2025-03-01T00:00:00+00:00"}])
+        merged = {f["findingArn"][-1]: f["status"] for f in merge_findings(previous, delta)}
+        self.assertEqual(merged, {"1": "CLOSED", "2": "ACTIVE"})
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def test_map_ordered_preserves_input_order(self):
+        def work(n):
+            time.sleep(random.random() / 100)
+            return n * n
+        with FanOutExecutor(max_workers=4) as executor:
+            self.assertEqual(list(executor.map_ordered(work, range(50))), [n * n for n in range(50)])
+
+    def test_rate_limiter_backs_off_and_recovers(self):
+        limiter = AdaptiveRateLimiter(rate=10, min_rate=1, max_rate=10)
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 5)
+        for _ in range(100):
+            limiter.on_success()
+        self.assertEqual(limiter.rate, 10)
+
+    def test_throttled_list_findings_calls_are_retried(self):
+        client = _paged_client([_finding(n) for n in range(5)], page_size=100)
+        serve = client.list_findings.side_effect
+        throttle = ClientError({"Error": {"Code": "ThrottlingException"}}, "ListFindings")
+        client.list_findings.side_effect = [throttle, throttle, serve(filterCriteria={}, maxResults=100)]
+        limiter = AdaptiveRateLimiter(rate=1000, min_rate=100)
+        findings = list(BaseInspector(client, rate_limiter=limiter).iter_findings({}))
+        self.assertEqual(len(findings), 5)
+        self.assertEqual(limiter.throttle_count, 2)
+
+    def test_concurrent_run_matches_sequential_order(self):
+        arns = [f"arn:aws:lambda:us-east-1:123456789012:function:fn-{n}" for n in range(30)]
+        findings = [_finding(n, arns[n % 30]) for n in range(90)]
+
+        def list_findings(filterCriteria, maxResults, nextToken=None):
+            wanted = {f["value"] for f in filterCriteria.get("resourceArn", [])}
+            time.sleep(random.random() / 100)
+            return {"findings": [f for f in findings if f["resources"][0]["id"] in wanted]}
+
+        def run(executor):
+            client = MagicMock()
+            client.list_findings.side_effect = list_findings
+            inspector = ServiceInspector(client, executor=executor)
+            return [f["findingArn"] for f in inspector._iter_planned_findings("Lambda", "LambdaFunction", arns)]
+
+        with FanOutExecutor(max_workers=4) as executor:
+            self.assertEqual(run(executor), run(None))
+
+
+class TestInventoryCache(unittest.TestCase):
+
+    def test_ttl_persistence_and_invalidation(self):
+        now = [1000.0]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inventory.json")
+            cache = InventoryCache(path, ttls={"EC2": 60}, clock=lambda: now[0])
+            fetch = MagicMock(return_value=["i-1"])
+            self.assertEqual(cache.get_or_fetch("EC2", fetch), ["i-1"])
+            self.assertEqual(InventoryCache(path, clock=lambda: now[0]).get_or_fetch("EC2", fetch), ["i-1"])
+            self.assertEqual(fetch.call_count, 1)
+
+            now[0] += 61
+            cache.get_or_fetch("EC2", fetch)
+            self.assertEqual(fetch.call_count, 2)
+            cache.invalidate("EC2")
+            cache.get_or_fetch("EC2", fetch)
+            self.assertEqual(fetch.call_count, 3)
+            self.assertIsNone(cache.get_or_fetch("RDS", lambda: None))
+            self.assertIsNone(cache.get("RDS"))
+
+    def test_entries_are_scoped_to_the_caller_account(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {}, clear=True):
+            path = os.path.join(tmp, "inventory.json")
+            InventoryCache(path, scope=cache_scope("111111111111")).put("EC2", ["i-1"])
+            self.assertEqual(cache_scope("111111111111"), "default/111111111111/us-east-1")
+            self.assertIsNone(InventoryCache(path, scope=cache_scope("222222222222")).get("EC2"))
+            self.assertEqual(InventoryCache(path, scope=cache_scope("111111111111")).get("EC2"), ["i-1"])
+
+    def test_inventories_and_caller_identity_are_reused(self):
+        outputs = {
+            "EKS": {"clusters": ["c1"]},
+            "EC2": {"Reservations": [{"Instances": [{"InstanceId": "i-1"}]}]},
+        }
+        run_aws_cli = MagicMock(side_effect=lambda command, service: {service: outputs.get(service, {"Functions": []})})
+        sts = MagicMock()
+        sts.get_caller_identity.return_value = {"Account": "123456789012"}
+        pool = MagicMock()
+        pool.client.return_value = sts
+        cache = InventoryCache(None)
+        with patch("services.serviceinspector.run_aws_cli", run_aws_cli):
+            for _ in range(2):
+                inspector = ServiceInspector(_paged_client([], page_size=100), inventory_cache=cache,
+                                             client_pool=pool)
+                list(inspector.iter_service_findings())
+        self.assertEqual(sts.get_caller_identity.call_count, 1)
+        pool.client.assert_called_once_with('sts')
+        self.assertEqual(run_aws_cli.call_count, 4)
+        self.assertEqual(cache.hits, 5)
+
+
+class TestEcrDigestCache(unittest.TestCase):
+
+    REPOS = ["arn:aws:ecr:us-east-1:123456789012:repository/app",
+             "arn:aws:ecr:us-east-1:123456789012:repository/worker",
+             "arn:aws:ecr:us-east-1:123456789012:repository/gone"]
+
+    def test_latest_digests_validate_repositories_in_bulk(self):
+        pages = {
+            "describe_repositories": [{"repositories": [{"repositoryName": "app"}, {"repositoryName": "worker"}]}],
+            "describe_images": [{"imageDetails": [{"imageDigest": "sha256:old", "imagePushedAt": 1},
+                                                  {"imageDigest": "sha256:new", "imagePushedAt": 2}]}],
+        }
+        ecr = MagicMock()
+        ecr.get_paginator.side_effect = lambda name: MagicMock(paginate=MagicMock(return_value=pages[name]))
+        pool = MagicMock()
+        pool.client.return_value = ecr
+        digests = get_latest_digests(self.REPOS, pool)
+        self.assertEqual(digests, {self.REPOS[0]: "sha256:new", self.REPOS[1]: "sha256:new", self.REPOS[2]: None})
+        pool.client.assert_called_once_with("ecr", "us-east-1")
+        self.assertEqual([c.args[0] for c in ecr.get_paginator.call_args_list].count("describe_repositories"), 1)
+
+    def _run_ecr(self, client, cache_root, digests):
+        inspector = ServiceInspector(client, repositories=self.REPOS, digest_cache=EcrDigestCache(cache_root))
+        with patch("services.serviceinspector.get_latest_digests", return_value=digests):
+            return list(inspector._iter_ecr_findings())
+
+    def test_only_changed_repositories_are_queried_in_full(self):
+        client = _paged_client([_finding(1, "arn:aws:ecr:image")], page_size=100)
+        with tempfile.TemporaryDirectory() as tmp:
+            first = self._run_ecr(client, tmp, {self.REPOS[0]: "d1", self.REPOS[1]: "d2", self.REPOS[2]: None})
+            self.assertEqual(client.list_findings.call_count, 3)
+            second = self._run_ecr(client, tmp, {self.REPOS[0]: "d1", self.REPOS[1]: "d3", self.REPOS[2]: None})
+            self.assertEqual(second, first)
+            self.assertEqual(len(first), 3)
+            criteria = [c.kwargs["filterCriteria"] for c in client.list_findings.call_args_list[3:]]
+            # The unchanged repository is only asked for updates, the others in full
+            self.assertEqual(["updatedAt" in c for c in criteria], [True, False, False])
+
+    def test_unchanged_digest_picks_up_new_and_closed_findings(self):
+        findings = [dict(_finding(1, "arn:aws:ecr:image"), status="ACTIVE", updatedAt="2024-01-01T00:00:00+00:00")]
+        client = MagicMock()
+
+        def list_findings(filterCriteria, maxResults, nextToken=None):
+            if filterCriteria["resourceArn"][0]["value"] != self.REPOS[0]:
+                return {"findings": []}
+            since = next((f["startInclusive"] for f in filterCriteria.get("updatedAt", [])), "")
+            return {"findings": [f for f in findings if f["updatedAt"] >= since]}
+
+        client.list_findings.side_effect = list_findings
+        digests = {self.REPOS[0]: "d1", self.REPOS[1]: None, self.REPOS[2]: None}
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual([f["status"] for f in self._run_ecr(client, tmp, digests)], ["ACTIVE"])
+            rescanned = "2999-01-01T00:00:00+00:00"
+            findings[0] = dict(findings[0], status="CLOSED", updatedAt=rescanned)
+            findings.append(dict(_finding(2, "arn:aws:ecr:image"), status="ACTIVE", updatedAt=rescanned))
+            refreshed = self._run_ecr(client, tmp, digests)
+            self.assertEqual([(f["findingArn"][-1], f["status"]) for f in refreshed],
+                             [("1", "CLOSED"), ("2", "ACTIVE")])
+            app_queries = [c.kwargs["filterCriteria"] for c in client.list_findings.call_args_list
+                           if c.kwargs["filterCriteria"]["resourceArn"][0]["value"] == self.REPOS[0]]
+            self.assertEqual(["updatedAt" in c for c in app_queries], [False, True])
+            # The merged findings are cached for the next run
+            self.assertEqual(len(self._run_ecr(client, tmp, digests)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
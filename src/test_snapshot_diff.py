@@ -0,0 +1,97 @@
+import os
+import json
+import tempfile
+import unittest
+
+from src.findings_index import FindingsIndex
+from src.snapshot_diff import (diff_snapshots, diff_sorted, iter_sorted_findings, latest_snapshot_pair,
+                               NEW, RESOLVED, CHANGED)
+
+
+def _finding(n, status="ACTIVE", first="2025-01-01T00:00:00+00:00"):
+    return {
+        "AWS Service": "EC2", "findingArn": f"arn:finding/{n}", "status": status, "severity": "HIGH",
+        "title": f"CVE-2024-000{n} - openssl", "firstObservedAt": first, "lastObservedAt": first,
+        "updatedAt": first, "resources": [{"id": f"i-{n % 2}"}],
+    }
+
+
+class _SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "output")
+        os.makedirs(os.path.join(self.root, "2025", "03", "inspector"))
+        self.index = FindingsIndex(os.path.join(self._tmp.name, "index.sqlite"))
+
+    def tearDown(self):
+        self.index.close()
+        self._tmp.cleanup()
+
+    def _snapshot(self, name, findings):
+        path = os.path.join(self.root, "2025", "03", "inspector", name)
+        with open(path, "w") as f:
+            f.writelines(json.dumps(finding) + "\n" for finding in findings)
+        return path
+
+
+class TestSnapshotDiff(_SnapshotTestCase):
+
+    def test_external_sort_keeps_the_last_duplicate(self):
+        findings = [_finding(n) for n in (5, 3, 9, 1, 7, 3)] + [{"severity": "LOW"}]
+        findings[-2]["severity"] = "LOW"
+        with tempfile.TemporaryDirectory() as scratch:
+            spilled = list(iter_sorted_findings(iter(findings), run_size=2, temp_dir=scratch))
+            self.assertEqual(os.listdir(scratch), [])
+        self.assertEqual([f["findingArn"] for f in spilled], [f"arn:finding/{n}" for n in (1, 3, 5, 7, 9)])
+        self.assertEqual(spilled[1]["severity"], "LOW")
+        self.assertEqual(spilled, list(iter_sorted_findings(iter(findings))))
+
+    def test_new_resolved_and_changed_findings_are_streamed(self):
+        changed = _finding(3)
+        changed["severity"] = "CRITICAL"
+        old = self._snapshot("2025-03-01_000000_inspector.ndjson",
+                             [_finding(4), _finding(1), _finding(2), _finding(3), _finding(6, status="CLOSED"),
+                              _finding(7)])
+        new = self._snapshot("2025-03-02_000000_inspector.ndjson",
+                             [changed, _finding(5), _finding(2, status="CLOSED"), _finding(4), _finding(6),
+                              _finding(7, status="SUPPRESSED")])
+        expected = [(RESOLVED, "arn:finding/1", {}),
+                    (RESOLVED, "arn:finding/2", {"status": ("ACTIVE", "CLOSED")}),
+                    (CHANGED, "arn:finding/3", {"severity": ("HIGH", "CRITICAL")}),
+                    (NEW, "arn:finding/5", {}),
+                    (NEW, "arn:finding/6", {}),
+                    (RESOLVED, "arn:finding/7", {"status": ("ACTIVE", "SUPPRESSED")})]
+        diffs = [(d.kind, d.finding_arn, d.changes) for d in diff_snapshots(old, new, run_size=2)]
+        self.assertEqual(diffs, expected)
+
+        self.index.ingest(self.root)
+        indexed = diff_sorted(self.index.iter_observations(old), self.index.iter_observations(new),
+                              fields=("severity", "status"))
+        self.assertEqual([(d.kind, d.finding_arn, d.changes) for d in indexed], expected)
+        # Suppressed findings are not open in the index either
+        self.assertEqual(sorted(row["finding_arn"] for row in self.index.longest_open()),
+                         ["arn:finding/3", "arn:finding/4", "arn:finding/5", "arn:finding/6"])
+
+    def test_latest_pair_stays_within_one_partition(self):
+        def cell_snapshot(partition, name):
+            directory = os.path.join(self.root, "2025", "03", "inspector", *partition)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, name)
+            open(path, "w").close()
+            return path
+
+        a1 = cell_snapshot(("111111111111", "us-east-1"), "2025-03-01_000000.ndjson")
+        a2 = cell_snapshot(("111111111111", "us-east-1"), "2025-03-02_000000.ndjson")
+        b2 = cell_snapshot(("222222222222", "us-east-1"), "2025-03-02_000001.ndjson")
+        with self.assertRaisesRegex(ValueError, "several partitions"):
+            latest_snapshot_pair(self.root)
+        self.assertEqual(latest_snapshot_pair(self.root, partition=("111111111111", "us-east-1")), (a1, a2))
+        with self.assertRaisesRegex(ValueError, "found 1"):
+            latest_snapshot_pair(self.root, partition=("222222222222", "us-east-1"))
+        os.remove(b2)
+        self.assertEqual(latest_snapshot_pair(self.root), (a1, a2))
+
+
+if __name__ == '__main__':
+    unittest.main()
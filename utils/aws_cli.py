@@ -3,27 +3,115 @@ import json
 import logging
 import subprocess
 from typing import Optional, Dict, Any
-from tenacity import retry, stop_after_attempt, wait_exponential
+from botocore.exceptions import BotoCoreError, ClientError
+
+from utils.aws_transport import UnsupportedCommandError, get_default_transport
+from utils.retry import AwsCliError, CircuitOpenError, classify_error, get_retry_policy
+from utils.metrics import get_run_metrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def run_aws_cli(command: str, service: str) -> Optional[Dict[str, Any]]:
+# Transport used by run_aws_cli: "boto3" (in-process, default) or "subprocess" (aws CLI)
+TRANSPORTS = ("boto3", "subprocess")
+_transport = os.environ.get("AWS_CLI_TRANSPORT", "boto3")
+
+
+def set_transport(transport: str) -> None:
+    """
+    Selects the transport used by run_aws_cli.
+
+    Args:
+        transport (str): "boto3" to execute commands in-process through shared boto3 clients,
+            or "subprocess" to shell out to the aws CLI.
+
+    Raises:
+        ValueError: If the transport name is not recognised.
+    """
+    global _transport
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {transport!r}, expected one of {TRANSPORTS}")
+    _transport = transport
+
+
+def get_transport() -> str:
+    """Returns the name of the transport currently used by run_aws_cli."""
+    return _transport
+
+
+# Errors that end a command with an empty result instead of failing the run
+_AWS_ERRORS = (ClientError, BotoCoreError, AwsCliError, CircuitOpenError, subprocess.TimeoutExpired,
+               json.JSONDecodeError)
+
+
+def run_aws_cli(command: str, service: str, transport: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     Execute an AWS CLI command with retries and error handling.
-    
+
+    By default the command is translated into a boto3 call and executed in-process.
+    Commands that cannot be translated, and all commands when the "subprocess"
+    transport is selected, are run through the aws CLI instead.
+
+    Failures are classified by the process-wide RetryPolicy (utils.retry): throttling and
+    transient errors are retried with decorrelated jitter within the run's retry budget,
+    fatal errors are not, and a service that keeps failing has its circuit opened.
+
     Args:
         command (str): AWS CLI command to execute
         service (str): The AWS service being queried
-        
+        transport (Optional[str]): Overrides the selected transport for this call
+
     Returns:
-        Optional[Dict[str, Any]]: Parsed JSON output from the command or an empty list if an error occurs
-        
+        Optional[Dict[str, Any]]: Parsed JSON output keyed by service, or an empty list if the
+            command failed after its retries, failed fatally, or its service's circuit is open
+
     Raises:
-        subprocess.TimeoutExpired: If command execution times out
-        json.JSONDecodeError: If command output is not valid JSON
-        Exception: For other unexpected errors
+        Exception: For unexpected errors that are not AWS or aws CLI failures
+    """
+    try:
+        return get_retry_policy().call(service, _execute, command, service, transport)
+    except _AWS_ERRORS as e:
+        logger.error(f"{service} command failed ({classify_error(e)}): {e}")
+        return {service: []}
+
+
+def _execute(command: str, service: str, transport: Optional[str] = None) -> Dict[str, Any]:
+    if (transport or _transport) == "boto3":
+        try:
+            return _run_in_process(command, service)
+        except UnsupportedCommandError as e:
+            logger.debug(f"Falling back to the aws CLI for '{command}': {e}")
+    return _run_subprocess(command, service)
+
+
+def _run_in_process(command: str, service: str) -> Optional[Dict[str, Any]]:
+    """
+    Executes an AWS CLI command in-process through the shared boto3 transport.
+
+    Raises:
+        UnsupportedCommandError: If the command cannot be translated into a boto3 call.
+        botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError: If the call fails.
+    """
+    transport = get_default_transport()
+    parsed = transport.parse(command)
+    logger.info(f"Executing {parsed.service}.{parsed.operation} in-process ({parsed.region})")
+    output = transport.execute(parsed)
+
+    if not output:
+        logger.warning(f"No data found for {service}")
+        return {service: []}
+    logger.info(f"Successfully retrieved {service} output in-process")
+    return {service: output}
+
+
+def _run_subprocess(command: str, service: str) -> Optional[Dict[str, Any]]:
+    """
+    Executes an AWS CLI command by shelling out to the aws CLI.
+
+    Raises:
+        AwsCliError: If the aws CLI exits with a non-zero status.
+        json.JSONDecodeError: If the output is not valid JSON (e.g. truncated).
+        subprocess.TimeoutExpired: If the command runs for more than 300 seconds.
     """
     try:
         if "--region" not in command:
@@ -31,18 +119,18 @@ def run_aws_cli(command: str, service: str) -> Optional[Dict[str, Any]]:
         if "--output" not in command:
             command += " --output json"
         logger.info(f"Executing command: {command}")
-        
-        result = subprocess.run(command, shell=True, stdout=subprocess.PIPE, 
+
+        result = subprocess.run(command, shell=True, stdout=subprocess.PIPE,
                               stderr=subprocess.PIPE, timeout=300, text=True)
-        
+
         # Log the raw output for debugging
         logger.debug(f"Raw stdout: {result.stdout[:500]}...")
         logger.debug(f"Raw stderr: {result.stderr[:500]}...")
-        
+
+        tokens = command.split()
+        get_run_metrics().record_api_call(tokens[1], tokens[2], len(result.stdout))
         if result.returncode != 0:
-            logger.error(f"Command failed with exit code {result.returncode}")
-            logger.error(f"stderr: {result.stderr}")
-            return {service: []}
+            raise AwsCliError(result.returncode, result.stderr)
 
         if not result.stdout or result.stdout.isspace():
             logger.error("Command returned empty output")
@@ -50,15 +138,14 @@ def run_aws_cli(command: str, service: str) -> Optional[Dict[str, Any]]:
 
         try:
             output = json.loads(result.stdout)
-            if not output:
-                logger.warning(f"No data found for {service}")
-                return {service: []}
-            logger.info(f"Successfully parsed JSON output with {len(str(output))} characters")
-            return {service: output}
-        except json.JSONDecodeError as je:
-            logger.error(f"JSON parse error: {je}")
+        except json.JSONDecodeError:
             logger.error(f"Failed JSON string: {result.stdout[:200]}...")
+            raise
+        if not output:
+            logger.warning(f"No data found for {service}")
             return {service: []}
+        logger.info(f"Successfully parsed JSON output ({len(result.stdout)} bytes)")
+        return {service: output}
     except subprocess.CalledProcessError as e:
         logger.error(f"Command failed with error: {e.stderr}")
         return {service: []}
@@ -68,6 +155,8 @@ def run_aws_cli(command: str, service: str) -> Optional[Dict[str, Any]]:
     except subprocess.TimeoutExpired:
         logger.error(f"Command timed out after 300 seconds: {command}")
         raise
+    except (AwsCliError, json.JSONDecodeError):
+        raise
     except Exception as e:
         logger.error(f"Unexpected error running command: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,272 @@
+import os
+import json
+import shlex
+import logging
+import datetime
+import threading
+from typing import Optional, Dict, Any, List
+
+import jmespath
+from botocore import xform_name
+
+from utils.client_pool import ClientPool, get_default_pool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# CLI pagination options mapped onto a botocore PaginationConfig
+_PAGINATION_OPTIONS = {"--max-items": "MaxItems", "--page-size": "PageSize", "--starting-token": "StartingToken"}
+
+
+class UnsupportedCommandError(ValueError):
+    """Raised when a CLI command cannot be mapped onto an in-process boto3 call."""
+
+
+class ParsedCommand:
+    """
+    An AWS CLI command translated into a boto3 operation.
+
+    Attributes:
+        service (str): The boto3 service name (e.g. "inspector2").
+        operation (str): The boto3 client method name (e.g. "list_findings").
+        params (Dict[str, Any]): Keyword arguments for the operation.
+        region (str): The region the call is made against.
+        profile (Optional[str]): The named profile, if one was given.
+        query (Optional[str]): A JMESPath expression applied to the result, as with --query.
+        pagination (Dict[str, Any]): PaginationConfig for paginated operations.
+        paginate (bool): Whether the command should be fully paginated, as the CLI does by default.
+    """
+
+    def __init__(self, service: str, operation: str, params: Dict[str, Any], region: str,
+                 profile: Optional[str] = None, query: Optional[str] = None,
+                 pagination: Optional[Dict[str, Any]] = None, paginate: bool = True):
+        self.service = service
+        self.operation = operation
+        self.params = params
+        self.region = region
+        self.profile = profile
+        self.query = query
+        self.pagination = pagination or {}
+        self.paginate = paginate
+
+
+class Boto3Transport:
+    """
+    Executes AWS CLI style commands in-process through shared boto3 clients.
+
+    Clients come from a ClientPool, created once per (service, region, profile) and
+    reused for every subsequent call, so credential resolution and endpoint/model
+    loading happen once per run instead of once per command.
+
+    Parameters:
+        pool (Optional[ClientPool]): The pool to take clients from. Default is the
+            process-wide pool.
+    """
+
+    def __init__(self, pool: Optional[ClientPool] = None):
+        self.pool = pool
+
+    def get_client(self, service: str, region: str, profile: Optional[str] = None):
+        """
+        Returns a shared boto3 client for the given service, region and profile.
+
+        Args:
+            service (str): The boto3 service name.
+            region (str): The AWS region.
+            profile (Optional[str]): The named profile, or None for the default credential chain.
+
+        Returns:
+            A boto3 client.
+        """
+        pool = self.pool or get_default_pool()
+        return pool.client(service, region, profile=profile)
+
+    def parse(self, command: str) -> ParsedCommand:
+        """
+        Translates an AWS CLI command string into a boto3 operation call.
+
+        Args:
+            command (str): AWS CLI command, e.g. "aws ec2 describe-instances --region us-east-1".
+
+        Returns:
+            ParsedCommand: The translated command.
+
+        Raises:
+            UnsupportedCommandError: If the command uses syntax that has no in-process equivalent
+                (CLI shorthand syntax, file:// arguments, unknown services or options).
+        """
+        try:
+            tokens = shlex.split(command)
+        except ValueError as e:
+            raise UnsupportedCommandError(f"Cannot tokenize command: {e}") from e
+        if len(tokens) < 3 or tokens[0] != "aws":
+            raise UnsupportedCommandError(f"Not an AWS CLI command: {command}")
+
+        service, cli_operation = tokens[1], tokens[2]
+        options = self._group_options(tokens[3:])
+        region = _single(options.pop("--region", None)) or os.environ.get("AWS_REGION", "us-east-1")
+        profile = _single(options.pop("--profile", None))
+        query = _single(options.pop("--query", None))
+        output = _single(options.pop("--output", None))
+        if output not in (None, "json"):
+            raise UnsupportedCommandError(f"Unsupported output format: {output}")
+
+        client = self.get_client(service, region, profile)
+        service_model = client.meta.service_model
+        operation_name = next(
+            (name for name in service_model.operation_names if xform_name(name, "-") == cli_operation),
+            None
+        )
+        if operation_name is None:
+            raise UnsupportedCommandError(f"Unknown operation {service} {cli_operation}")
+
+        paginate = "--no-paginate" not in options
+        options.pop("--no-paginate", None)
+        pagination = {}
+        for option, key in _PAGINATION_OPTIONS.items():
+            if option in options:
+                value = _single(options.pop(option))
+                pagination[key] = value if key == "StartingToken" else int(value)
+
+        members = service_model.operation_model(operation_name).input_shape.members
+        by_cli_name = {xform_name(name, "-"): name for name in members}
+        params: Dict[str, Any] = {}
+        for option, values in options.items():
+            negated = option.startswith("--no-") and option[5:] in by_cli_name
+            member_name = by_cli_name.get(option[5:] if negated else option[2:])
+            if member_name is None:
+                raise UnsupportedCommandError(f"Unknown option {option} for {service} {cli_operation}")
+            params[member_name] = _convert_value(members[member_name], values, negated)
+
+        return ParsedCommand(service, xform_name(operation_name), params, region, profile,
+                             query, pagination, paginate)
+
+    def execute(self, parsed: ParsedCommand) -> Any:
+        """
+        Executes a parsed command and returns the output the AWS CLI would have printed.
+
+        Paginated operations are fully paginated and merged, matching the CLI's default
+        behaviour. Datetimes are rendered as ISO 8601 strings and ResponseMetadata is dropped.
+
+        Args:
+            parsed (ParsedCommand): The command to execute.
+
+        Returns:
+            Any: The JSON-compatible command output.
+
+        Raises:
+            botocore.exceptions.ClientError: If the service returns an error.
+            botocore.exceptions.BotoCoreError: For client-side errors (credentials, endpoints).
+        """
+        client = self.get_client(parsed.service, parsed.region, parsed.profile)
+        if parsed.paginate and client.can_paginate(parsed.operation):
+            paginator = client.get_paginator(parsed.operation)
+            result = paginator.paginate(PaginationConfig=parsed.pagination, **parsed.params).build_full_result()
+        else:
+            result = getattr(client, parsed.operation)(**parsed.params)
+        result.pop("ResponseMetadata", None)
+        result = to_json_compatible(result)
+        if parsed.query:
+            result = jmespath.search(parsed.query, result)
+        return result
+
+    def run(self, command: str) -> Any:
+        """
+        Parses and executes an AWS CLI command in-process.
+
+        Args:
+            command (str): AWS CLI command to execute.
+
+        Returns:
+            Any: The JSON-compatible command output.
+        """
+        return self.execute(self.parse(command))
+
+    @staticmethod
+    def _group_options(tokens: List[str]) -> Dict[str, List[str]]:
+        options: Dict[str, List[str]] = {}
+        current = None
+        for token in tokens:
+            if token.startswith("--"):
+                current = token
+                options.setdefault(current, [])
+            elif current is None:
+                raise UnsupportedCommandError(f"Unexpected positional argument: {token}")
+            else:
+                options[current].append(token)
+        return options
+
+
+def _single(values: Optional[List[str]]) -> Optional[str]:
+    if not values:
+        return None
+    if len(values) != 1:
+        raise UnsupportedCommandError(f"Expected a single value, got {values}")
+    return values[0]
+
+
+def _convert_value(shape, values: List[str], negated: bool) -> Any:
+    type_name = shape.type_name
+    if type_name == "boolean":
+        if values:
+            raise UnsupportedCommandError(f"Boolean option does not take a value: {values}")
+        return not negated
+    if type_name in ("structure", "map") or (type_name == "list" and len(values) == 1
+                                              and values[0].lstrip().startswith("[")):
+        value = _single(values)
+        if not value.lstrip().startswith(("{", "[")):
+            raise UnsupportedCommandError("CLI shorthand and file:// arguments are not supported in-process")
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError as e:
+            raise UnsupportedCommandError(f"Invalid JSON argument: {e}") from e
+    if type_name == "list":
+        member_type = shape.member.type_name
+        if member_type not in ("string", "integer", "long"):
+            raise UnsupportedCommandError(f"Unsupported list member type: {member_type}")
+        return [int(v) if member_type in ("integer", "long") else v for v in values]
+    value = _single(values)
+    if type_name in ("integer", "long"):
+        return int(value)
+    if type_name in ("float", "double"):
+        return float(value)
+    return value
+
+
+def to_json_compatible(value: Any) -> Any:
+    """
+    Converts a boto3 response into the JSON-compatible form the AWS CLI prints.
+
+    Datetimes become ISO 8601 strings and bytes are decoded as UTF-8.
+    """
+    if isinstance(value, dict):
+        return {k: to_json_compatible(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_json_compatible(v) for v in value]
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+_default_transport: Optional[Boto3Transport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> Boto3Transport:
+    """Returns the process-wide Boto3Transport, creating it on first use."""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = Boto3Transport()
+    return _default_transport
+
+
+__all__ = [
+    "Boto3Transport",
+    "ParsedCommand",
+    "UnsupportedCommandError",
+    "get_default_transport",
+]
@@ -0,0 +1,158 @@
+import os
+import logging
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+import boto3
+import botocore.session
+from botocore.config import Config
+from botocore.credentials import AssumeRoleCredentialFetcher, DeferredRefreshableCredentials
+
+from utils.metrics import record_botocore_call
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_REGION = "us-east-1"
+
+ClientKey = Tuple[str, str, Optional[str], Optional[str]]
+
+
+def default_region() -> str:
+    """Returns the region clients use when none is given: AWS_REGION, else us-east-1."""
+    return os.environ.get("AWS_REGION") or DEFAULT_REGION
+
+
+class ClientPool:
+    """
+    A thread-safe pool of boto3 sessions and clients.
+
+    Sessions are created once per (profile, role) and clients once per
+    (service, region, profile, role), so credential resolution, endpoint loading and
+    botocore model parsing happen once per run rather than once per call. Clients are
+    configured for connection reuse: each keeps up to ``max_pool_connections`` open
+    HTTP connections, enough for the concurrent workers that share it.
+
+    Roles are assumed from the base credentials and refreshed automatically before
+    the temporary credentials expire. A pool created with ``role_arn`` assumes that role
+    for every client requested without an explicit one, so code that is unaware of
+    accounts (e.g. the CLI transport) runs against the pool's account.
+
+    Every call made through a pooled client is counted, with its response size, in the
+    current run's metrics (utils.metrics).
+
+    Parameters:
+        max_pool_connections (int): Open connections kept per client. Default is 50.
+        tcp_keepalive (bool): Enable TCP keep-alive on pooled connections. Default is True.
+        connect_timeout (float): Seconds to wait for a connection. Default is 10.
+        read_timeout (float): Seconds to wait for a response. Default is 60.
+        role_session_name (str): Session name used when assuming roles. Default is "InspectorGadget".
+        role_arn (Optional[str]): Role assumed by default. Default is None (base credentials).
+    """
+
+    def __init__(self, max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS, tcp_keepalive: bool = True,
+                 connect_timeout: float = 10, read_timeout: float = 60,
+                 role_session_name: str = "InspectorGadget", role_arn: Optional[str] = None):
+        self.config = Config(max_pool_connections=max_pool_connections, tcp_keepalive=tcp_keepalive,
+                             connect_timeout=connect_timeout, read_timeout=read_timeout)
+        self.role_session_name = role_session_name
+        self.role_arn = role_arn
+        self._sessions: Dict[Tuple[Optional[str], Optional[str]], boto3.session.Session] = {}
+        self._clients: Dict[ClientKey, Any] = {}
+        self._lock = threading.RLock()
+
+    def session(self, profile: Optional[str] = None, role_arn: Optional[str] = None) -> boto3.session.Session:
+        """
+        Returns the shared session for a profile, optionally assuming a role from it.
+
+        Args:
+            profile (Optional[str]): The named profile, or None for the default credential chain.
+            role_arn (Optional[str]): An IAM role to assume with the profile's credentials.
+
+        Returns:
+            boto3.session.Session: The shared session.
+        """
+        key = (profile, role_arn)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    if role_arn is None:
+                        session = boto3.session.Session(profile_name=profile)
+                    else:
+                        session = self._assume_role_session(self.session(profile), role_arn)
+                    self._sessions[key] = session
+        return session
+
+    def _assume_role_session(self, base: boto3.session.Session, role_arn: str) -> boto3.session.Session:
+        fetcher = AssumeRoleCredentialFetcher(
+            client_creator=base._session.create_client,
+            source_credentials=base.get_credentials(),
+            role_arn=role_arn,
+            extra_args={"RoleSessionName": self.role_session_name},
+        )
+        credentials = DeferredRefreshableCredentials(method="assume-role", refresh_using=fetcher.fetch_credentials)
+        botocore_session = botocore.session.Session()
+        botocore_session._credentials = credentials
+        logger.info(f"Created session for role {role_arn}")
+        return boto3.session.Session(botocore_session=botocore_session)
+
+    def client(self, service: str, region: Optional[str] = None, role_arn: Optional[str] = None,
+               profile: Optional[str] = None):
+        """
+        Returns a shared client for a service, region and account role.
+
+        Args:
+            service (str): The boto3 service name (e.g. "inspector2").
+            region (Optional[str]): The AWS region; defaults to AWS_REGION or us-east-1.
+            role_arn (Optional[str]): An IAM role to assume, for cross-account access. Default is
+                the pool's role_arn.
+            profile (Optional[str]): The named profile, or None for the default credential chain.
+
+        Returns:
+            A boto3 client. boto3 clients are thread-safe and may be shared across workers.
+        """
+        key = (service, region or default_region(), profile, role_arn or self.role_arn)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    session = self.session(profile, key[3])
+                    client = session.client(service, region_name=key[1], config=self.config)
+                    client.meta.events.register("after-call", record_botocore_call)
+                    self._clients[key] = client
+        return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+_default_pool: Optional[ClientPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> ClientPool:
+    """Returns the process-wide ClientPool, creating it on first use."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ClientPool()
+    return _default_pool
+
+
+def set_default_pool(pool: ClientPool) -> None:
+    """Replaces the process-wide ClientPool, e.g. with one tuned for a larger worker count."""
+    global _default_pool
+    with _default_pool_lock:
+        _default_pool = pool
+
+
+__all__ = [
+    "ClientPool",
+    "get_default_pool",
+    "set_default_pool",
+]
@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import logging
+import datetime
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from utils.retry import RetryStats
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MetricsHook = Callable[["RunMetrics"], None]
+
+# A Prometheus-style sample: metric name, labels, value
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class RunMetrics:
+    """
+    Thread-safe counters and timers for one collection run.
+
+    Recording is a dict update under a lock, so instrumentation can stay enabled in
+    production. Stage timers accumulate wall time and invocation counts per
+    (service, stage); API calls and bytes received are counted per service operation.
+    ``finish`` adds the run totals (wall time, findings per second, retries, throttles
+    and peak RSS), passes the metrics to every registered hook and returns the summary.
+
+    Parameters:
+        clock (Callable[[], float]): Monotonic clock. Default is time.perf_counter.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._started = clock()
+        self._stages: Dict[Tuple[str, str], List[float]] = {}
+        self._api_calls: Dict[Tuple[str, str], List[int]] = {}
+        self._findings: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.summary: Optional[Dict[str, Any]] = None
+
+    def add_time(self, service: str, stage: str, seconds: float) -> None:
+        """Adds one timed invocation of a stage."""
+        with self._lock:
+            totals = self._stages.setdefault((service, stage), [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    @contextmanager
+    def timer(self, service: str, stage: str) -> Iterator[None]:
+        """Times the enclosed block as one invocation of a stage."""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.add_time(service, stage, self.clock() - started)
+
+    def timed_iter(self, service: str, stage: str, items: Iterable[T], count_findings: bool = False) -> Iterator[T]:
+        """
+        Yields items, timing only the time spent producing them.
+
+        Time the consumer spends between items is excluded, so a stage is not charged for
+        the work of the stages downstream of it.
+
+        Args:
+            service (str): The service the stage belongs to.
+            stage (str): The stage name.
+            items (Iterable[T]): The stage's output.
+            count_findings (bool): Count the items as findings of the service. Default is False.
+        """
+        iterator = iter(items)
+        spent = 0.0
+        produced = 0
+        try:
+            while True:
+                started = self.clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    spent += self.clock() - started
+                    return
+                spent += self.clock() - started
+                produced += 1
+                yield item
+        finally:
+            self.add_time(service, stage, spent)
+            if count_findings:
+                self.add_findings(service, produced)
+
+    def add_findings(self, service: str, count: int) -> None:
+        with self._lock:
+            self._findings[service] = self._findings.get(service, 0) + count
+
+    def record_api_call(self, service: str, operation: str, bytes_received: int = 0) -> None:
+        """Counts one API call and the size of its response body."""
+        with self._lock:
+            totals = self._api_calls.setdefault((service, operation), [0, 0])
+            totals[0] += 1
+            totals[1] += bytes_received
+
+    def finish(self, retry_stats: Optional[RetryStats] = None, throttles: int = 0) -> Dict[str, Any]:
+        """
+        Completes the run: computes the totals, calls every registered hook and returns the summary.
+
+        Args:
+            retry_stats (Optional[RetryStats]): The run's CLI retry counters.
+            throttles (int): Inspector2 throttling responses seen by the rate limiter.
+
+        Returns:
+            Dict[str, Any]: The JSON-compatible metrics summary, also stored in ``summary``.
+        """
+        wall = self.clock() - self._started
+        with self._lock:
+            findings = sum(self._findings.values())
+            summary = {
+                "startedAt": self.started_at.isoformat(),
+                "wallSeconds": round(wall, 3),
+                "findings": findings,
+                "findingsPerSecond": round(findings / wall, 1) if wall else 0.0,
+                "findingsByService": dict(self._findings),
+                "stages": [{"service": service, "stage": stage, "seconds": round(seconds, 3), "count": count}
+                           for (service, stage), (seconds, count) in sorted(self._stages.items())],
+                "apiCalls": [{"service": service, "operation": operation, "calls": calls,
+                              "bytesReceived": received}
+                             for (service, operation), (calls, received) in sorted(self._api_calls.items())],
+                "bytesReceived": sum(received for _, received in self._api_calls.values()),
+                "throttles": throttles,
+                "retries": retry_stats.summary() if retry_stats is not None else {},
+                "peakRssBytes": peak_rss_bytes(),
+            }
+        self.summary = summary
+        for hook in list(_hooks):
+            try:
+                hook(self)
+            except Exception:
+                logger.exception(f"Metrics hook {hook!r} failed")
+        return summary
+
+    def samples(self) -> Iterator[Sample]:
+        """
+        Yields the finished run's metrics as Prometheus-style (name, labels, value) samples.
+
+        Raises:
+            RuntimeError: If the run has not finished.
+        """
+        if self.summary is None:
+            raise RuntimeError("samples() requires a finished run")
+        summary = self.summary
+        yield "inspector_run_wall_seconds", {}, summary["wallSeconds"]
+        yield "inspector_run_findings_per_second", {}, summary["findingsPerSecond"]
+        yield "inspector_run_peak_rss_bytes", {}, summary["peakRssBytes"]
+        yield "inspector_run_throttles_total", {}, summary["throttles"]
+        for service, count in summary["findingsByService"].items():
+            yield "inspector_run_findings_total", {"service": service}, count
+        for stage in summary["stages"]:
+            labels = {"service": stage["service"], "stage": stage["stage"]}
+            yield "inspector_stage_seconds_total", labels, stage["seconds"]
+            yield "inspector_stage_invocations_total", labels, stage["count"]
+        for call in summary["apiCalls"]:
+            labels = {"service": call["service"], "operation": call["operation"]}
+            yield "inspector_api_calls_total", labels, call["calls"]
+            yield "inspector_api_bytes_received_total", labels, call["bytesReceived"]
+        for service, counters in summary["retries"].items():
+            yield "inspector_cli_retries_total", {"service": service}, counters["retries"]
+            yield "inspector_cli_failures_total", {"service": service}, counters["failures"]
+
+    def write(self, path: str) -> str:
+        """Atomically writes the finished run's summary as JSON and returns the path."""
+        if self.summary is None:
+            raise RuntimeError("write() requires a finished run")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.summary, f, indent=2)
+        os.replace(temp_path, path)
+        logger.info(f"Run metrics written to {path}")
+        return path
+
+
+def peak_rss_bytes() -> int:
+    """Returns the process's peak resident set size, or 0 where it is not available."""
+    if resource is None:
+        return 0
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def record_botocore_call(http_response=None, model=None, **kwargs) -> None:
+    """
+    botocore "after-call" handler counting every API call of a client against the current run.
+
+    The response size is taken from Content-Length, so streaming bodies are never read here.
+    """
+    if model is None:
+        return
+    received = 0
+    if http_response is not None:
+        try:
+            received = int(http_response.headers.get("content-length", 0))
+        except (TypeError, ValueError):
+            received = 0
+    get_run_metrics().record_api_call(model.service_model.service_name, model.name, received)
+
+
+_hooks: List[MetricsHook] = []
+
+
+def add_metrics_hook(hook: MetricsHook) -> None:
+    """
+    Registers a hook called with the RunMetrics of every finished run, e.g. to push
+    ``RunMetrics.samples()`` to a Prometheus Pushgateway. Hook errors are logged and ignored.
+    """
+    _hooks.append(hook)
+
+
+def remove_metrics_hook(hook: MetricsHook) -> None:
+    """Unregisters a hook added with add_metrics_hook."""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+_current: Optional[RunMetrics] = None
+_current_lock = threading.Lock()
+
+
+def get_run_metrics() -> RunMetrics:
+    """Returns the process-wide RunMetrics of the current run, creating it on first use."""
+    global _current
+    if _current is None:
+        with _current_lock:
+            if _current is None:
+                _current = RunMetrics()
+    return _current
+
+
+def set_run_metrics(metrics: RunMetrics) -> None:
+    """Replaces the process-wide RunMetrics, e.g. at the start of a run."""
+    global _current
+    with _current_lock:
+        _current = metrics
+
+
+__all__ = [
+    "RunMetrics",
+    "add_metrics_hook",
+    "get_run_metrics",
+    "peak_rss_bytes",
+    "record_botocore_call",
+    "remove_metrics_hook",
+    "set_run_metrics",
+]
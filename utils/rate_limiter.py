@@ -0,0 +1,101 @@
+import time
+import logging
+import threading
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+THROTTLING_ERROR_CODES = frozenset({
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ProvisionedThroughputExceededException",
+    "SlowDown",
+})
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Returns True if the exception is an AWS throttling error."""
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+    return False
+
+
+class AdaptiveRateLimiter:
+    """
+    A thread-safe token bucket whose refill rate adapts to throttling (AIMD).
+
+    Every API call takes a token before it is sent. When the service answers with a
+    throttling error the rate is cut multiplicatively; each successful call then raises
+    it additively again, so the limiter settles just under the account's real quota.
+
+    Parameters:
+        rate (float): Initial requests per second. Default is 10.
+        burst (Optional[float]): Bucket capacity. Defaults to the initial rate.
+        min_rate (float): Lower bound for the rate. Default is 0.5.
+        max_rate (Optional[float]): Upper bound for the rate. Defaults to twice the initial rate.
+        decrease_factor (float): Multiplier applied to the rate on throttling. Default is 0.5.
+        increase_step (float): Requests per second regained per second of successful calls. Default is 1.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: Optional[float] = None, min_rate: float = 0.5,
+                 max_rate: Optional[float] = None, decrease_factor: float = 0.5, increase_step: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate * 2
+        self.capacity = burst if burst is not None else rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.throttle_count = 0
+        self.acquired_count = 0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Blocks until the requested tokens are available.
+
+        Args:
+            tokens (float): Number of tokens to take. Default is 1.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.acquired_count += 1
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def on_throttle(self) -> None:
+        """Records a throttling response and reduces the rate."""
+        with self._lock:
+            self._refill()
+            self.throttle_count += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+        logger.warning(f"Throttled by AWS; reducing request rate to {self.rate:.2f}/s")
+
+    def on_success(self) -> None:
+        """Records a successful call and lets the rate recover towards max_rate."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step / self.rate)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
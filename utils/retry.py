@@ -0,0 +1,366 @@
+import re
+import json
+import time
+import random
+import logging
+import threading
+import subprocess
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import (
+    ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError,
+    ConnectTimeoutError, EndpointConnectionError,
+)
+from tenacity import Retrying, RetryCallState, retry_if_exception, stop_after_attempt
+from tenacity.stop import stop_base
+from tenacity.wait import wait_base
+
+from utils.rate_limiter import THROTTLING_ERROR_CODES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Error classes
+THROTTLE = "throttle"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+TRANSIENT_ERROR_CODES = frozenset({
+    "InternalError",
+    "InternalFailure",
+    "InternalServerError",
+    "InternalServerException",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+    "RequestTimeout",
+    "RequestTimeoutException",
+    "PriorRequestNotComplete",
+    "EC2ThrottledException",
+})
+
+_CLI_ERROR_CODE = re.compile(r"An error occurred \((\w+)\)")
+_CLI_TRANSIENT_MESSAGES = ("Could not connect to the endpoint URL", "Read timeout on endpoint URL",
+                           "Connection was closed", "Connect timeout on endpoint URL")
+
+
+class AwsCliError(RuntimeError):
+    """Raised when the aws CLI exits with a non-zero status."""
+
+    def __init__(self, returncode: int, stderr: str):
+        super().__init__(f"aws CLI exited with status {returncode}: {stderr.strip()[:500]}")
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a service whose circuit breaker is open."""
+
+
+def _classify_code(code: Optional[str]) -> str:
+    if code in THROTTLING_ERROR_CODES:
+        return THROTTLE
+    if code in TRANSIENT_ERROR_CODES:
+        return TRANSIENT
+    return FATAL
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classifies an error raised by an AWS call as THROTTLE, TRANSIENT or FATAL.
+
+    Throttling and transient errors (5xx responses, connection problems, timeouts,
+    truncated output) are worth retrying; fatal errors (access denied, validation
+    errors, missing resources, anything unrecognised) are not.
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        kind = _classify_code(code)
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        if kind == FATAL and status >= 500:
+            return TRANSIENT
+        return kind
+    if isinstance(error, AwsCliError):
+        match = _CLI_ERROR_CODE.search(error.stderr)
+        if match:
+            return _classify_code(match.group(1))
+        if "Rate exceeded" in error.stderr:
+            return THROTTLE
+        if any(message in error.stderr for message in _CLI_TRANSIENT_MESSAGES):
+            return TRANSIENT
+        return FATAL
+    if isinstance(error, (EndpointConnectionError, BotoConnectionError, ReadTimeoutError, ConnectTimeoutError,
+                          subprocess.TimeoutExpired, json.JSONDecodeError)):
+        return TRANSIENT
+    return FATAL
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Returns True for throttling and transient errors."""
+    return classify_error(error) != FATAL
+
+
+class RetryBudget:
+    """
+    A run-wide cap on retries, shared by every service and thread.
+
+    Once either the number of retries or the total time spent waiting before retries is
+    used up, failing calls are no longer retried, so a bad run fails fast instead of
+    stalling.
+
+    Parameters:
+        max_retries (int): Retries allowed per run. Default is 200.
+        max_wait_seconds (float): Seconds of backoff allowed per run. Default is 600.
+    """
+
+    def __init__(self, max_retries: int = 200, max_wait_seconds: float = 600.0):
+        self.max_retries = max_retries
+        self.max_wait_seconds = max_wait_seconds
+        self.retries = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.retries >= self.max_retries or self.wait_seconds >= self.max_wait_seconds
+
+    def spend(self, wait_seconds: float) -> None:
+        """Records one retry and the backoff preceding it."""
+        with self._lock:
+            self.retries += 1
+            self.wait_seconds += wait_seconds
+
+
+class CircuitBreaker:
+    """
+    Stops calling a service after repeated failures.
+
+    After ``failure_threshold`` consecutive failed calls the circuit opens and calls are
+    rejected for ``reset_timeout`` seconds. The next call is then let through as a probe:
+    success closes the circuit, failure opens it again. Every probe must end in one of the
+    two, or the circuit stays half-open and rejects every later call.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns True if a call may be made now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+
+
+class RetryStats:
+    """Thread-safe per-service counters of retries, time spent waiting and failures."""
+
+    def __init__(self):
+        self._services: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, service: str, counter: str, amount: float = 1) -> None:
+        with self._lock:
+            counters = self._services.setdefault(service, {
+                "calls": 0, "retries": 0, "throttles": 0, "waitSeconds": 0.0, "failures": 0, "shortCircuited": 0,
+            })
+            counters[counter] += amount
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns a copy of the counters, keyed by service."""
+        with self._lock:
+            return {service: dict(counters) for service, counters in self._services.items()}
+
+    @property
+    def total_retries(self) -> int:
+        return int(sum(counters["retries"] for counters in self.summary().values()))
+
+    @property
+    def total_wait_seconds(self) -> float:
+        return sum(counters["waitSeconds"] for counters in self.summary().values())
+
+
+class wait_decorrelated_jitter(wait_base):
+    """
+    Decorrelated jitter backoff: each wait is drawn between ``base`` and three times the
+    previous wait, capped at ``cap``. Spreads retries from many workers apart while still
+    backing off quickly under sustained throttling.
+    """
+
+    def __init__(self, base: float = 1.0, cap: float = 30.0, rng: Optional[random.Random] = None):
+        self.base = base
+        self.cap = cap
+        self.rng = rng or random.Random()
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        previous = getattr(retry_state, "upcoming_sleep", 0) or self.base
+        return min(self.cap, self.rng.uniform(self.base, previous * 3))
+
+
+class stop_when_budget_exhausted(stop_base):
+    """Stops retrying once the shared RetryBudget is used up."""
+
+    def __init__(self, budget: RetryBudget):
+        self.budget = budget
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        return self.budget.exhausted
+
+
+class RetryPolicy:
+    """
+    Retries AWS calls according to their error class, within a run-wide budget and a
+    per-service circuit breaker.
+
+    Throttling and transient errors are retried with decorrelated jitter (throttling
+    starts from a longer base delay); fatal errors are raised immediately. A service whose
+    calls keep failing after their retries has its circuit opened, so later calls to it fail
+    fast with CircuitOpenError instead of using up the run's time.
+
+    Parameters:
+        max_attempts (int): Attempts per call, including the first. Default is 5.
+        base_delay (float): Base backoff for transient errors, in seconds. Default is 1.
+        throttle_base_delay (float): Base backoff for throttling errors. Default is 2.
+        max_delay (float): Cap on a single backoff. Default is 30.
+        budget (Optional[RetryBudget]): The run-wide budget. Default is a new RetryBudget.
+        failure_threshold (int): Consecutive failed calls that open a service's circuit. Default is 5.
+        reset_timeout (float): Seconds a circuit stays open before a probe call. Default is 60.
+        sleep (Callable[[float], None]): Sleep function, for tests. Default is time.sleep.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, throttle_base_delay: float = 2.0,
+                 max_delay: float = 30.0, budget: Optional[RetryBudget] = None, failure_threshold: int = 5,
+                 reset_timeout: float = 60.0, sleep: Callable[[float], None] = time.sleep):
+        self.max_attempts = max_attempts
+        self.budget = budget or RetryBudget()
+        self.stats = RetryStats()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sleep = sleep
+        self._waits = {
+            TRANSIENT: wait_decorrelated_jitter(base_delay, max_delay),
+            THROTTLE: wait_decorrelated_jitter(throttle_base_delay, max_delay),
+        }
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, service: str) -> CircuitBreaker:
+        """Returns the circuit breaker for a service."""
+        with self._lock:
+            breaker = self._breakers.get(service)
+            if breaker is None:
+                breaker = self._breakers[service] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        kind = classify_error(retry_state.outcome.exception())
+        return self._waits.get(kind, self._waits[TRANSIENT])(retry_state)
+
+    def call(self, service: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Calls fn, retrying throttling and transient errors.
+
+        Raises:
+            CircuitOpenError: If the service's circuit is open.
+            Exception: The last error, once it is fatal or retries are exhausted.
+        """
+        breaker = self.breaker(service)
+        if not breaker.allow():
+            self.stats.record(service, "shortCircuited")
+            raise CircuitOpenError(f"Circuit open for {service}; skipping call")
+
+        def before_sleep(retry_state: RetryCallState) -> None:
+            error = retry_state.outcome.exception()
+            wait = retry_state.upcoming_sleep
+            self.budget.spend(wait)
+            self.stats.record(service, "retries")
+            self.stats.record(service, "waitSeconds", wait)
+            if classify_error(error) == THROTTLE:
+                self.stats.record(service, "throttles")
+            logger.warning(f"{service}: retrying after {classify_error(error)} error in {wait:.1f}s "
+                           f"(attempt {retry_state.attempt_number}): {error}")
+
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts) | stop_when_budget_exhausted(self.budget),
+            wait=self._wait,
+            retry=retry_if_exception(is_retryable),
+            before_sleep=before_sleep,
+            sleep=self.sleep,
+            reraise=True,
+        )
+        self.stats.record(service, "calls")
+        try:
+            result = retrying(fn, *args, **kwargs)
+        except Exception as e:
+            self.stats.record(service, "failures")
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                # A fatal error (e.g. AccessDenied) is an answer from a reachable service, so it
+                # does not count against the circuit and resolves a half-open probe
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+
+_default_policy: Optional[RetryPolicy] = None
+_default_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Returns the process-wide RetryPolicy, creating it on first use."""
+    global _default_policy
+    if _default_policy is None:
+        with _default_policy_lock:
+            if _default_policy is None:
+                _default_policy = RetryPolicy()
+    return _default_policy
+
+
+def set_retry_policy(policy: RetryPolicy) -> None:
+    """Replaces the process-wide RetryPolicy, e.g. with a per-run budget."""
+    global _default_policy
+    with _default_policy_lock:
+        _default_policy = policy
+
+
+__all__ = [
+    "THROTTLE",
+    "TRANSIENT",
+    "FATAL",
+    "AwsCliError",
+    "CircuitOpenError",
+    "CircuitBreaker",
+    "RetryBudget",
+    "RetryPolicy",
+    "RetryStats",
+    "classify_error",
+    "get_retry_policy",
+    "set_retry_policy",
+]